@@ -0,0 +1,49 @@
+"""Compare the eager, TorchScript and torch.compile backends of the RON
+recurrence loop across sequence lengths.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.compiled
+"""
+
+import os
+import time
+
+import torch
+
+from src.model.ron import RandomizedOscillatorsNetwork
+from .utils import STORAGE_PATH, load_ron_state, measure
+
+BACKENDS = ("eager", "script", "compile")
+SEQ_LENS = (10, 100, 1000, 10000)
+MODEL_DIR = "params_4"
+
+
+@torch.no_grad()
+def main():
+    state_dict = load_ron_state(os.path.join(STORAGE_PATH, MODEL_DIR))
+    n_inp = state_dict["x2h"].size(0)
+    models = {}
+    for backend in BACKENDS:
+        model = RandomizedOscillatorsNetwork.from_state_dict(state_dict, dt=0.2)
+        model.set_backend(backend)
+        start = time.perf_counter()
+        model(torch.rand(1, 2, n_inp))
+        first_call_ms = 1000 * (time.perf_counter() - start)
+        print(f"{backend:<8s} first call (includes compilation): {first_call_ms:.1f}ms")
+        models[backend] = model
+
+    for seq_len in SEQ_LENS:
+        x = torch.rand(1, seq_len, n_inp)
+        reference = models["eager"](x)
+        repeat = 5 if seq_len >= 1000 else 20
+        timings = []
+        for backend, model in models.items():
+            err = (model(x) - reference).abs().max().item()
+            ms = measure(lambda: model(x), repeat=repeat, warmup=1)
+            timings.append(f"{backend}={ms:9.2f}ms (err {err:.0e})")
+        print(f"T={seq_len:<6d} " + " ".join(timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time-to-decision of the early-exit classification against the prediction on the
+whole touch, for several confidence thresholds and minimum numbers of steps, on the
+recorded follow-touch sessions found in STORAGE_PATH (random sequences are used if
+there are none). The rule stored in the header of each model is reported as well,
+next to the one :func:`calibrate_early_exit` derives from the same sequences.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.early_exit
+"""
+
+import os
+import time
+
+import numpy as np
+
+from src.model import NumpyPredictor
+from src.model.streaming import calibrate_early_exit
+from .precision import load_sessions
+from .utils import MODEL_DIRS, STORAGE_PATH
+
+THRESHOLDS = (0.8, 0.9, 0.99)
+MIN_STEPS = (1, 10, 25, 50)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for model_dir in MODEL_DIRS:
+        predictor = NumpyPredictor(model_path=os.path.join(STORAGE_PATH, model_dir))
+        n_inp = predictor.model.x2h.shape[0]
+        sequences = load_sessions(n_inp)
+        source = "recorded sessions"
+        if not sequences:
+            source = "random sequences (no recorded session found)"
+            sequences = [rng.random((rng.integers(50, 200), n_inp)) for _ in range(64)]
+        print(f"{model_dir}: {len(sequences)} {source}")
+
+        full = predictor.predict_batch(sequences, return_states="none")[0].argmax(-1)
+        lengths = np.array([len(x) for x in sequences])
+
+        def report(name: str, **rule):
+            start = time.perf_counter()
+            results = [predictor.predict_early(x, **rule) for x in sequences]
+            ms = 1000 * (time.perf_counter() - start) / len(sequences)
+            labels = np.array([pred.argmax() for pred, _ in results])
+            steps = np.array([n for _, n in results])
+            print(
+                f"  {name:<34s} steps={steps.mean():7.1f} "
+                f"({100 * np.mean(steps / lengths):5.1f}% of the touch) "
+                f"agreement={100 * np.mean(labels == full):6.2f}% latency={ms:6.2f}ms"
+            )
+
+        for min_steps in MIN_STEPS:
+            for threshold in THRESHOLDS:
+                report(
+                    f"min_steps={min_steps:<3d} threshold={threshold:<5.2f}",
+                    threshold=threshold,
+                    min_steps=min_steps,
+                )
+        report(f"stored {predictor.early_exit}")
+        rule = calibrate_early_exit(predictor, [sequences])
+        report(f"calibrated {rule}", **rule)
+
+
+if __name__ == "__main__":
+    main()
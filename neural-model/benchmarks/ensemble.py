@@ -0,0 +1,54 @@
+"""Compare running N RON members one after the other with running them as a single
+RandomizedOscillatorsEnsemble.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.ensemble
+"""
+
+import torch
+
+from src.model.ensemble import RandomizedOscillatorsEnsemble
+from src.model.ron import RandomizedOscillatorsNetwork
+from .utils import measure
+
+N_MODELS = (1, 4, 8, 16)
+N_INP = 4
+N_HID = 100
+SEQ_LEN = 100
+TOPOLOGIES = ("full", "band", "lower", "orthogonal")
+
+
+@torch.no_grad()
+def main():
+    x = torch.rand(1, SEQ_LEN, N_INP)
+    for n_models in N_MODELS:
+        models = []
+        for seed in range(n_models):
+            torch.manual_seed(seed)
+            models.append(
+                RandomizedOscillatorsNetwork(
+                    n_inp=N_INP,
+                    n_hid=N_HID,
+                    dt=0.2,
+                    gamma=(0.5 + 0.1 * seed, 1.5),
+                    epsilon=(1.5, 2.5),
+                    topology=TOPOLOGIES[seed % len(TOPOLOGIES)],
+                )
+            )
+        ensemble = RandomizedOscillatorsEnsemble(models)
+        err = max(
+            (model(x) - h).abs().max().item()
+            for model, h in zip(models, ensemble.split(ensemble(x)))
+        )
+        sequential_ms = measure(lambda: [model(x) for model in models], repeat=10)
+        ensemble_ms = measure(lambda: ensemble(x), repeat=10)
+        print(
+            f"n_models={n_models:<3d} sequential={sequential_ms:8.2f}ms "
+            f"ensemble={ensemble_ms:8.2f}ms speedup={sequential_ms / ensemble_ms:5.2f}x "
+            f"max_abs_err={err:.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
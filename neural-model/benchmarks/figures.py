@@ -0,0 +1,45 @@
+"""Server-side build time and JSON payload of the dashboard figures for the
+'grouped' and 'per_sequence' render modes, as the number of displayed touches grows
+up to the 100 allowed by the slider.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.figures
+"""
+
+import numpy as np
+
+from src.visualizer import (
+    LABEL_CLASSES,
+    TRAJECTORY_LENGTH,
+    build_figures,
+)
+from .utils import measure
+
+N_TOUCHES = (5, 25, 100)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    class_proto = {c: (rng.normal(size=3), rng.random(3)) for c in range(LABEL_CLASSES)}
+    for n in N_TOUCHES:
+        predictions = rng.dirichlet(np.full(LABEL_CLASSES, 0.3), size=n)
+        pca_data = [
+            np.cumsum(rng.normal(size=(TRAJECTORY_LENGTH, 3)), axis=0) for _ in range(n)
+        ]
+        for mode in ("per_sequence", "grouped"):
+            figures = build_figures(predictions, pca_data, class_proto, mode)
+            ms = measure(
+                lambda: build_figures(predictions, pca_data, class_proto, mode),
+                repeat=10,
+            )
+            payload = sum(len(fig.to_json()) for fig in figures)
+            traces = sum(len(fig.data) for fig in figures)
+            print(
+                f"{n:>3d} touches {mode:<12s} build={ms:8.2f}ms "
+                f"traces={traces:4d} payload={payload / 1024:8.1f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
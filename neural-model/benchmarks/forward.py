@@ -0,0 +1,61 @@
+"""Benchmark the fused RON forward pass against the original per-step loop.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.forward
+"""
+
+import os
+
+import torch
+
+from src.model.ron import RandomizedOscillatorsNetwork
+from .utils import MODEL_DIRS, STORAGE_PATH, load_ron_state, measure
+
+BATCH_SIZES = (1, 16)
+SEQ_LENS = (50, 500)
+
+
+def reference_forward(model: RandomizedOscillatorsNetwork, x: torch.Tensor):
+    """Original forward loop: per-step input projection, recurrent matrix
+    re-allocation and list + stack of the states."""
+    diffusive_matrix = model.diffusive_gamma * torch.eye(model.n_hid)
+    hy = torch.zeros(x.size(0), model.n_hid)
+    hz = torch.zeros(x.size(0), model.n_hid)
+    all_states = []
+    for t in range(x.size(1)):
+        hz = hz + model.dt * (
+            torch.tanh(
+                torch.matmul(x[:, t], model.x2h)
+                + torch.matmul(hy, model.h2h - diffusive_matrix)
+                + model.bias
+            )
+            - model.gamma * hy
+            - model.epsilon * hz
+        )
+        hy = hy + model.dt * hz
+        all_states.append(hy)
+    return torch.stack(all_states, dim=1)
+
+
+@torch.no_grad()
+def main():
+    for model_dir in MODEL_DIRS:
+        state_dict = load_ron_state(os.path.join(STORAGE_PATH, model_dir))
+        n_inp = state_dict["x2h"].size(0)
+        model = RandomizedOscillatorsNetwork.from_state_dict(state_dict, dt=0.2)
+        for n_batch in BATCH_SIZES:
+            for seq_len in SEQ_LENS:
+                x = torch.rand(n_batch, seq_len, n_inp)
+                err = (model(x) - reference_forward(model, x)).abs().max().item()
+                ref_ms = measure(lambda: reference_forward(model, x))
+                fused_ms = measure(lambda: model(x))
+                print(
+                    f"{model_dir} batch={n_batch:<3d} T={seq_len:<4d} "
+                    f"reference={ref_ms:8.3f}ms fused={fused_ms:8.3f}ms "
+                    f"speedup={ref_ms / fused_ms:5.2f}x max_abs_err={err:.2e}"
+                )
+
+
+if __name__ == "__main__":
+    main()
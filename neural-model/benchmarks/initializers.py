@@ -0,0 +1,38 @@
+"""Time the sparse reservoir initializers, returning native sparse tensors.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.initializers
+"""
+
+import time
+
+from src.model.utils import (
+    sparse_eye_init,
+    sparse_recurrent_tensor_init,
+    sparse_tensor_init,
+)
+
+N_HIDS = (1000, 10000, 50000)
+CONNECTIONS = 10
+
+
+def main():
+    for n_hid in N_HIDS:
+        timings = []
+        for name, init in (
+            (
+                "recurrent",
+                lambda: sparse_recurrent_tensor_init(n_hid, CONNECTIONS, True),
+            ),
+            ("input", lambda: sparse_tensor_init(n_hid, n_hid, CONNECTIONS, True)),
+            ("eye", lambda: sparse_eye_init(n_hid, True)),
+        ):
+            start = time.perf_counter()
+            init()
+            timings.append(f"{name}={1000 * (time.perf_counter() - start):8.2f}ms")
+        print(f"n_hid={n_hid:<6d} " + " ".join(timings))
+
+
+if __name__ == "__main__":
+    main()
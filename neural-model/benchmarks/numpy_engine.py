@@ -0,0 +1,77 @@
+"""Check parity of the NumPy engine with the torch Predictor and compare cold
+start, peak memory and per-call latency of the two backends.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.numpy_engine
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from src.model import NumpyPredictor, Predictor
+from .utils import MODEL_DIRS, STORAGE_PATH, measure
+
+# Peak RSS is read from /proc (Linux only): ru_maxrss is inherited from the
+# parent process, which already holds torch.
+COLD_START = """
+import sys, time
+import numpy as np
+def peak_rss():
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) for l in f if l.startswith("VmHWM"))
+# Import the model package alone, without the streamlit visualizer
+sys.path.insert(0, "src")
+rss = peak_rss()
+start = time.perf_counter()
+from model import {cls}
+p = {cls}(model_path={path!r})
+p(np.random.rand(1, 50, p.model.x2h.shape[0]))
+elapsed = time.perf_counter() - start
+print(elapsed * 1000, (peak_rss() - rss) / 1024)
+"""
+
+
+def cold_start(cls: str, model_path: str):
+    out = subprocess.run(
+        [sys.executable, "-c", COLD_START.format(cls=cls, path=model_path)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+
+def main():
+    for model_dir in MODEL_DIRS:
+        model_path = os.path.join(STORAGE_PATH, model_dir)
+        torch_predictor = Predictor(model_path=model_path)
+        numpy_predictor = NumpyPredictor(model_path=model_path)
+        n_inp = numpy_predictor.model.x2h.shape[0]
+
+        for n_batch, seq_len in ((1, 50), (8, 200)):
+            x = np.random.rand(n_batch, seq_len, n_inp)
+            pred_t, h_t = torch_predictor(x)
+            pred_n, h_n = numpy_predictor(x)
+            print(
+                f"{model_dir} parity batch={n_batch} T={seq_len}: "
+                f"max|dpred|={np.abs(pred_t - pred_n).max():.2e} "
+                f"max|dh|={np.abs(h_t - h_n).max():.2e} "
+                f"argmax_equal={np.array_equal(pred_t.argmax(-1), pred_n.argmax(-1))}"
+            )
+
+        x = np.random.rand(1, 50, n_inp)
+        torch_ms = measure(lambda: torch_predictor(x))
+        numpy_ms = measure(lambda: numpy_predictor(x))
+        print(f"{model_dir} per-call: torch={torch_ms:.3f}ms numpy={numpy_ms:.3f}ms")
+
+        for cls in ("Predictor", "NumpyPredictor"):
+            ms, rss = cold_start(cls, model_path)
+            print(f"{model_dir} cold start {cls}: {ms:.1f}ms, peak RSS +{rss:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
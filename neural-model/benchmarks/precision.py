@@ -0,0 +1,81 @@
+"""Accuracy-parity report of reduced-precision reservoirs and int8 readouts against
+the float32 Predictor, on the recorded follow-touch sessions found in STORAGE_PATH
+(random sequences are used if there are none).
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.precision
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.model import Predictor
+from src.sessions import load_data, min_max_normalize
+from .utils import MODEL_DIRS, STORAGE_PATH, measure
+
+CONFIGS = (
+    ("float32", True),
+    ("bfloat16", False),
+    ("bfloat16", True),
+    ("float16", False),
+    ("float16", True),
+)
+
+
+def load_sessions(n_inp: int) -> list:
+    """Load and normalize the recorded sessions with ``n_inp`` features."""
+    sessions = []
+    for path in sorted(Path(STORAGE_PATH).glob("follow_touch_*_*.json")):
+        samples = load_data(path)
+        if samples is not None and np.shape(samples)[-1] == n_inp:
+            sessions.append(min_max_normalize(samples))
+    return sessions
+
+
+def kernel_kb(predictor: Predictor) -> float:
+    kernel = predictor.model.recurrent_kernel
+    return kernel.numel() * kernel.element_size() / 1024
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for model_dir in MODEL_DIRS:
+        model_path = os.path.join(STORAGE_PATH, model_dir)
+        reference = Predictor(model_path=model_path)
+        n_inp = reference.model.x2h.size(0)
+        sequences = load_sessions(n_inp)
+        source = "recorded sessions"
+        if not sequences:
+            source = "random sequences (no recorded session found)"
+            sequences = [rng.random((rng.integers(20, 200), n_inp)) for _ in range(64)]
+        print(f"{model_dir}: {len(sequences)} {source}")
+
+        ref_pred, ref_h = reference.predict_batch(sequences, return_states="last")
+        ref_ms = measure(lambda: reference.predict_batch(sequences, "none"), repeat=5)
+        print(
+            f"  float32        int8=False latency={ref_ms:8.2f}ms "
+            f"kernel={kernel_kb(reference):6.1f}KB"
+        )
+        for precision, quantize_readout in CONFIGS:
+            predictor = Predictor(
+                model_path=model_path,
+                precision=precision,
+                quantize_readout=quantize_readout,
+            )
+            pred, h = predictor.predict_batch(sequences, return_states="last")
+            agreement = np.mean(pred.argmax(-1) == ref_pred.argmax(-1))
+            ms = measure(lambda: predictor.predict_batch(sequences, "none"), repeat=5)
+            print(
+                f"  {precision:<14s} int8={str(quantize_readout):<5s} "
+                f"latency={ms:8.2f}ms kernel={kernel_kb(predictor):6.1f}KB "
+                f"agreement={100 * agreement:6.2f}% "
+                f"max|dpred|={np.abs(pred - ref_pred).max():.2e} "
+                f"max|dh|={np.abs(np.stack(h) - np.stack(ref_h)).max():.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Cost of keeping the PCA projections of the visualizer up to date over a session,
+refitting the PCA on all the trajectories at each refresh against the
+IncrementalProjector, and largest distance of the incremental projections from
+the exact ones.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.projection
+"""
+
+import os
+import time
+
+import numpy as np
+from sklearn.decomposition import PCA
+
+from src.model import NumpyPredictor
+from src.projection import IncrementalProjector
+from .utils import STORAGE_PATH
+
+N_TOUCHES = 2000
+PER_REFRESH = 1
+TRAJECTORY_LENGTH = 10
+
+
+def refit(trajectories: list) -> list:
+    """Projections as computed by the visualizer before the IncrementalProjector."""
+    pca = PCA(n_components=3).fit(np.concatenate(trajectories, axis=0))
+    return [pca.transform(t) for t in trajectories]
+
+
+def main():
+    rng = np.random.default_rng(0)
+    predictor = NumpyPredictor(model_path=os.path.join(STORAGE_PATH, "params_4"))
+    sequences = [rng.random((rng.integers(50, 200), 4)) for _ in range(N_TOUCHES)]
+    _, trajectories = predictor.predict_batch(
+        sequences, return_states="last_k", k=TRAJECTORY_LENGTH
+    )
+
+    for threshold in (0.01, 0.05, 0.1):
+        projector = IncrementalProjector(3, threshold=threshold)
+        incremental_s, refit_s, buffer = 0.0, 0.0, []
+        for end in range(PER_REFRESH, N_TOUCHES + 1, PER_REFRESH):
+            new = trajectories[end - PER_REFRESH : end]
+            start = time.perf_counter()
+            if projector.partial_fit(np.concatenate(new, axis=0)):
+                buffer = [projector.transform(t) for t in trajectories[:end]]
+            else:
+                buffer.extend(projector.transform(t) for t in new)
+            incremental_s += time.perf_counter() - start
+            if threshold == 0.05 and end % 100 == 0:
+                start = time.perf_counter()
+                refit(trajectories[:end])
+                refit_s += time.perf_counter() - start
+
+        exact = refit(trajectories)
+        # PCA components are defined up to their sign
+        signs = np.sign(np.sum(exact[-1] * buffer[-1], axis=0))
+        error = max(np.abs(e * signs - b).max() for e, b in zip(exact, buffer))
+        scale = np.abs(np.concatenate(exact)).max()
+        print(
+            f"threshold={threshold:<5.2f} {N_TOUCHES} touches: "
+            f"incremental={1000 * incremental_s:8.1f}ms rebases={projector.n_rebases:4d} "
+            f"max|dproj|={error / scale:.3f} (relative)"
+        )
+        if refit_s:
+            # Only every 100th refresh was timed, the refits grow linearly
+            print(f"  refit at every refresh: ~{1000 * refit_s * 100:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
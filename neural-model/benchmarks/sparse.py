@@ -0,0 +1,87 @@
+"""Compare the dense and sparse execution paths of the RON recurrence for growing
+reservoirs, using a ring topology and a random kernel with a fixed number of
+connections per neuron.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.sparse
+"""
+
+import torch
+
+from src.model import ron
+from src.model.ron import RandomizedOscillatorsNetwork
+from .utils import measure
+
+N_HIDS = (100, 1000, 10000)
+N_INP = 4
+SEQ_LEN = 100
+CONNECTIONS = 10
+
+
+def ring_kernel(n_hid: int) -> torch.Tensor:
+    idx = torch.arange(n_hid)
+    return torch.sparse_coo_tensor(
+        torch.stack([idx, (idx - 1) % n_hid]), torch.full((n_hid,), 0.9), (n_hid, n_hid)
+    ).coalesce()
+
+
+def random_kernel(n_hid: int) -> torch.Tensor:
+    rows = torch.randint(n_hid, (n_hid * CONNECTIONS,))
+    cols = torch.arange(n_hid).repeat_interleave(CONNECTIONS)
+    values = (2 * torch.rand(n_hid * CONNECTIONS) - 1) / CONNECTIONS**0.5
+    return torch.sparse_coo_tensor(
+        torch.stack([rows, cols]), values, (n_hid, n_hid)
+    ).coalesce()
+
+
+def build_model(h2h: torch.Tensor):
+    n_hid = h2h.size(0)
+    state_dict = {
+        "gamma": torch.rand(n_hid) * 0.5 + 0.75,
+        "epsilon": torch.rand(n_hid) + 1.5,
+        "h2h": h2h,
+        "x2h": torch.rand(N_INP, n_hid),
+        "bias": torch.rand(n_hid) * 2 - 1,
+    }
+    return RandomizedOscillatorsNetwork.from_state_dict(state_dict, dt=0.2)
+
+
+def kernel_bytes(kernel: torch.Tensor) -> int:
+    if kernel.layout == torch.sparse_csr:
+        tensors = (kernel.crow_indices(), kernel.col_indices(), kernel.values())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    return kernel.numel() * kernel.element_size()
+
+
+@torch.no_grad()
+def main():
+    for n_hid in N_HIDS:
+        for name, make_kernel in (("ring", ring_kernel), ("random", random_kernel)):
+            h2h = make_kernel(n_hid)
+            model = build_model(h2h)
+            auto = model.sparse
+            x = torch.rand(1, SEQ_LEN, N_INP)
+            results = {}
+            for mode, threshold in (("dense", 0.0), ("sparse", 1.0)):
+                # Force the execution path, also below SPARSE_MIN_HIDDEN
+                ron.SPARSE_MIN_HIDDEN, min_hidden = 0, ron.SPARSE_MIN_HIDDEN
+                model.sparse_threshold = threshold
+                model.fold_recurrent_kernel()
+                ron.SPARSE_MIN_HIDDEN = min_hidden
+                ms = measure(lambda: model(x), repeat=5, warmup=1)
+                results[mode] = (ms, kernel_bytes(model.recurrent_kernel), model(x))
+            err = (results["dense"][2] - results["sparse"][2]).abs().max().item()
+            del model
+            print(
+                f"n_hid={n_hid:<6d} {name:<6s} density={h2h._nnz() / n_hid**2:.4f} "
+                f"dense={results['dense'][0] / SEQ_LEN:8.4f}ms/step "
+                f"({results['dense'][1] / 2**20:8.2f}MB) "
+                f"sparse={results['sparse'][0] / SEQ_LEN:8.4f}ms/step "
+                f"({results['sparse'][1] / 2**20:8.2f}MB) "
+                f"auto={'sparse' if auto else 'dense'} max_abs_err={err:.1e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare the exact eigen-decomposition with the iterative spectral radius estimate
+used by ``spectral_norm_scaling`` on dense ('full' topology) and sparse (C
+connections per neuron) recurrent kernels of growing size, with the method picked
+by the estimate and its number of matrix-vector products. The exact decomposition
+is skipped above ``EXACT_MAX_HID`` units.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.spectral
+"""
+
+import time
+
+import numpy as np
+import torch
+
+from src.model.utils import (
+    sparse_recurrent_tensor_init,
+    spectral_radius,
+)
+
+N_HIDS = (100, 500, 1000, 2000, 5000, 10000, 20000)
+EXACT_MAX_HID = 2000
+CONNECTIONS = 10
+
+
+def dense_kernel(n_hid: int) -> torch.Tensor:
+    # In place, to keep a single n_hid x n_hid buffer at 20k units
+    return torch.rand(n_hid, n_hid).mul_(4).sub_(2)
+
+
+def sparse_kernel(n_hid: int) -> torch.Tensor:
+    return sparse_recurrent_tensor_init(n_hid, CONNECTIONS, sparse=True)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, 1000 * (time.perf_counter() - start)
+
+
+def main():
+    for name, make_kernel in (("dense", dense_kernel), ("sparse", sparse_kernel)):
+        for n_hid in N_HIDS:
+            W = make_kernel(n_hid)
+            (rho, info), estimate_ms = timed(
+                lambda: spectral_radius(W, return_info=True)
+            )
+            line = (
+                f"{name:6s} n_hid={n_hid:<6d} estimate={estimate_ms:10.1f}ms "
+                f"method={info['method']:<10s} matvecs={info['matvecs']:<5d}"
+            )
+            if n_hid <= EXACT_MAX_HID:
+                W_dense = W.to_dense() if W.is_sparse else W
+                e, exact_ms = timed(lambda: np.linalg.eigvals(W_dense.numpy()))
+                rho_exact = np.abs(e).max()
+                line += (
+                    f" exact={exact_ms:10.1f}ms"
+                    f" rel_error={abs(rho - rho_exact) / rho_exact:.1e}"
+                )
+            print(line, flush=True)
+            del W
+
+
+if __name__ == "__main__":
+    main()
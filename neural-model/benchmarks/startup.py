@@ -0,0 +1,79 @@
+"""Report the time-to-first-prediction of Predictor, i.e. loading the model files,
+building the network and running one prediction, on the stored models and on
+synthetic models of growing size. The cost of the random initialization that
+``from_state_dict`` skips is reported alongside.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.startup
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from src.model import Predictor
+from src.model.ron import RandomizedOscillatorsNetwork
+from .utils import MODEL_DIRS, STORAGE_PATH
+
+N_HIDS = (100, 500, 1000, 2000)
+N_INP = 4
+N_CLASSES = 5
+
+
+def save_synthetic_model(model_path: str, n_hid: int):
+    """Write random ron.pt, readout.pt and scaler.pt files of the given size."""
+    torch.save(
+        {
+            "gamma": torch.rand(n_hid) * 0.5 + 0.75,
+            "epsilon": torch.rand(n_hid) + 1.5,
+            "h2h": (2 * torch.rand(n_hid, n_hid) - 1) / n_hid**0.5,
+            "x2h": torch.rand(N_INP, n_hid),
+            "bias": torch.rand(n_hid) * 2 - 1,
+        },
+        os.path.join(model_path, "ron.pt"),
+    )
+    torch.save(
+        torch.nn.Linear(n_hid, N_CLASSES).state_dict(),
+        os.path.join(model_path, "readout.pt"),
+    )
+    torch.save(
+        [torch.zeros(n_hid), torch.ones(n_hid)], os.path.join(model_path, "scaler.pt")
+    )
+
+
+def time_to_first_prediction(model_path: str) -> float:
+    start = time.perf_counter()
+    predictor = Predictor(model_path=model_path)
+    predictor(np.random.rand(1, 50, predictor.model.x2h.size(0)))
+    return 1000 * (time.perf_counter() - start)
+
+
+def random_init_time(n_hid: int) -> float:
+    start = time.perf_counter()
+    RandomizedOscillatorsNetwork(
+        n_inp=N_INP, n_hid=n_hid, dt=0.2, gamma=(0.75, 1.25), epsilon=(1.5, 2.5)
+    )
+    return 1000 * (time.perf_counter() - start)
+
+
+def main():
+    for model_dir in MODEL_DIRS:
+        ms = time_to_first_prediction(os.path.join(STORAGE_PATH, model_dir))
+        print(f"{model_dir}: time-to-first-prediction={ms:.1f}ms")
+
+    for n_hid in N_HIDS:
+        with tempfile.TemporaryDirectory() as model_path:
+            save_synthetic_model(model_path, n_hid)
+            ms = time_to_first_prediction(model_path)
+        print(
+            f"n_hid={n_hid:<5d} time-to-first-prediction={ms:8.1f}ms "
+            f"skipped random init={random_init_time(n_hid):8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
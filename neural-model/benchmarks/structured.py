@@ -0,0 +1,77 @@
+"""Compare the per-step cost and the memory of the recurrent weights of the dense,
+sparse (CSR) and structured execution paths of the RON, for the ring, toeplitz and
+narrow band topologies. The dense path is skipped above ``DENSE_MAX_HID`` units.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.structured
+"""
+
+import torch
+
+from src.model.ron import RandomizedOscillatorsNetwork
+from .utils import measure
+
+N_HIDS = (1000, 10000, 100000)
+DENSE_MAX_HID = 10000
+N_INP = 4
+SEQ_LEN = 100
+BANDWIDTH = 5
+TOPOLOGIES = ("ring", "toeplitz", "band")
+
+
+def build_structured(n_hid: int, topology: str) -> RandomizedOscillatorsNetwork:
+    # Sparsity keeping BANDWIDTH diagonals on each side of the band
+    sparsity = ((n_hid - BANDWIDTH - 1) / n_hid) ** 2 if topology == "band" else 0.0
+    return RandomizedOscillatorsNetwork(
+        N_INP,
+        n_hid,
+        dt=0.2,
+        gamma=(0.75, 1.25),
+        epsilon=(1.5, 2.5),
+        topology=topology,
+        reservoir_scaler=1.0 if topology == "ring" else BANDWIDTH,
+        sparsity=sparsity,
+        structured=True,
+    )
+
+
+def weights_bytes(model: RandomizedOscillatorsNetwork) -> int:
+    if model.structured:
+        tensors = list(model.h2h.parameters())
+    elif model.sparse:
+        kernel = model.recurrent_kernel
+        tensors = (kernel.crow_indices(), kernel.col_indices(), kernel.values())
+    else:
+        tensors = (model.recurrent_kernel,)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+@torch.no_grad()
+def main():
+    for n_hid in N_HIDS:
+        for topology in TOPOLOGIES:
+            structured = build_structured(n_hid, topology)
+            state_dict = dict(structured.state_dict(), h2h=structured.h2h.to_sparse())
+            models = {"structured": structured}
+            modes = ("dense", "sparse") if n_hid <= DENSE_MAX_HID else ("sparse",)
+            for mode in modes:
+                models[mode] = RandomizedOscillatorsNetwork.from_state_dict(
+                    state_dict, dt=0.2, sparse_threshold=float(mode == "sparse")
+                )
+            x = torch.rand(1, SEQ_LEN, N_INP)
+            reference = structured(x)
+            line = f"n_hid={n_hid:<6d} {topology:<8s}"
+            for mode, model in models.items():
+                ms = measure(lambda: model(x), repeat=5, warmup=1)
+                err = (model(x) - reference).abs().max().item()
+                line += (
+                    f" {mode}={ms / SEQ_LEN:8.4f}ms/step"
+                    f" ({weights_bytes(model) / 2**20:8.3f}MB, err={err:.0e})"
+                )
+            print(line, flush=True)
+            del models
+
+
+if __name__ == "__main__":
+    main()
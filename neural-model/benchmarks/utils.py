@@ -0,0 +1,28 @@
+import os
+import time
+from typing import Callable
+
+import numpy as np
+import torch
+
+STORAGE_PATH = os.getenv("STORAGE_PATH", "../storage")
+MODEL_DIRS = ("params_4", "params_10")
+
+
+def load_ron_state(model_path: str) -> dict:
+    """Load the RON state dict stored in ``model_path``."""
+    return torch.load(
+        os.path.join(model_path, "ron.pt"), weights_only=True, map_location="cpu"
+    )
+
+
+def measure(fn: Callable, repeat: int = 20, warmup: int = 3) -> float:
+    """Return the median wall-clock time of ``fn()`` in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return 1000 * float(np.median(times))
@@ -0,0 +1,81 @@
+"""Cost of a visualizer refresh that finds one new follow-touch file, with the glob
+of the whole storage directory against the StorageWatcher, in both its
+notification and polling modes, as the number of stored files grows.
+
+Run from the ``neural-model`` directory::
+
+    python -m benchmarks.watcher
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.watcher import StorageWatcher
+from .utils import measure
+
+SIZES = (1_000, 10_000, 100_000)
+PATTERN = "follow_touch_0_*.json"
+
+
+def glob_refresh(directory: Path, processed: set) -> list:
+    """New files as found by the visualizer before the watcher."""
+    files = sorted(directory.glob(PATTERN), key=lambda f: f.name)
+    return [f for f in files if str(f) not in processed]
+
+
+def main():
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            for i in range(size):
+                (directory / f"follow_touch_0_{i:08d}.json").touch()
+            processed = {str(f) for f in directory.glob(PATTERN)}
+            watchers = {
+                mode: StorageWatcher(
+                    tmp,
+                    PATTERN,
+                    index_path=os.path.join(tmp, f".{mode}.index"),
+                    use_notifications=mode == "notify",
+                )
+                for mode in ("notify", "poll")
+            }
+            seqs = {}
+
+            def add_file(i=[size]):
+                (directory / f"follow_touch_0_{i[0]:08d}.json").touch()
+                i[0] += 1
+                # Lets the notifications reach the watcher
+                time.sleep(0.01)
+
+            def glob_fn():
+                add_file()
+                new = glob_refresh(directory, processed)
+                processed.update(str(f) for f in new)
+
+            def watcher_fn(mode):
+                add_file()
+                files, seqs[mode] = watchers[mode].changes_since(seqs[mode])
+                assert len(files) == 1
+
+            # The 10ms sleep of add_file is subtracted from the timings
+            glob_ms = measure(glob_fn, repeat=10) - 10
+            results = [f"glob={glob_ms:8.2f}ms"]
+            for mode in watchers:
+                # Skips the files added by the previous measurements
+                seqs[mode] = watchers[mode].changes_since(0)[1]
+                ms = measure(lambda: watcher_fn(mode), repeat=10) - 10
+                results.append(f"{mode}={ms:8.2f}ms")
+            start = time.perf_counter()
+            StorageWatcher(
+                tmp, PATTERN, os.path.join(tmp, ".poll.index"), use_notifications=False
+            ).close()
+            restart_ms = 1000 * (time.perf_counter() - start)
+            print(f"{size:>7d} files: {' '.join(results)} restart={restart_ms:8.2f}ms")
+            for watcher in watchers.values():
+                watcher.close()
+
+
+if __name__ == "__main__":
+    main()
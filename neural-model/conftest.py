@@ -0,0 +1,14 @@
+# Makes the ``src`` package importable by the tests, as when running the scripts
+# from the ``neural-model`` directory
+import os
+import shutil
+import tempfile
+
+# The default ReservoirCache is read at import time, point it to a scratch directory
+# so that the tests never fill the cache of the user
+RESERVOIR_CACHE_PATH = tempfile.mkdtemp(prefix="ron_cache_")
+os.environ["RESERVOIR_CACHE_PATH"] = RESERVOIR_CACHE_PATH
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(RESERVOIR_CACHE_PATH, ignore_errors=True)
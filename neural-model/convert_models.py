@@ -0,0 +1,54 @@
+"""Pack the ``ron.pt``, ``readout.pt`` and ``scaler.pt`` files of the stored models
+into a single memory-mapped ``model.ron`` file, with the hyperparameters the models
+were trained with embedded in its header. The packed file is loaded in place of the
+.pt files by :class:`Predictor` and :class:`NumpyPredictor`.
+
+Usage::
+
+    python convert_models.py
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from src.model.artifact import (
+    convert_model_dir,
+    load_model,
+)
+from src.sessions import STORAGE_PATH
+
+# Hyperparameters of the RON the stored models were trained with
+TRAINING_HYPERPARAMETERS = {
+    "dt": 0.2,
+    "gamma": [0.75, 1.25],
+    "epsilon": [1.5, 2.5],
+    "rho": 0.9,
+    "input_scaling": 1.0,
+    "topology": "full",
+    "diffusive_gamma": 0.0,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "model_paths",
+        nargs="*",
+        default=[str(Path(STORAGE_PATH) / f"params_{n}") for n in (4, 10)],
+    )
+    args = parser.parse_args()
+
+    for model_path in args.model_paths:
+        path = convert_model_dir(model_path, TRAINING_HYPERPARAMETERS)
+        start = time.perf_counter()
+        hyperparameters, _ = load_model(path)
+        print(
+            f"{path}: n_inp={hyperparameters['n_inp']} "
+            f"n_hid={hyperparameters['n_hid']}, "
+            f"loaded in {(time.perf_counter() - start) * 1e3:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,11 @@
-from .visualizer import streamlit_run
-
 __all__ = ["streamlit_run"]
+
+
+def __getattr__(name):
+    # The dashboard pulls in streamlit and plotly: import it only when it is actually
+    # requested, so that the offline tools importing src.model do not depend on it
+    if name == "streamlit_run":
+        from .visualizer import streamlit_run
+
+        return streamlit_run
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,12 @@
-from .predictor import Predictor
+from .numpy_engine import NumpyPredictor
 
-__all__ = ["Predictor"]
+__all__ = ["Predictor", "NumpyPredictor"]
+
+
+def __getattr__(name):
+    # Predictor pulls in torch: import it only when it is actually requested
+    if name == "Predictor":
+        from .predictor import Predictor
+
+        return Predictor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
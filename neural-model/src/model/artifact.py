@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import struct
+from typing import (
+    Dict,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+
+from .numpy_engine import (
+    DT,
+    load_torch_file,
+)
+
+# Packed model file, looked up in the model directory before the .pt files
+ARTIFACT_NAME = "model.ron"
+MAGIC = b"RONMODEL"
+VERSION = 1
+# Offset alignment of the tensors in the weight blob, in bytes
+ALIGNMENT = 64
+# Weights of a model directory, packed into ARTIFACT_NAME by convert_model_dir
+PT_FILES = ("ron.pt", "readout.pt", "scaler.pt")
+# Hyperparameters of the models stored as ron.pt, readout.pt and scaler.pt
+DEFAULT_HYPERPARAMETERS = {"dt": DT, "diffusive_gamma": 0.0}
+
+
+def save_artifact(
+    path: str,
+    hyperparameters: dict,
+    tensors: Dict[str, np.ndarray],
+    sources: Optional[Dict[str, dict]] = None,
+):
+    """Write a packed model file: a fixed preamble (magic, version, header size), a
+    JSON header with the hyperparameters and the dtype, shape and offset of each
+    tensor, then a contiguous blob with the tensors aligned to ALIGNMENT bytes.
+
+    Args:
+        path (str): Path of the file to write.
+        hyperparameters (dict): JSON-serializable hyperparameters of the model.
+        tensors (dict): Named arrays, stored in C order with their dtype.
+        sources (dict, optional): Fingerprints of the files the tensors were read
+            from, see :func:`fingerprint`.
+    """
+    entries, offset = {}, 0
+    for name, array in tensors.items():
+        array = np.ascontiguousarray(array)
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        entries[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += array.nbytes
+    header = {"hyperparameters": hyperparameters, "tensors": entries}
+    if sources is not None:
+        header["sources"] = sources
+    header = json.dumps(header).encode()
+    preamble_size = len(MAGIC) + struct.calcsize("<IQ")
+    # Pad the header so that the blob starts aligned as well
+    header += b" " * (-(preamble_size + len(header)) % ALIGNMENT)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<IQ", VERSION, len(header)) + header)
+        blob_start = f.tell()
+        for name, array in tensors.items():
+            f.seek(blob_start + entries[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+    # Renamed once complete, processes mapping the previous file keep their pages
+    os.replace(tmp, path)
+
+
+def load_artifact(path: str) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """Memory-map a packed model file written by :func:`save_artifact`. The arrays
+    are copy-on-write views of a single mapping, so processes loading the same file
+    share its pages.
+
+    Returns:
+        dict: Hyperparameters of the model.
+        dict: Named arrays.
+    """
+    header, blob_start = _read_header(path)
+    blob = np.memmap(path, dtype=np.uint8, mode="c", offset=blob_start)
+    tensors = {}
+    for name, entry in header["tensors"].items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        start = entry["offset"]
+        tensors[name] = (
+            blob[start : start + count * dtype.itemsize]
+            .view(dtype)
+            .reshape(entry["shape"])
+        )
+    return header["hyperparameters"], tensors
+
+
+def _read_header(path: str) -> Tuple[dict, int]:
+    """JSON header of a packed model file and offset of its weight blob."""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        version, header_size = struct.unpack("<IQ", f.read(struct.calcsize("<IQ")))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} model file")
+        header = json.loads(f.read(header_size))
+        return header, f.tell()
+
+
+def fingerprint(path: str) -> dict:
+    """Size and SHA-256 digest of the content of a file."""
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {"size": os.path.getsize(path), "sha256": digest}
+
+
+def load_model(model_path: str) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """Load the hyperparameters and the weights of a stored model, from its packed
+    file if present, otherwise from ron.pt, readout.pt and scaler.pt. A packed file
+    is stale when the content of one of the .pt files differs from the fingerprint
+    recorded by :func:`convert_model_dir` (e.g. after a readout refit without
+    repacking): the weights are then read from the .pt files, with the
+    hyperparameters of the packed file. Modification times are not compared, git
+    does not preserve them.
+
+    Args:
+        model_path (str): Model directory, or path of a packed model file.
+
+    Returns:
+        dict: Hyperparameters of the model, at least 'dt' and 'diffusive_gamma'.
+        dict: Weights named 'ron.<param>', 'readout.weight', 'readout.bias',
+            'scaler.mean' and 'scaler.var'.
+    """
+    if os.path.isfile(model_path):
+        return load_artifact(model_path)
+    artifact_path = os.path.join(model_path, ARTIFACT_NAME)
+    if not os.path.isfile(artifact_path):
+        return dict(DEFAULT_HYPERPARAMETERS), _load_pt_files(model_path)
+    header, _ = _read_header(artifact_path)
+    if _sources_changed(model_path, header.get("sources")):
+        return header["hyperparameters"], _load_pt_files(model_path)
+    return load_artifact(artifact_path)
+
+
+def _sources_changed(model_path: str, sources: Optional[Dict[str, dict]]) -> bool:
+    # Files packed without fingerprints are trusted, as are missing .pt files
+    for name, recorded in (sources or {}).items():
+        path = os.path.join(model_path, name)
+        if not os.path.isfile(path):
+            continue
+        # The size is compared first, hashing is only needed on a match
+        if os.path.getsize(path) != recorded["size"] or fingerprint(path) != recorded:
+            return True
+    return False
+
+
+def _load_pt_files(model_path: str) -> Dict[str, np.ndarray]:
+    ron = load_torch_file(os.path.join(model_path, "ron.pt"))
+    readout = load_torch_file(os.path.join(model_path, "readout.pt"))
+    mean, var = load_torch_file(os.path.join(model_path, "scaler.pt"))
+    tensors = {f"ron.{name}": value for name, value in ron.items()}
+    tensors.update(
+        {
+            "readout.weight": readout["weight"],
+            "readout.bias": readout["bias"],
+            "scaler.mean": mean,
+            "scaler.var": var,
+        }
+    )
+    return tensors
+
+
+def convert_model_dir(model_path: str, hyperparameters: Optional[dict] = None) -> str:
+    """Pack the ron.pt, readout.pt and scaler.pt files of ``model_path`` into a single
+    ARTIFACT_NAME file in the same directory, with the fingerprints of the .pt files
+    in its header. Run it again after refitting any of the .pt files,
+    :func:`load_model` reads them instead of the packed file until then.
+
+    Args:
+        model_path (str): Model directory.
+        hyperparameters (dict, optional): Hyperparameters stored in the header, on top of the
+            sizes read from the weights, the header of the previous packed file (if
+            any) and DEFAULT_HYPERPARAMETERS.
+
+    Returns:
+        str: Path of the packed file.
+    """
+    tensors = _load_pt_files(model_path)
+    n_inp, n_hid = tensors["ron.x2h"].shape
+    path = os.path.join(model_path, ARTIFACT_NAME)
+    previous = load_artifact(path)[0] if os.path.isfile(path) else {}
+    header = {
+        **DEFAULT_HYPERPARAMETERS,
+        **previous,
+        "n_inp": int(n_inp),
+        "n_hid": int(n_hid),
+        "n_classes": int(tensors["readout.weight"].shape[0]),
+        **(hyperparameters or {}),
+    }
+    sources = {name: fingerprint(os.path.join(model_path, name)) for name in PT_FILES}
+    save_artifact(path, header, tensors, sources)
+    return path
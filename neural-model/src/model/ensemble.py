@@ -0,0 +1,176 @@
+from typing import (
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+import torch
+from torch import nn
+
+from .ron import RandomizedOscillatorsNetwork
+
+
+class RandomizedOscillatorsEnsemble(RandomizedOscillatorsNetwork):
+    """
+    Ensemble of Randomized Oscillators Networks executed as a single network. The
+    hidden states of the members are concatenated along the hidden dimension, the
+    input projection is a single matmul over the concatenated input weights and the
+    recurrence is one batched matmul per time step over the stacked recurrent
+    kernels, so running N members costs one forward instead of N.
+
+    Members may differ in seed, topology, gamma/epsilon ranges, time step and size.
+    Smaller members are zero-padded to the largest one: padded units receive no
+    input and no recurrent connections, hence they stay at zero.
+
+    The ensemble exposes the same interface of :class:`RandomizedOscillatorsNetwork`
+    (``init_state``, ``step``, ``forward`` with ragged ``lengths`` and
+    ``return_states``), with ``n_hid = n_models * member_n_hid``. Use :meth:`split`
+    to recover the states of each member.
+    """
+
+    def __init__(
+        self,
+        models: List[RandomizedOscillatorsNetwork],
+        n_threads: Optional[int] = None,
+    ):
+        """Initialize the ensemble from already built (or loaded) members.
+
+        Args:
+            models (list): Members of the ensemble. They must share the input size.
+            n_threads (int, optional): Number of intra-op threads used during the
+                forward pass. If None, the current torch setting is used.
+        """
+        nn.Module.__init__(self)
+        n_inp = models[0].x2h.size(0)
+        if any(m.x2h.size(0) != n_inp for m in models):
+            raise ValueError("All the members of the ensemble must share n_inp")
+
+        self.n_models = len(models)
+        self.member_n_hids = [m.n_hid for m in models]
+        self.member_n_hid = max(self.member_n_hids)
+        self.n_hid = self.n_models * self.member_n_hid
+        self.device = models[0].device
+        self.n_threads = n_threads
+        # The members' diffusive terms are folded in the stacked kernels
+        self.diffusive_gamma = 0.0
+        self.sparse_threshold = 0.0
+
+        def pad(v, dims=1):
+            # Zero-pad the trailing `dims` dimensions of v to member_n_hid
+            return nn.functional.pad(v, (0, self.member_n_hid - v.size(-1)) * dims)
+
+        with torch.no_grad():
+            kernels = []
+            for m in models:
+                m.fold_recurrent_kernel()
+                kernel = m.recurrent_kernel
+                if m.structured:
+                    kernel = m.h2h.to_dense()
+                    kernel = kernel - m.diffusive_gamma * torch.eye(m.n_hid)
+                elif m.sparse:
+                    # Sparse members store the transposed kernel
+                    kernel = kernel.to_dense().t()
+                kernels.append(pad(kernel, dims=2))
+            self.register_buffer(
+                "dt",
+                torch.cat(
+                    [pad(torch.full((m.n_hid,), float(m.dt))) for m in models]
+                ).to(self.device),
+                persistent=False,
+            )
+            self.gamma = nn.Parameter(
+                torch.cat([pad(m.gamma.expand(m.n_hid)) for m in models]),
+                requires_grad=False,
+            )
+            self.epsilon = nn.Parameter(
+                torch.cat([pad(m.epsilon.expand(m.n_hid)) for m in models]),
+                requires_grad=False,
+            )
+            self.h2h = nn.Parameter(torch.stack(kernels), requires_grad=False)
+            self.x2h = nn.Parameter(
+                torch.cat([pad(m.x2h) for m in models], dim=1), requires_grad=False
+            )
+            self.bias = nn.Parameter(
+                torch.cat([pad(m.bias) for m in models]), requires_grad=False
+            )
+        self._register_recurrent_kernel()
+
+    @torch.no_grad()
+    def fold_recurrent_kernel(self):
+        """Use the stacked (n_models, member_n_hid, member_n_hid) kernels as they are,
+        the members' diffusive terms are already folded in."""
+        self.sparse = False
+        self.structured = False
+        self.recurrent_kernel = self.h2h.detach().contiguous()
+
+    def _recurrence(
+        self, u: torch.Tensor, hy: torch.Tensor, hz: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        n_batch = hy.size(0)
+        # (batch, n_models * n_hid) -> (n_models, batch, n_hid) for the batched matmul
+        hy_members = hy.view(n_batch, self.n_models, self.member_n_hid).transpose(0, 1)
+        recurrent = torch.bmm(hy_members, self.recurrent_kernel)
+        pre_activation = u + recurrent.transpose(0, 1).reshape(n_batch, self.n_hid)
+        hz = hz + self.dt * (
+            torch.tanh(pre_activation) - self.gamma * hy - self.epsilon * hz
+        )
+        hy = hy + self.dt * hz
+        return hy, hz
+
+    def set_backend(self, backend: Literal["eager", "script", "compile"]):
+        """Only the eager backend is available for ensembles."""
+        if backend != "eager":
+            raise ValueError("Ensembles only support the 'eager' backend")
+        self.backend = backend
+
+    def forward(self, *args, **kwargs):
+        """Forward pass of all the members at once, see
+        :meth:`RandomizedOscillatorsNetwork.forward`. The returned states are the
+        concatenation of the members' states along the last dimension.
+        """
+        if self.n_threads is None:
+            return super().forward(*args, **kwargs)
+        n_threads = torch.get_num_threads()
+        torch.set_num_threads(self.n_threads)
+        try:
+            return super().forward(*args, **kwargs)
+        finally:
+            torch.set_num_threads(n_threads)
+
+    def split(self, h: torch.Tensor) -> List[torch.Tensor]:
+        """Split concatenated ensemble states (..., n_hid) into the states of each
+        member (..., member.n_hid), dropping the padding."""
+        h = h.unflatten(-1, (self.n_models, self.member_n_hid))
+        return [h[..., i, :n] for i, n in enumerate(self.member_n_hids)]
+
+
+class EnsembleReadout(nn.Module):
+    """Readout on top of a :class:`RandomizedOscillatorsEnsemble`.
+
+    With ``mode="concat"`` a single linear layer is applied to the concatenation of
+    the members' states. With ``mode="shared"`` the same linear layer is applied to
+    the states of each member and the logits are averaged.
+    """
+
+    def __init__(
+        self,
+        ensemble: RandomizedOscillatorsEnsemble,
+        n_out: int,
+        mode: Literal["concat", "shared"] = "concat",
+    ):
+        super().__init__()
+        if mode not in ("concat", "shared"):
+            raise ValueError("Invalid mode. Options are 'concat', 'shared'")
+        self.mode = mode
+        self.n_models = ensemble.n_models
+        self.member_n_hid = ensemble.member_n_hid
+        n_in = ensemble.n_hid if mode == "concat" else ensemble.member_n_hid
+        self.linear = nn.Linear(n_in, n_out)
+
+    def forward(self, h: torch.Tensor) -> torch.Tensor:
+        """Compute the logits from ensemble states shaped as (..., n_hid)."""
+        if self.mode == "concat":
+            return self.linear(h)
+        h = h.unflatten(-1, (self.n_models, self.member_n_hid))
+        return self.linear(h).mean(dim=-2)
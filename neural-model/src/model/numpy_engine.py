@@ -0,0 +1,350 @@
+import collections
+import os
+import pickle
+import zipfile
+from typing import (
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from .streaming import DEFAULT_EARLY_EXIT, EarlyExitStream
+
+# Same Euler step used by Predictor to build the RON
+DT = 0.2
+
+_STORAGE_DTYPES = {
+    "DoubleStorage": np.float64,
+    "FloatStorage": np.float32,
+    "HalfStorage": np.float16,
+    "LongStorage": np.int64,
+    "IntStorage": np.int32,
+    "ShortStorage": np.int16,
+    "CharStorage": np.int8,
+    "ByteStorage": np.uint8,
+    "BoolStorage": np.bool_,
+}
+
+
+def _rebuild_tensor(storage, storage_offset, size, stride, *args):
+    itemsize = storage.dtype.itemsize
+    return np.lib.stride_tricks.as_strided(
+        storage[storage_offset:],
+        shape=tuple(size),
+        strides=tuple(s * itemsize for s in stride),
+    ).copy()
+
+
+def _rebuild_parameter(data, *args):
+    return data
+
+
+class _TorchUnpickler(pickle.Unpickler):
+    """Unpickler mapping the tensors of a ``torch.save`` archive to NumPy arrays."""
+
+    def __init__(self, file, archive: zipfile.ZipFile, prefix: str, byteorder: str):
+        super().__init__(file)
+        self.archive = archive
+        self.prefix = prefix
+        self.byteorder = "<" if byteorder == "little" else ">"
+
+    def find_class(self, module, name):
+        if module == "torch._utils" and name == "_rebuild_tensor_v2":
+            return _rebuild_tensor
+        if module == "torch._utils" and name == "_rebuild_parameter":
+            return _rebuild_parameter
+        if module == "torch" and name in _STORAGE_DTYPES:
+            return np.dtype(_STORAGE_DTYPES[name])
+        if module == "collections" and name == "OrderedDict":
+            return collections.OrderedDict
+        raise pickle.UnpicklingError(f"Unsupported global {module}.{name}")
+
+    def persistent_load(self, pid):
+        _, dtype, key, _, _ = pid
+        data = self.archive.read(f"{self.prefix}/data/{key}")
+        return np.frombuffer(data, dtype=dtype.newbyteorder(self.byteorder))
+
+
+def load_torch_file(path: Union[str, os.PathLike]):
+    """Load a file written by ``torch.save`` without importing torch. Tensors are
+    returned as NumPy arrays, containers (dicts, lists, tuples) are preserved.
+
+    Args:
+        path (str): Path to the ``.pt`` file.
+
+    Returns:
+        The deserialized object.
+    """
+    with zipfile.ZipFile(path) as archive:
+        pkl_name = next(n for n in archive.namelist() if n.endswith("data.pkl"))
+        prefix = pkl_name[: -len("/data.pkl")]
+        byteorder = "little"
+        if f"{prefix}/byteorder" in archive.namelist():
+            byteorder = archive.read(f"{prefix}/byteorder").decode().strip()
+        with archive.open(pkl_name) as f:
+            return _TorchUnpickler(f, archive, prefix, byteorder).load()
+
+
+class NumpyRandomizedOscillatorsNetwork:
+    """NumPy implementation of the inference path of
+    :class:`RandomizedOscillatorsNetwork`, built from its state dict.
+    """
+
+    def __init__(self, state_dict: dict, dt: float, diffusive_gamma: float = 0.0):
+        """Initialize the RON from trained parameters.
+
+        Args:
+            state_dict (dict): State dict of a RON with NumPy arrays as values.
+            dt (float): Time step.
+            diffusive_gamma (float): Diffusive term to ensure stability of the forward
+                Euler method.
+        """
+        self.dt = np.float32(dt)
+        self.gamma = np.asarray(state_dict["gamma"], dtype=np.float32)
+        self.epsilon = np.asarray(state_dict["epsilon"], dtype=np.float32)
+        self.h2h = np.asarray(state_dict["h2h"], dtype=np.float32)
+        self.x2h = np.asarray(state_dict["x2h"], dtype=np.float32)
+        self.bias = np.asarray(state_dict["bias"], dtype=np.float32)
+        self.n_hid = self.h2h.shape[0]
+        self.recurrent_kernel = self.h2h - np.float32(diffusive_gamma) * np.eye(
+            self.n_hid, dtype=np.float32
+        )
+
+    def init_state(self, n_batch: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the zero initial state of the network."""
+        hy = np.zeros((n_batch, self.n_hid), dtype=np.float32)
+        hz = np.zeros((n_batch, self.n_hid), dtype=np.float32)
+        return hy, hz
+
+    def _recurrence(
+        self, u: np.ndarray, hy: np.ndarray, hz: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        hz = hz + self.dt * (
+            np.tanh(u + hy @ self.recurrent_kernel)
+            - self.gamma * hy
+            - self.epsilon * hz
+        )
+        hy = hy + self.dt * hz
+        return hy, hz
+
+    def step(
+        self, x_t: np.ndarray, state: Tuple[np.ndarray, np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance the network by a single time step."""
+        hy, hz = state
+        return self._recurrence(x_t @ self.x2h + self.bias, hy, hz)
+
+    def forward(
+        self,
+        x: np.ndarray,
+        state: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        lengths: Optional[np.ndarray] = None,
+        return_states: str = "all",
+        k: Optional[int] = None,
+    ) -> Union[
+        Optional[np.ndarray],
+        Tuple[Optional[np.ndarray], Tuple[np.ndarray, np.ndarray]],
+    ]:
+        """Forward pass on a given input time-series, see
+        :meth:`RandomizedOscillatorsNetwork.forward`.
+        """
+        if return_states not in ("all", "last", "last_k", "none"):
+            raise ValueError(
+                "Invalid return_states. Options are 'all', 'last', 'last_k', 'none'"
+            )
+        if return_states == "last_k" and (k is None or k < 1):
+            raise ValueError("return_states='last_k' requires a positive k")
+
+        x = np.asarray(x, dtype=np.float32)
+        n_batch, n_steps = x.shape[0], x.shape[1]
+        hy, hz = self.init_state(n_batch) if state is None else state
+        buffer_size = {"all": n_steps, "last_k": k}.get(return_states)
+        states = None
+        if buffer_size is not None:
+            states = np.zeros((n_batch, buffer_size, self.n_hid), dtype=np.float32)
+        u = x @ self.x2h + self.bias
+        if lengths is not None:
+            lengths = np.asarray(lengths)
+            hy, hz = self._ragged_recurrence(u, hy, hz, lengths, states)
+        else:
+            for t in range(n_steps):
+                hy, hz = self._recurrence(u[:, t], hy, hz)
+                if states is not None:
+                    states[:, t % buffer_size] = hy
+
+        if return_states == "last":
+            states = hy
+        elif return_states == "last_k":
+            if lengths is None:
+                lengths = np.full(n_batch, n_steps)
+            idx = (lengths[:, None] + np.arange(k)) % k
+            states = states[np.arange(n_batch)[:, None], idx]
+
+        if state is None:
+            return states
+        return states, (hy, hz)
+
+    def _ragged_recurrence(
+        self,
+        u: np.ndarray,
+        hy: np.ndarray,
+        hz: np.ndarray,
+        lengths: np.ndarray,
+        states: Optional[np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(-lengths, kind="stable")
+        u = u[order]
+        hy, hz = hy[order], hz[order]
+        n_active = (lengths[None, :] > np.arange(u.shape[1])[:, None]).sum(axis=1)
+        for t, active in enumerate(n_active):
+            if active == 0:
+                break
+            hy[:active], hz[:active] = self._recurrence(
+                u[:active, t], hy[:active], hz[:active]
+            )
+            if states is not None:
+                states[order[:active], t % states.shape[1]] = hy[:active]
+
+        inverse = np.argsort(order)
+        return hy[inverse], hz[inverse]
+
+    __call__ = forward
+
+
+class NumpyPredictor:
+    """Torch-free drop-in replacement of :class:`Predictor`. Loads the same model
+    files and returns the same outputs.
+    """
+
+    def __init__(self, model_path: str, fold_scaler: bool = True):
+        # Imported here, artifact depends on the loaders of this module
+        from .artifact import load_model
+
+        hyperparameters, weights = load_model(model_path)
+        self.model = NumpyRandomizedOscillatorsNetwork(
+            {
+                name[len("ron.") :]: w
+                for name, w in weights.items()
+                if name.startswith("ron.")
+            },
+            dt=hyperparameters["dt"],
+            diffusive_gamma=hyperparameters["diffusive_gamma"],
+        )
+        # Decision rule of the early exit, calibrated by train_readout.py
+        self.early_exit = {
+            **DEFAULT_EARLY_EXIT,
+            **hyperparameters.get("early_exit", {}),
+        }
+
+        self.scaler_mean = np.asarray(weights["scaler.mean"], dtype=np.float32)
+        self.scaler_scale = np.sqrt(np.asarray(weights["scaler.var"], dtype=np.float32))
+
+        self.readout_weight = np.asarray(weights["readout.weight"], dtype=np.float32)
+        self.readout_bias = np.asarray(weights["readout.bias"], dtype=np.float32)
+        if fold_scaler:
+            # See Predictor: the standardization is precomposed into the readout
+            self.readout_bias = self.readout_bias - self.readout_weight @ (
+                self.scaler_mean / self.scaler_scale
+            )
+            self.readout_weight = self.readout_weight / self.scaler_scale
+            self.scaler_mean, self.scaler_scale = None, None
+
+    def __call__(self, x, return_states: str = "all", k: Optional[int] = None):
+        """See :meth:`Predictor.__call__`."""
+        h, (h_last, _) = self.model(
+            x,
+            self.model.init_state(len(x)),
+            return_states=return_states,
+            k=k,
+        )
+        return self._readout(h_last), h
+
+    def predict_batch(
+        self,
+        sequences: List[np.ndarray],
+        return_states: str = "all",
+        k: Optional[int] = None,
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Run the model on a list of variable-length sequences in a single forward,
+        see :meth:`Predictor.predict_batch`.
+        """
+        x, lengths = pad_sequences(sequences)
+        h, (h_last, _) = self.model(
+            x,
+            self.model.init_state(len(lengths)),
+            lengths=lengths,
+            return_states=return_states,
+            k=k,
+        )
+        return self._readout(h_last), split_states(h, lengths, return_states)
+
+    def stream(
+        self,
+        threshold: Optional[float] = None,
+        min_steps: Optional[int] = None,
+        patience: Optional[int] = None,
+    ) -> EarlyExitStream:
+        """See :meth:`Predictor.stream`."""
+        return EarlyExitStream(
+            self, threshold=threshold, min_steps=min_steps, patience=patience
+        )
+
+    def predict_early(
+        self,
+        x: np.ndarray,
+        threshold: Optional[float] = None,
+        min_steps: Optional[int] = None,
+        patience: Optional[int] = None,
+    ) -> Tuple[np.ndarray, int]:
+        """See :meth:`Predictor.predict_early`."""
+        stream = self.stream(
+            threshold=threshold, min_steps=min_steps, patience=patience
+        )
+        stream.update(x)
+        return stream.finish()
+
+    def _as_input(self, x: np.ndarray) -> np.ndarray:
+        return np.asarray(x, dtype=np.float32)
+
+    def _readout(self, h_last: np.ndarray) -> np.ndarray:
+        if self.scaler_mean is not None:
+            h_last = (h_last - self.scaler_mean) / self.scaler_scale
+        logits = h_last @ self.readout_weight.T + self.readout_bias
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        pred = np.exp(logits)
+        pred /= pred.sum(axis=-1, keepdims=True)
+        return pred
+
+
+def pad_sequences(sequences: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Right-pad variable-length sequences shaped as (time, input_dim) with zeros.
+
+    Returns:
+        np.ndarray: Padded batch shaped as (n_sequences, max_time, input_dim).
+        np.ndarray: Length of each sequence.
+    """
+    lengths = np.array([len(seq) for seq in sequences], dtype=np.int64)
+    x = np.zeros(
+        (len(sequences), lengths.max(), np.shape(sequences[0])[-1]), dtype=np.float32
+    )
+    for i, seq in enumerate(sequences):
+        x[i, : lengths[i]] = seq
+    return x, lengths
+
+
+def split_states(
+    h: Optional[np.ndarray], lengths: np.ndarray, return_states: str
+) -> List[Optional[np.ndarray]]:
+    """Split the batched states returned by a ragged forward into per-sequence arrays,
+    dropping the padding."""
+    if return_states == "all":
+        return [h[i, :l] for i, l in enumerate(lengths)]
+    if return_states == "last_k":
+        k = h.shape[1]
+        return [h[i, k - min(l, k) :] for i, l in enumerate(lengths)]
+    if return_states == "last":
+        return list(h)
+    return [None] * len(lengths)
@@ -0,0 +1,195 @@
+from typing import Literal
+
+import torch
+from torch import nn
+
+from .utils import spectral_radius
+
+
+class StructuredOperator(nn.Module):
+    """
+    Hidden-to-hidden weight matrix stored through the O(n_hid) or
+    O(n_hid * bandwidth) parameters that define its structure. Calling the operator
+    on a batch of hidden states ``hy`` shaped as (batch, n_hid) returns ``hy @ W``
+    without materializing W, so that memory and per-step cost grow linearly with the
+    reservoir size.
+    """
+
+    def __init__(self, n_hid: int):
+        super().__init__()
+        self.n_hid = n_hid
+
+    def forward(self, hy: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def to_sparse(self) -> torch.Tensor:
+        """Return W as a sparse COO tensor."""
+        raise NotImplementedError
+
+    def to_dense(self) -> torch.Tensor:
+        """Return W as a dense tensor."""
+        return self.to_sparse().to_dense()
+
+    def spectral_radius(self) -> float:
+        """Return the spectral radius of W, see :func:`spectral_radius`."""
+        return spectral_radius(self.to_sparse())
+
+    @torch.no_grad()
+    def scale_(self, factor: float) -> "StructuredOperator":
+        """Multiply W by ``factor`` in-place."""
+        for param in self.parameters():
+            param.mul_(factor)
+        return self
+
+
+class RingOperator(StructuredOperator):
+    """Ring topology, each neuron receives input only from the next one with the same
+    weight: ``W[i, i - 1] = scale`` (and ``W[0, n_hid - 1] = scale``), hence
+    ``hy @ W`` is a roll of ``hy`` by one position."""
+
+    def __init__(self, n_hid: int, scale: float):
+        super().__init__(n_hid)
+        self.scale = nn.Parameter(torch.tensor(float(scale)), requires_grad=False)
+
+    def forward(self, hy: torch.Tensor) -> torch.Tensor:
+        return self.scale * torch.roll(hy, -1, dims=-1)
+
+    def to_sparse(self) -> torch.Tensor:
+        idx = torch.arange(self.n_hid, device=self.scale.device)
+        return torch.sparse_coo_tensor(
+            torch.stack([idx, (idx - 1) % self.n_hid]),
+            self.scale.detach().expand(self.n_hid),
+            (self.n_hid, self.n_hid),
+        ).coalesce()
+
+    def spectral_radius(self) -> float:
+        # The eigenvalues are scale times the n_hid-th roots of unity
+        return abs(self.scale.item())
+
+
+class BandedOperator(StructuredOperator):
+    """Band matrix with ``lower`` sub-diagonals and ``upper`` super-diagonals. The
+    band is stored column-wise as ``bands[j, m] = W[j + m - upper, j]`` (zero outside
+    the matrix), so that ``(hy @ W)[:, j]`` is the product of ``bands[j]`` with a
+    sliding window of ``hy``. Used by the 'band' and 'lower' topologies.
+    """
+
+    def __init__(self, bands: torch.Tensor, lower: int, upper: int):
+        super().__init__(bands.size(0))
+        assert bands.size(1) == lower + upper + 1
+        self.lower = lower
+        self.upper = upper
+        self.bands = nn.Parameter(bands, requires_grad=False)
+
+    def forward(self, hy: torch.Tensor) -> torch.Tensor:
+        # windows[:, j, m] = hy[:, j + m - upper], zero-padded at the borders
+        windows = nn.functional.pad(hy, (self.upper, self.lower)).unfold(
+            -1, self.lower + self.upper + 1, 1
+        )
+        return torch.einsum("bjm,jm->bj", windows, self.bands)
+
+    def to_sparse(self) -> torch.Tensor:
+        cols, m = torch.meshgrid(
+            torch.arange(self.n_hid, device=self.bands.device),
+            torch.arange(self.lower + self.upper + 1, device=self.bands.device),
+            indexing="ij",
+        )
+        rows = cols + m - self.upper
+        inside = (rows >= 0) & (rows < self.n_hid)
+        return torch.sparse_coo_tensor(
+            torch.stack([rows[inside], cols[inside]]),
+            self.bands.detach()[inside],
+            (self.n_hid, self.n_hid),
+        ).coalesce()
+
+    @classmethod
+    def random(cls, n_hid: int, lower: int, upper: int) -> "BandedOperator":
+        """Band matrix with entries sampled uniformly in [-1, 1]."""
+        bands = 2 * torch.rand(n_hid, lower + upper + 1) - 1
+        # Zero the entries of the first and last columns falling outside the matrix
+        rows = torch.arange(n_hid).unsqueeze(1) + torch.arange(lower + upper + 1)
+        rows = rows - upper
+        bands[(rows < 0) | (rows >= n_hid)] = 0
+        return cls(bands, lower, upper)
+
+
+class ToeplitzOperator(StructuredOperator):
+    """Banded Toeplitz matrix, ``W[i, j] = coefs[i - j + bandwidth - 1]`` for
+    ``|i - j| < bandwidth`` and zero elsewhere. ``hy @ W`` is a 1D convolution of
+    ``hy`` with the 2 * bandwidth - 1 coefficients."""
+
+    def __init__(self, n_hid: int, coefs: torch.Tensor):
+        super().__init__(n_hid)
+        if coefs.numel() % 2 == 0:
+            raise ValueError(
+                "Invalid toeplitz coefficients. Expected 2 * bandwidth - 1 of them "
+                f"with bandwidth >= 1, got {coefs.numel()}"
+            )
+        self.bandwidth = (coefs.numel() + 1) // 2
+        self.coefs = nn.Parameter(coefs, requires_grad=False)
+
+    def forward(self, hy: torch.Tensor) -> torch.Tensor:
+        # conv1d is a cross-correlation: out[j] = sum_m coefs[m] hy[j + m - (b - 1)]
+        out = nn.functional.conv1d(
+            hy.unsqueeze(1),
+            self.coefs.view(1, 1, -1),
+            padding=self.bandwidth - 1,
+        )
+        return out.squeeze(1)
+
+    def to_sparse(self) -> torch.Tensor:
+        bands = self.coefs.detach().expand(self.n_hid, -1)
+        b = self.bandwidth - 1
+        return BandedOperator(bands.clone(), lower=b, upper=b).to_sparse()
+
+
+def get_structured_topology(
+    n_hid: int,
+    topology: Literal["lower", "band", "ring", "toeplitz"],
+    sparsity: float,
+    scaler: float,
+) -> StructuredOperator:
+    """Structured counterpart of :func:`get_hidden_topology`: the same topologies are
+    sampled from the same distributions, but returned as operators that never
+    materialize the n_hid x n_hid matrix.
+
+    Args:
+        n_hid (int): number of hidden units.
+        topology (str): topology of the hidden-to-hidden weight matrix. Options
+            are 'lower', 'band', 'ring', 'toeplitz'.
+        sparsity (float): sparsity of the hidden-to-hidden weight matrix, i.e. the
+            fraction of (lower) diagonals set to zero for 'lower' and 'band'.
+        scaler (float): weight of the ring connections for 'ring' and bandwidth for
+            'toeplitz'.
+
+    Returns:
+        StructuredOperator: hidden-to-hidden operator.
+    """
+    assert sparsity >= 0 and sparsity < 1, "Sparsity must be in [0,1)"
+
+    if topology == "lower":
+        n_zeroed_diagonals = int(sparsity * n_hid)
+        return BandedOperator.random(n_hid, n_hid - n_zeroed_diagonals - 1, 0)
+    elif topology == "band":
+        n_zeroed_diagonals = int(sparsity**0.5 * n_hid)
+        bandwidth = n_hid - n_zeroed_diagonals - 1
+        return BandedOperator.random(n_hid, bandwidth, bandwidth)
+    elif topology == "ring":
+        return RingOperator(n_hid, scaler)
+    elif topology == "toeplitz":
+        bandwidth = int(scaler)
+        if bandwidth < 1:
+            raise ValueError(
+                f"Invalid toeplitz bandwidth {bandwidth}. The scaler must be >= 1"
+            )
+        upperdiagcoefs = 2 * torch.rand(bandwidth) - 1
+        lowerdiagcoefs = 2 * torch.rand(bandwidth) - 1
+        lowerdiagcoefs[0] = upperdiagcoefs[0]  # diagonal coefficient
+        # coefs[b - 1 + d] is the coefficient of the d-th lower diagonal
+        coefs = torch.cat([upperdiagcoefs.flip(0), lowerdiagcoefs[1:]])
+        return ToeplitzOperator(n_hid, coefs)
+    else:
+        raise ValueError(
+            "Invalid structured topology. Options are 'lower', 'band', 'ring', "
+            "'toeplitz'"
+        )
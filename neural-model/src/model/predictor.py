@@ -1,79 +1,225 @@
-import os
+from typing import List, Literal, Optional, Tuple
+
 import torch
 import numpy as np
 
 from sklearn.preprocessing import StandardScaler
 
+from .artifact import load_model
+from .numpy_engine import pad_sequences, split_states
 from .ron import RandomizedOscillatorsNetwork
+from .streaming import DEFAULT_EARLY_EXIT, EarlyExitStream
 
-MODEL_INPUT_SIZE = int(os.getenv("MODEL_INPUT_SIZE", 4))
+PRECISIONS = {
+    "float32": torch.float32,
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+}
 
 
 class Predictor:
 
-    def __init__(self, model_path: str):
-        n_hid = 100
-        dt = 0.2
-        gamma = 1
-        gamma_range = 0.5
-        epsilon = 2
-        epsilon_range = 1
-        rho = 0.9
-        inp_scaling = 1
+    def __init__(
+        self,
+        model_path: str,
+        precision: Literal["float32", "float16", "bfloat16"] = "float32",
+        quantize_readout: bool = False,
+        backend: Literal["eager", "script", "compile"] = "eager",
+        fold_scaler: bool = True,
+    ):
+        """Load the model stored in ``model_path``.
+
+        Args:
+            model_path (str): Directory containing the packed model file or ron.pt,
+                readout.pt and scaler.pt, or path of a packed model file, see
+                :func:`load_model`.
+            precision (str): Floating point format of the reservoir. Half precision
+                formats halve the memory traffic of the recurrent matmul at the cost
+                of some accuracy, see ``benchmarks/precision.py``.
+            quantize_readout (bool): Apply int8 dynamic quantization to the readout.
+            backend (str): Implementation of the recurrence loop, see
+                :meth:`RandomizedOscillatorsNetwork.set_backend`.
+            fold_scaler (bool): Precompose the standardization of scaler.pt into the
+                readout weights and bias, so that classifying a final state is a
+                single affine map. If False, the StandardScaler is applied in NumPy
+                before the readout. Not applied with ``quantize_readout``: the
+                folded weights span a range that int8 does not represent well.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(
+                "Invalid precision. Options are 'float32', 'float16', 'bfloat16'"
+            )
         device = "cpu"
+        hyperparameters, weights = load_model(model_path)
+        weights = {name: torch.from_numpy(w) for name, w in weights.items()}
 
-        gamma = (gamma - gamma_range / 2.0, gamma + gamma_range / 2.0)
-        epsilon = (
-            epsilon - epsilon_range / 2.0,
-            epsilon + epsilon_range / 2.0,
-        )
-        self.model = RandomizedOscillatorsNetwork(
-            n_inp=MODEL_INPUT_SIZE,
-            n_hid=n_hid,
-            dt=dt,
-            gamma=gamma,
-            epsilon=epsilon,
-            diffusive_gamma=0,
-            rho=rho,
-            input_scaling=inp_scaling,
-            topology="full",
-            reservoir_scaler=0,
-            sparsity=0.99,
+        # Weights-first construction: the random initialization and the spectral
+        # rescaling of the RON constructor would be overwritten by the weights anyway
+        self.model = RandomizedOscillatorsNetwork.from_state_dict(
+            {
+                name[len("ron.") :]: w
+                for name, w in weights.items()
+                if name.startswith("ron.")
+            },
+            dt=hyperparameters["dt"],
+            diffusive_gamma=hyperparameters["diffusive_gamma"],
             device=device,
-        ).to(device)
-        self.model.load_state_dict(
-            torch.load(
-                os.path.join(model_path, "ron.pt"),
-                weights_only=True,
-                map_location="cpu",
-            )
-        )
+        ).to(PRECISIONS[precision])
+        self.dtype = PRECISIONS[precision]
+        # Decision rule of the early exit, calibrated by train_readout.py
+        self.early_exit = {
+            **DEFAULT_EARLY_EXIT,
+            **hyperparameters.get("early_exit", {}),
+        }
+        self.model.set_backend(backend)
 
         self.scaler = StandardScaler()
-        m, v = torch.load(os.path.join(model_path, "scaler.pt"), map_location="cpu")
-        self.scaler.mean_ = m.numpy()
-        self.scaler.var_ = v.numpy()
+        self.scaler.mean_ = weights["scaler.mean"].numpy()
+        self.scaler.var_ = weights["scaler.var"].numpy()
         self.scaler.scale_ = np.sqrt(self.scaler.var_)
 
-        self.readout = torch.nn.Linear(n_hid, 5)
+        n_classes, n_hid = weights["readout.weight"].shape
+        self.readout = torch.nn.Linear(n_hid, n_classes)
         self.readout.load_state_dict(
-            torch.load(
-                os.path.join(model_path, "readout.pt"),
-                weights_only=True,
-                map_location="cpu",
-            )
+            {"weight": weights["readout.weight"], "bias": weights["readout.bias"]}
         )
+        if fold_scaler and not quantize_readout:
+            # readout((h - mean) / scale) = (W / scale) h + (b - W (mean / scale))
+            with torch.no_grad():
+                mean = torch.from_numpy(self.scaler.mean_).float()
+                scale = torch.from_numpy(self.scaler.scale_).float()
+                weight = self.readout.weight
+                self.readout.bias.sub_(weight @ (mean / scale))
+                weight.div_(scale)
+            self.scaler = None
+        if quantize_readout:
+            # quantize_dynamic only swaps submodules, hence the Sequential wrapper
+            self.readout = torch.ao.quantization.quantize_dynamic(
+                torch.nn.Sequential(self.readout), {torch.nn.Linear}, dtype=torch.qint8
+            )[0]
 
     @torch.no_grad()
-    def __call__(self, x):
-        x = torch.from_numpy(x).float().to(self.model.device)
-        h = self.model(x).cpu().numpy()
-        h_to_pred = np.stack(
-            [self.scaler.transform(h[i]) for i in range(h.shape[0])], axis=0
+    def __call__(
+        self,
+        x: np.ndarray,
+        return_states: Literal["all", "last", "last_k", "none"] = "all",
+        k: Optional[int] = None,
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Predict the class probabilities of a batch of sequences.
+
+        Args:
+            x (np.ndarray): Input sequences shaped as (batch, time, input_dim).
+            return_states (str): Hidden states to return, see
+                :meth:`RandomizedOscillatorsNetwork.forward`.
+            k (int, optional): Number of states returned with 'last_k'.
+
+        Returns:
+            np.ndarray: Class probabilities shaped as (batch, n_classes).
+            np.ndarray: Hidden states selected by ``return_states``.
+        """
+        x = self._as_input(x)
+        h, (h_last, _) = self.model(
+            x, self.model.init_state(x.size(0)), return_states=return_states, k=k
         )
-        h_to_pred = torch.from_numpy(h_to_pred).float().to(self.model.device)
-        pred = self.readout(h_to_pred[:, -1])
+        pred = self._readout(h_last)
+        return pred, None if h is None else h.float().cpu().numpy()
+
+    @torch.no_grad()
+    def predict_batch(
+        self,
+        sequences: List[np.ndarray],
+        return_states: Literal["all", "last", "last_k", "none"] = "all",
+        k: Optional[int] = None,
+    ) -> Tuple[np.ndarray, List[Optional[np.ndarray]]]:
+        """Run the model on a list of variable-length sequences in a single forward.
+        Sequences are right-padded into one batch and the recurrence is masked
+        past the end of each of them.
+
+        Args:
+            sequences (list): Input sequences shaped as (time, input_dim).
+            return_states (str): Hidden states to return, see
+                :meth:`RandomizedOscillatorsNetwork.forward`.
+            k (int, optional): Number of states returned with 'last_k'.
+
+        Returns:
+            np.ndarray: Class probabilities shaped as (n_sequences, n_classes).
+            list: Hidden states of each sequence selected by ``return_states``,
+                without padding.
+        """
+        x, lengths = pad_sequences(sequences)
+        h, (h_last, _) = self.model(
+            torch.from_numpy(x).to(self.model.device, self.dtype),
+            self.model.init_state(len(lengths)),
+            lengths=torch.from_numpy(lengths).to(self.model.device),
+            return_states=return_states,
+            k=k,
+        )
+        pred = self._readout(h_last)
+        h = None if h is None else h.float().cpu().numpy()
+        return pred, split_states(h, lengths, return_states)
+
+    def stream(
+        self,
+        threshold: Optional[float] = None,
+        min_steps: Optional[int] = None,
+        patience: Optional[int] = None,
+    ) -> EarlyExitStream:
+        """Start the early-exit classification of a touch, fed sample by sample with
+        :meth:`EarlyExitStream.update` while it is being recorded. The parameters
+        left to None are taken from ``self.early_exit``, see :class:`EarlyExitStream`.
+
+        Args:
+            threshold (float, optional): Softmax probability the predicted class
+                must reach for the decision to be taken.
+            min_steps (int, optional): Number of samples processed before any
+                decision.
+            patience (int, optional): Number of consecutive samples the predicted
+                class must stay above the threshold.
+
+        Returns:
+            EarlyExitStream: Stream of the touch.
+        """
+        return EarlyExitStream(
+            self, threshold=threshold, min_steps=min_steps, patience=patience
+        )
+
+    def predict_early(
+        self,
+        x: np.ndarray,
+        threshold: Optional[float] = None,
+        min_steps: Optional[int] = None,
+        patience: Optional[int] = None,
+    ) -> Tuple[np.ndarray, int]:
+        """Classify a sequence, stopping as soon as the decision rule of
+        :meth:`stream` is met.
+
+        Args:
+            x (np.ndarray): Input sequence shaped as (time, input_dim).
+            threshold (float, optional): See :meth:`stream`.
+            min_steps (int, optional): See :meth:`stream`.
+            patience (int, optional): See :meth:`stream`.
+
+        Returns:
+            np.ndarray: Class probabilities shaped as (n_classes,), at the decision
+                or at the end of the sequence if the threshold is never reached.
+            int: Number of samples processed before the decision.
+        """
+        stream = self.stream(
+            threshold=threshold, min_steps=min_steps, patience=patience
+        )
+        stream.update(x)
+        return stream.finish()
+
+    def _as_input(self, x: np.ndarray) -> torch.Tensor:
+        return torch.from_numpy(x).to(self.model.device, self.dtype)
+
+    @torch.no_grad()
+    def _readout(self, h_last: torch.Tensor) -> np.ndarray:
+        """Scale the final hidden states and apply the softmax readout."""
+        h_to_pred = h_last.float()
+        if self.scaler is not None:
+            h_to_pred = self.scaler.transform(h_to_pred.cpu().numpy())
+            h_to_pred = torch.from_numpy(h_to_pred).float().to(self.model.device)
+        pred = self.readout(h_to_pred)
         pred = torch.softmax(pred, dim=-1)
-        # Create a random sample the same size as the prediction for testing
-        # pred = torch.softmax(torch.randn(*pred.shape), dim=-1)
-        return pred.cpu().numpy(), h
+        return pred.cpu().numpy()
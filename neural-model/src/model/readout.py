@@ -0,0 +1,181 @@
+import os
+from typing import (
+    List,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import torch
+from torch import nn
+
+from .numpy_engine import pad_sequences
+from .ron import RandomizedOscillatorsNetwork
+
+# Upper bound of the inverse temperature, reached when the held-out sequences are
+# perfectly separated by the ridge scores
+MAX_INVERSE_TEMPERATURE = 1e3
+
+
+class RidgeReadoutTrainer:
+    """
+    Closed-form ridge regression readout on the final hidden states of a RON, fitted
+    in a single streaming pass. Each batch of sequences only updates the sums needed
+    by the solution (number of samples, sum of the states, HᵀH, HᵀY and sum of the
+    one-hot targets), so memory does not grow with the size of the dataset but for
+    the final states of the held-out sequences (see below). The ``StandardScaler``
+    statistics are derived from the same sums, and the readout is solved on the
+    standardized states as in :class:`Predictor`.
+
+    Ridge scores on one-hot targets are not logits: their softmax is nearly flat, and
+    the early exit of :meth:`Predictor.stream` would never be confident enough. Every
+    ``round(1 / holdout)``-th sequence is therefore held out of the sums, only its
+    final state is kept, and the scores are divided by the temperature that
+    minimizes the negative log-likelihood of the held-out sequences.
+    """
+
+    def __init__(
+        self,
+        model: RandomizedOscillatorsNetwork,
+        n_classes: int = 5,
+        alpha: float = 1.0,
+        holdout: float = 0.2,
+    ):
+        """Initialize the trainer.
+
+        Args:
+            model (RandomizedOscillatorsNetwork): Reservoir producing the states.
+            n_classes (int): Number of classes of the readout.
+            alpha (float): Ridge regularization strength.
+            holdout (float): Fraction of the sequences held out to calibrate the
+                temperature of the softmax, in (0, 0.5].
+        """
+        if not 0 < holdout <= 0.5:
+            raise ValueError("holdout must be in (0, 0.5]")
+        self.model = model
+        self.n_classes = n_classes
+        self.alpha = alpha
+        n_hid = model.n_hid
+        # Accumulated in float64, the sums grow with the number of samples
+        self.n_samples = 0
+        self.sum_h = torch.zeros(n_hid, dtype=torch.float64)
+        self.sum_y = torch.zeros(n_classes, dtype=torch.float64)
+        self.hth = torch.zeros(n_hid, n_hid, dtype=torch.float64)
+        self.hty = torch.zeros(n_hid, n_classes, dtype=torch.float64)
+        self.holdout_every = round(1 / holdout)
+        self.n_seen = 0
+        self.holdout_states: List[torch.Tensor] = []
+        self.holdout_labels: List[torch.Tensor] = []
+        self.temperature = None
+
+    @torch.no_grad()
+    def partial_fit(self, sequences: List[np.ndarray], labels: Sequence[int]):
+        """Run a batch of variable-length sequences through the reservoir and
+        accumulate their final states, or keep them if they are held out.
+
+        Args:
+            sequences (list): Input sequences shaped as (time, input_dim).
+            labels (list): Class of each sequence.
+        """
+        x, lengths = pad_sequences(sequences)
+        h = self.model(
+            torch.from_numpy(x).to(self.model.device, self.model.x2h.dtype),
+            lengths=torch.from_numpy(lengths).to(self.model.device),
+            return_states="last",
+        )
+        h = h.cpu().double()
+        labels = torch.as_tensor(labels)
+        index = self.n_seen + torch.arange(len(labels))
+        held_out = index % self.holdout_every == self.holdout_every - 1
+        self.n_seen += len(labels)
+        self.holdout_states.append(h[held_out])
+        self.holdout_labels.append(labels[held_out])
+        h, labels = h[~held_out], labels[~held_out]
+        y = nn.functional.one_hot(labels, self.n_classes).double()
+        self.n_samples += h.size(0)
+        self.sum_h += h.sum(dim=0)
+        self.sum_y += y.sum(dim=0)
+        self.hth.addmm_(h.t(), h)
+        self.hty.addmm_(h.t(), y)
+
+    def solve(self) -> Tuple[nn.Linear, Tuple[torch.Tensor, torch.Tensor]]:
+        """Solve the ridge regression on the accumulated statistics and calibrate its
+        temperature on the held-out sequences.
+
+        Returns:
+            nn.Linear: Readout applied to the standardized final states.
+            tuple: Mean and variance of the final states, as stored in scaler.pt.
+        """
+        if self.n_samples == 0:
+            raise ValueError("No sample accumulated, call partial_fit first")
+        holdout_states = torch.cat(self.holdout_states)
+        if len(holdout_states) == 0:
+            raise ValueError(
+                "No held-out sample to calibrate the readout, accumulate at least "
+                f"{self.holdout_every} sequences"
+            )
+        n = self.n_samples
+        mean = self.sum_h / n
+        var = (self.hth.diagonal() / n - mean**2).clamp_min(0)
+        # Constant states are left unscaled, as done by StandardScaler
+        var[var == 0] = 1.0
+        scale = var.sqrt()
+        mean_y = self.sum_y / n
+
+        # Centered and standardized second moments, the intercept is not penalized
+        hth = (self.hth - n * torch.outer(mean, mean)) / torch.outer(scale, scale)
+        hty = (self.hty - n * torch.outer(mean, mean_y)) / scale.unsqueeze(1)
+        hth.diagonal().add_(self.alpha)
+        weight = torch.linalg.solve(hth, hty)
+
+        scores = ((holdout_states - mean) / scale) @ weight + mean_y
+        inverse_temperature = fit_inverse_temperature(
+            scores, torch.cat(self.holdout_labels)
+        )
+        self.temperature = 1 / inverse_temperature
+
+        readout = nn.Linear(self.model.n_hid, self.n_classes)
+        with torch.no_grad():
+            readout.weight.copy_(inverse_temperature * weight.t())
+            readout.bias.copy_(inverse_temperature * mean_y)
+        return readout, (mean.float(), var.float())
+
+    def save(self, model_path: str):
+        """Solve the readout and write readout.pt and scaler.pt to ``model_path``."""
+        readout, scaler = self.solve()
+        torch.save(readout.state_dict(), os.path.join(model_path, "readout.pt"))
+        torch.save(list(scaler), os.path.join(model_path, "scaler.pt"))
+
+
+def fit_inverse_temperature(
+    scores: torch.Tensor, labels: torch.Tensor, tol: float = 1e-6
+) -> float:
+    """Inverse temperature t minimizing the negative log-likelihood of ``labels``
+    under ``softmax(t * scores)``. The likelihood is convex in t, its derivative
+    ``mean(E_softmax[scores] - scores[label])`` is zeroed by bisection.
+
+    Args:
+        scores (torch.Tensor): Readout scores shaped as (n_samples, n_classes).
+        labels (torch.Tensor): Class of each sample.
+        tol (float): Width of the final bracket.
+
+    Returns:
+        float: Inverse temperature in [0, MAX_INVERSE_TEMPERATURE].
+    """
+    scores = scores.double()
+    true_scores = scores.gather(1, labels.view(-1, 1)).squeeze(1)
+
+    def gradient(t: float) -> float:
+        probs = torch.softmax(t * scores, dim=-1)
+        return float(((probs * scores).sum(dim=-1) - true_scores).mean())
+
+    low, high = 0.0, MAX_INVERSE_TEMPERATURE
+    if gradient(high) <= 0:
+        return high
+    while high - low > tol * max(1.0, low):
+        mid = (low + high) / 2
+        if gradient(mid) < 0:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
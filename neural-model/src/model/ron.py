@@ -1,6 +1,7 @@
+import functools
 from typing import (
-    List,
     Literal,
+    Optional,
     Tuple,
     Union,
 )
@@ -8,11 +9,19 @@ from typing import (
 import torch
 from torch import nn
 
+from .operators import (
+    StructuredOperator,
+    get_structured_topology,
+)
 from .utils import (
+    ReservoirCache,
     get_hidden_topology,
     spectral_norm_scaling,
 )
 
+# Below this size the dense recurrent matmul is faster whatever the density
+SPARSE_MIN_HIDDEN = 256
+
 
 class RandomizedOscillatorsNetwork(nn.Module):
     """
@@ -36,6 +45,9 @@ class RandomizedOscillatorsNetwork(nn.Module):
     model and the target time-series.
     """
 
+    # Implementation of the dense recurrence loop, see set_backend
+    backend = "eager"
+
     def __init__(
         self,
         n_inp: int,
@@ -52,6 +64,10 @@ class RandomizedOscillatorsNetwork(nn.Module):
         reservoir_scaler=0.0,
         sparsity=0.0,
         device="cpu",
+        sparse_threshold: float = 0.05,
+        structured: bool = False,
+        reservoir_seed: Optional[int] = None,
+        reservoir_cache: Optional[ReservoirCache] = None,
     ):
         """Initialize the RON model.
 
@@ -75,12 +91,28 @@ class RandomizedOscillatorsNetwork(nn.Module):
                 matrix.
             sparsity (float): Sparsity of the hidden-to-hidden weight matrix.
             device (str): Device to run the model on. Options are 'cpu' and 'cuda'.
+            sparse_threshold (float): Density of the recurrent kernel below which
+                ``h2h`` is stored as a sparse COO tensor and the recurrence runs with a
+                sparse matmul, for reservoirs of at least ``SPARSE_MIN_HIDDEN`` units.
+                Set to 0 to always use the dense path.
+            structured (bool): If True, the 'lower', 'band', 'ring' and 'toeplitz'
+                topologies are stored as structured operators (see
+                :func:`get_structured_topology`) applied without materializing
+                ``h2h``, so that memory and per-step cost are linear in ``n_hid``
+                times the bandwidth. Worth it for rings, toeplitz and narrow bands.
+            reservoir_seed (int, optional): If given, ``h2h`` is generated from this
+                seed and stored in (or mapped from) ``reservoir_cache``, so that
+                building the same reservoir again skips the generation and the
+                spectral rescaling.
+            reservoir_cache (ReservoirCache, optional): Cache used with
+                ``reservoir_seed``. Defaults to a cache in RESERVOIR_CACHE_PATH.
         """
         super().__init__()
         self.n_hid = n_hid
         self.device = device
         self.dt = dt
-        self.diffusive_matrix = diffusive_gamma * torch.eye(n_hid).to(device)
+        self.diffusive_gamma = diffusive_gamma
+        self.sparse_threshold = sparse_threshold
         if isinstance(gamma, tuple):
             gamma_min, gamma_max = gamma
             self.gamma = (
@@ -103,16 +135,157 @@ class RandomizedOscillatorsNetwork(nn.Module):
             self.epsilon = epsilon
         self.epsilon = torch.nn.Parameter(self.epsilon, requires_grad=False)
 
-        h2h = get_hidden_topology(n_hid, topology, sparsity, reservoir_scaler)
-        if topology != "antisymmetric":
-            h2h = spectral_norm_scaling(h2h, rho)
-        self.h2h = nn.Parameter(h2h, requires_grad=False)
+        if structured:
+            if topology not in ("lower", "band", "ring", "toeplitz"):
+                raise ValueError(
+                    "Invalid topology for a structured reservoir. Options are 'lower', "
+                    "'band', 'ring', 'toeplitz'"
+                )
+            h2h = get_structured_topology(n_hid, topology, sparsity, reservoir_scaler)
+            rho_curr = h2h.spectral_radius()
+            if rho_curr == 0:
+                raise ValueError(
+                    "The spectral radius of the structured reservoir is 0, it cannot "
+                    "be rescaled to rho. Check the reservoir_scaler of the 'ring' and "
+                    "'toeplitz' topologies"
+                )
+            self.h2h = h2h.scale_(rho / rho_curr)
+        elif reservoir_seed is not None:
+            cache = reservoir_cache if reservoir_cache is not None else ReservoirCache()
+            h2h = cache.get(
+                n_hid, topology, sparsity, reservoir_scaler, rho, reservoir_seed
+            )
+            self.h2h = nn.Parameter(h2h, requires_grad=False)
+        else:
+            h2h = get_hidden_topology(n_hid, topology, sparsity, reservoir_scaler)
+            if topology != "antisymmetric":
+                h2h = spectral_norm_scaling(h2h, rho)
+            self.h2h = nn.Parameter(h2h, requires_grad=False)
 
         x2h = torch.rand(n_inp, n_hid) * input_scaling
         self.x2h = nn.Parameter(x2h, requires_grad=False)
         bias = (torch.rand(n_hid) * 2 - 1) * input_scaling
         self.bias = nn.Parameter(bias, requires_grad=False)
 
+        self._register_recurrent_kernel()
+
+    @classmethod
+    def from_state_dict(
+        cls,
+        state_dict: dict,
+        dt: float,
+        diffusive_gamma=0.0,
+        device="cpu",
+        sparse_threshold: float = 0.05,
+    ) -> "RandomizedOscillatorsNetwork":
+        """Build a RON directly from trained parameters. Unlike ``__init__`` followed
+        by ``load_state_dict``, no random matrix is generated and no spectral
+        rescaling is computed, so the cost does not grow with O(n_hid^3).
+
+        Args:
+            state_dict (dict): State dict of a RON, as saved by ``state_dict()``.
+            dt (float): Time step.
+            diffusive_gamma (float): Diffusive term to ensure stability of the forward
+                Euler method.
+            device (str): Device to run the model on. Options are 'cpu' and 'cuda'.
+            sparse_threshold (float): See ``__init__``.
+
+        Returns:
+            RandomizedOscillatorsNetwork: the model with the given parameters.
+        """
+        if "h2h" not in state_dict:
+            raise ValueError(
+                "Only dense or sparse h2h are supported, build structured reservoirs "
+                "with the constructor and load_state_dict"
+            )
+        model = cls.__new__(cls)
+        nn.Module.__init__(model)
+        model.n_hid = state_dict["h2h"].size(0)
+        model.device = device
+        model.dt = dt
+        model.diffusive_gamma = diffusive_gamma
+        model.sparse_threshold = sparse_threshold
+        for name in ("gamma", "epsilon", "h2h", "x2h", "bias"):
+            param = nn.Parameter(state_dict[name].to(device), requires_grad=False)
+            setattr(model, name, param)
+        model._register_recurrent_kernel()
+        return model
+
+    def _register_recurrent_kernel(self):
+        self.register_buffer("recurrent_kernel", None, persistent=False)
+        self.fold_recurrent_kernel()
+        self.register_load_state_dict_post_hook(_fold_recurrent_kernel_hook)
+
+    @torch.no_grad()
+    def fold_recurrent_kernel(self):
+        """Precompute the effective recurrent matrix ``h2h - diffusive_gamma * I``, so
+        that it is not re-allocated at every time step, and select the dense or sparse
+        execution path according to its density. Called at construction and after
+        every ``load_state_dict``; call it manually if ``h2h`` is modified in-place.
+        Structured operators are applied as they are, no kernel is precomputed.
+        """
+        self.structured = isinstance(self.h2h, StructuredOperator)
+        if self.structured:
+            self.sparse = False
+            self.recurrent_kernel = None
+            return
+
+        kernel = self.h2h.detach()
+        if self.diffusive_gamma != 0:
+            kernel = kernel - self.diffusive_gamma * _eye_like(kernel)
+        if kernel.is_sparse:
+            kernel = kernel.coalesce()
+            nnz = torch.count_nonzero(kernel.values()).item()
+        else:
+            nnz = torch.count_nonzero(kernel).item()
+
+        self.sparse = (
+            self.n_hid >= SPARSE_MIN_HIDDEN
+            and nnz < self.sparse_threshold * kernel.numel()
+        )
+        if self.sparse:
+            if not self.h2h.is_sparse:
+                self.h2h = nn.Parameter(self.h2h.to_sparse(), requires_grad=False)
+            # Stored transposed, as sparse-dense products take the sparse operand first
+            kernel = kernel.t()
+            kernel = kernel.coalesce() if kernel.is_sparse else kernel.contiguous()
+            self.recurrent_kernel = kernel.to_sparse_csr()
+        else:
+            if self.h2h.is_sparse:
+                self.h2h = nn.Parameter(self.h2h.to_dense(), requires_grad=False)
+            self.recurrent_kernel = kernel.to_dense()
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # h2h may be stored dense or sparse: match the current layout before copying,
+        # the execution path is selected again by fold_recurrent_kernel afterwards
+        key = prefix + "h2h"
+        if (
+            not self.structured
+            and key in state_dict
+            and state_dict[key].is_sparse != self.h2h.is_sparse
+        ):
+            h2h = state_dict[key]
+            state_dict[key] = h2h.to_sparse() if self.h2h.is_sparse else h2h.to_dense()
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
+    def _recurrence(
+        self, u: torch.Tensor, hy: torch.Tensor, hz: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Euler update given the already projected input ``u = x @ x2h + bias``."""
+        if self.structured:
+            pre_activation = u + self.h2h(hy)
+            if self.diffusive_gamma != 0:
+                pre_activation = pre_activation - self.diffusive_gamma * hy
+        elif self.sparse:
+            pre_activation = u + torch.mm(self.recurrent_kernel, hy.t()).t()
+        else:
+            pre_activation = torch.addmm(u, hy, self.recurrent_kernel)
+        hz = hz + self.dt * (
+            torch.tanh(pre_activation) - self.gamma * hy - self.epsilon * hz
+        )
+        hy = hy + self.dt * hz
+        return hy, hz
+
     def cell(
         self, x: torch.Tensor, hy: torch.Tensor, hz: torch.Tensor
     ) -> Tuple[torch.Tensor, torch.Tensor]:
@@ -123,35 +296,240 @@ class RandomizedOscillatorsNetwork(nn.Module):
             hy (torch.Tensor): Current hidden state.
             hz (torch.Tensor): Current hidden state derivative.
         """
-        hz = hz + self.dt * (
-            torch.tanh(
-                torch.matmul(x, self.x2h)
-                + torch.matmul(hy, self.h2h - self.diffusive_matrix)
-                + self.bias
-            )
-            - self.gamma * hy
-            - self.epsilon * hz
-        )
+        return self._recurrence(torch.matmul(x, self.x2h) + self.bias, hy, hz)
 
-        hy = hy + self.dt * hz
+    def init_state(self, n_batch: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Return the zero initial state of the network.
+
+        Args:
+            n_batch (int): Number of sequences in the batch.
+
+        Returns:
+            tuple: Hidden state and hidden state derivative, both shaped as
+                (batch, n_hid).
+        """
+        hy = torch.zeros(n_batch, self.n_hid, dtype=self.x2h.dtype).to(self.device)
+        hz = torch.zeros(n_batch, self.n_hid, dtype=self.x2h.dtype).to(self.device)
         return hy, hz
 
-    def forward(self, x: torch.Tensor) -> Tuple[torch.Tensor, List[torch.Tensor]]:
+    def step(
+        self, x_t: torch.Tensor, state: Tuple[torch.Tensor, torch.Tensor]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Advance the network by a single time step. Useful to update the reservoir
+        as soon as a new sample is available, without replaying the whole window.
+
+        Args:
+            x_t (torch.Tensor): Input at the current time step shaped as
+                (batch, input_dim).
+            state (tuple): Hidden state and hidden state derivative, as returned by
+                :meth:`init_state`, :meth:`step` or :meth:`forward`.
+
+        Returns:
+            tuple: Updated hidden state and hidden state derivative.
+        """
+        hy, hz = state
+        return self.cell(x_t, hy, hz)
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        state: Optional[Tuple[torch.Tensor, torch.Tensor]] = None,
+        lengths: Optional[torch.Tensor] = None,
+        return_states: Literal["all", "last", "last_k", "none"] = "all",
+        k: Optional[int] = None,
+    ) -> Union[
+        Optional[torch.Tensor],
+        Tuple[Optional[torch.Tensor], Tuple[torch.Tensor, torch.Tensor]],
+    ]:
         """Forward pass on a given input time-series.
 
         Args:
-            x (torch.Tensor): Input time-series shaped as (time, input_dim).
+            x (torch.Tensor): Input time-series shaped as (batch, time, input_dim).
+            state (tuple, optional): Hidden state and hidden state derivative to start
+                from. If given, the final state is returned as well, so that the
+                computation can be resumed on the next chunk of the time-series.
+            lengths (torch.Tensor, optional): Valid length of each sequence of a
+                right-padded batch. Each sequence stops being updated after its last
+                valid step, the states of the padding steps are zero and the final
+                state is the one at the last valid step.
+            return_states (str): Which hidden states to return. 'all' returns the
+                whole trajectory, 'last' only the final state, 'last_k' the last ``k``
+                states (kept in a ring buffer during the loop, so memory does not grow
+                with the sequence length) and 'none' no states at all.
+            k (int, optional): Number of states returned with 'last_k'.
 
         Returns:
-            torch.Tensor: Hidden states of the network shaped as (batch, time, n_hid).
-            list: List containing the last hidden state of the network.
+            torch.Tensor: Hidden states of the network shaped as (batch, time, n_hid)
+                for 'all', (batch, n_hid) for 'last', (batch, k, n_hid) for 'last_k'
+                (left-padded with zeros for sequences shorter than ``k``) and None for
+                'none'.
+            tuple: Final hidden state and hidden state derivative. Only returned when
+                ``state`` is given.
+        """
+        if return_states not in ("all", "last", "last_k", "none"):
+            raise ValueError(
+                "Invalid return_states. Options are 'all', 'last', 'last_k', 'none'"
+            )
+        if return_states == "last_k" and (k is None or k < 1):
+            raise ValueError("return_states='last_k' requires a positive k")
+
+        n_batch, n_steps = x.size(0), x.size(1)
+        hy, hz = self.init_state(n_batch) if state is None else state
+        buffer_size = {"all": n_steps, "last_k": k}.get(return_states)
+        states = None
+        if buffer_size is not None:
+            states = torch.zeros(
+                n_batch, buffer_size, self.n_hid, dtype=hy.dtype, device=hy.device
+            )
+        # Project the whole input sequence at once, the loop only runs the recurrence
+        u = torch.matmul(x, self.x2h) + self.bias
+        if lengths is not None:
+            lengths = torch.as_tensor(lengths, device=u.device)
+            hy, hz = self._ragged_recurrence(u, hy, hz, lengths, states)
+        else:
+            hy, hz = self._loop(u, hy, hz, states)
+
+        if return_states == "last":
+            states = hy
+        elif return_states == "last_k":
+            if lengths is None:
+                lengths = torch.full((n_batch,), n_steps, device=u.device)
+            # Rotate each ring buffer so that the states are in chronological order
+            idx = (lengths.unsqueeze(1) + torch.arange(k, device=u.device)) % k
+            states = states[torch.arange(n_batch, device=u.device).unsqueeze(1), idx]
+
+        if state is None:
+            return states
+        return states, (hy, hz)
+
+    def set_backend(self, backend: Literal["eager", "script", "compile"]):
+        """Select the implementation of the dense recurrence loop in :meth:`forward`.
+
+        Args:
+            backend (str): 'eager' runs the loop in Python, 'script' runs the whole
+                loop as a TorchScript function (no interpreter overhead per step) and
+                'compile' runs each Euler step as a single kernel generated by
+                ``torch.compile``. Sparse kernels, structured operators and ragged
+                batches always use the eager implementation.
         """
-        n_batch = x.size(0)
-        hy = torch.zeros(n_batch, self.n_hid).to(self.device)
-        hz = torch.zeros(n_batch, self.n_hid).to(self.device)
-        all_states = []
-        for t in range(x.size(1)):
-            hy, hz = self.cell(x[:, t], hy, hz)
-            all_states.append(hy)
-
-        return torch.stack(all_states, dim=1)
+        if backend not in ("eager", "script", "compile"):
+            raise ValueError(
+                "Invalid backend. Options are 'eager', 'script', 'compile'"
+            )
+        self.backend = backend
+
+    def _loop(
+        self,
+        u: torch.Tensor,
+        hy: torch.Tensor,
+        hz: torch.Tensor,
+        states: Optional[torch.Tensor],
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        if self.backend == "eager" or self.sparse or self.structured:
+            for t in range(u.size(1)):
+                hy, hz = self._recurrence(u[:, t], hy, hz)
+                if states is not None:
+                    states[:, t % states.size(1)] = hy
+            return hy, hz
+
+        args = (self.recurrent_kernel, self.gamma, self.epsilon, float(self.dt))
+        if self.backend == "script":
+            return _scripted_loop()(u, hy, hz, *args, states)
+        step = _compiled_step()
+        for t in range(u.size(1)):
+            hy, hz = step(u[:, t], hy, hz, *args)
+            if states is not None:
+                states[:, t % states.size(1)] = hy
+        return hy, hz
+
+    def _ragged_recurrence(
+        self,
+        u: torch.Tensor,
+        hy: torch.Tensor,
+        hz: torch.Tensor,
+        lengths: torch.Tensor,
+        states: Optional[torch.Tensor],
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Run the recurrence on a right-padded batch of projected inputs, writing the
+        hidden states into ``states`` (used as a ring buffer if shorter than the
+        sequence). Sequences are sorted by decreasing length, so that at each time
+        step only the leading rows that are still active are updated.
+        """
+        order = torch.argsort(lengths, descending=True)
+        u = u[order]
+        hy, hz = hy[order].clone(), hz[order].clone()
+        # Number of sequences still running at each time step
+        steps = torch.arange(u.size(1), device=u.device)
+        n_active = (lengths.unsqueeze(0) > steps.unsqueeze(1)).sum(dim=1).tolist()
+        for t, active in enumerate(n_active):
+            if active == 0:
+                break
+            hy_t, hz_t = self._recurrence(u[:active, t], hy[:active], hz[:active])
+            hy[:active], hz[:active] = hy_t, hz_t
+            if states is not None:
+                states[order[:active], t % states.size(1)] = hy_t
+
+        inverse = torch.argsort(order)
+        return hy[inverse], hz[inverse]
+
+
+def euler_step(
+    u: torch.Tensor,
+    hy: torch.Tensor,
+    hz: torch.Tensor,
+    kernel: torch.Tensor,
+    gamma: torch.Tensor,
+    epsilon: torch.Tensor,
+    dt: float,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Dense Euler step of the RON given the projected input ``u``."""
+    hz = hz + dt * (torch.tanh(torch.addmm(u, hy, kernel)) - gamma * hy - epsilon * hz)
+    hy = hy + dt * hz
+    return hy, hz
+
+
+def recurrence_loop(
+    u: torch.Tensor,
+    hy: torch.Tensor,
+    hz: torch.Tensor,
+    kernel: torch.Tensor,
+    gamma: torch.Tensor,
+    epsilon: torch.Tensor,
+    dt: float,
+    states: Optional[torch.Tensor],
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Dense recurrence over a projected input sequence shaped as (batch, time, n_hid),
+    writing the hidden states into ``states`` (used as a ring buffer if shorter than
+    the sequence). Kept within the TorchScript subset, see :func:`_scripted_loop`.
+    """
+    for t in range(u.size(1)):
+        hy, hz = euler_step(u[:, t], hy, hz, kernel, gamma, epsilon, dt)
+        if states is not None:
+            states[:, t % states.size(1)] = hy
+    return hy, hz
+
+
+@functools.lru_cache(maxsize=None)
+def _scripted_loop():
+    # Scripted lazily, so that only the models using the backend pay for it
+    return torch.jit.script(recurrence_loop)
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_step():
+    return torch.compile(euler_step, dynamic=False)
+
+
+def _fold_recurrent_kernel_hook(module, incompatible_keys):
+    module.fold_recurrent_kernel()
+
+
+def _eye_like(W: torch.Tensor) -> torch.Tensor:
+    """Identity matrix with the same size, layout and device of ``W``."""
+    n = W.size(0)
+    if W.is_sparse:
+        idx = torch.arange(n, device=W.device)
+        return torch.sparse_coo_tensor(
+            torch.stack([idx, idx]), torch.ones(n, device=W.device), (n, n)
+        )
+    return torch.eye(n, device=W.device)
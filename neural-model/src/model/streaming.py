@@ -0,0 +1,195 @@
+from typing import (
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+
+# Decision rule of the models whose header has no calibrated 'early_exit' entry. The
+# confidence of an uncalibrated readout is not a probability, so these only serve
+# as a starting point: refit the readout with train_readout.py, which calibrates
+# both the softmax and the rule on held-out sessions.
+DEFAULT_EARLY_EXIT = {"threshold": 0.9, "min_steps": 1, "patience": 3}
+# Agreement with the prediction on the whole touch targeted by calibrate_early_exit
+TARGET_AGREEMENT = 0.99
+
+
+class EarlyExitStream:
+    """
+    Step-by-step classification of a single touch, fed with its samples as they are
+    recorded. The reservoir is advanced one sample at a time and the readout is
+    applied to each new state: the class is decided once it has kept the highest
+    softmax probability, at least ``threshold``, for ``patience`` consecutive
+    samples, instead of waiting for the end of the touch. Works with both
+    :class:`Predictor` and :class:`NumpyPredictor`, see their ``stream`` method.
+
+    The parameters default to the 'early_exit' entry of the model header, written by
+    train_readout.py from held-out sessions (see :func:`calibrate_early_exit`), and
+    to DEFAULT_EARLY_EXIT otherwise. The threshold is only meaningful with such a
+    calibrated readout: uncalibrated ones are confidently wrong on the transient of
+    the reservoir, which only ``min_steps`` skips.
+    """
+
+    def __init__(
+        self,
+        predictor,
+        threshold: Optional[float] = None,
+        min_steps: Optional[int] = None,
+        patience: Optional[int] = None,
+    ):
+        """Initialize the stream.
+
+        Args:
+            predictor (Predictor or NumpyPredictor): Model classifying the touch.
+            threshold (float, optional): Softmax probability the predicted class
+                must reach for the decision to be taken, in (0, 1].
+            min_steps (int, optional): Number of samples processed before any
+                decision, to avoid committing on the transient of the reservoir.
+            patience (int, optional): Number of consecutive samples the predicted
+                class must stay above the threshold.
+        """
+        defaults = predictor.early_exit
+        threshold = defaults["threshold"] if threshold is None else threshold
+        min_steps = defaults["min_steps"] if min_steps is None else min_steps
+        patience = defaults["patience"] if patience is None else patience
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if min_steps < 1:
+            raise ValueError("min_steps must be a positive integer")
+        if patience < 1:
+            raise ValueError("patience must be a positive integer")
+        self.predictor = predictor
+        self.threshold = threshold
+        self.min_steps = min_steps
+        self.patience = patience
+        self.state = predictor.model.init_state(1)
+        self.n_steps = 0
+        # Consecutive samples the current class stayed above the threshold
+        self.n_confident = 0
+        # Class probabilities after the last processed sample, or at the decision
+        self.probabilities: Optional[np.ndarray] = None
+        self.decided = False
+
+    @property
+    def label(self) -> Optional[int]:
+        """Decided class, None while the stream is undecided."""
+        return int(np.argmax(self.probabilities)) if self.decided else None
+
+    def update(self, samples: np.ndarray) -> Optional[np.ndarray]:
+        """Process the new samples of the touch, stopping at the decision. Samples
+        received after the decision are ignored.
+
+        Args:
+            samples (np.ndarray): New normalized samples shaped as (time, input_dim).
+
+        Returns:
+            np.ndarray: Class probabilities at the decision, None while undecided.
+        """
+        if self.decided:
+            return self.probabilities
+        x = self.predictor._as_input(np.asarray(samples)[:, None])
+        for x_t in x:
+            self.state = self.predictor.model.step(x_t, self.state)
+            self.n_steps += 1
+            if self.n_steps < self.min_steps:
+                continue
+            previous = self.probabilities
+            self.probabilities = self.predictor._readout(self.state[0])[0]
+            if self.probabilities.max() < self.threshold:
+                self.n_confident = 0
+            elif previous is not None and np.argmax(previous) == np.argmax(
+                self.probabilities
+            ):
+                self.n_confident += 1
+            else:
+                self.n_confident = 1
+            if self.n_confident >= self.patience:
+                self.decided = True
+                return self.probabilities
+        return None
+
+    def finish(self) -> Tuple[np.ndarray, int]:
+        """Close the touch: return the decision, or the prediction on the whole
+        touch if the confidence never reached the threshold.
+
+        Returns:
+            np.ndarray: Class probabilities shaped as (n_classes,).
+            int: Number of samples processed before the decision.
+        """
+        if self.n_steps == 0:
+            raise ValueError("No sample received, call update first")
+        if self.probabilities is None:
+            # Shorter than min_steps
+            self.probabilities = self.predictor._readout(self.state[0])[0]
+        return self.probabilities, self.n_steps
+
+
+def calibrate_early_exit(
+    predictor,
+    batches: Iterable[List[np.ndarray]],
+    threshold: float = DEFAULT_EARLY_EXIT["threshold"],
+    patience: int = DEFAULT_EARLY_EXIT["patience"],
+    agreement: float = TARGET_AGREEMENT,
+) -> dict:
+    """Smallest ``min_steps`` for which the decisions of :class:`EarlyExitStream`
+    agree with the prediction on the whole touch for at least a fraction
+    ``agreement`` of the given sequences, e.g. held-out sessions. The sequences are
+    streamed in batches, only the agreement counts are kept.
+
+    Args:
+        predictor (Predictor or NumpyPredictor): Model to calibrate.
+        batches (iterable): Batches of input sequences shaped as (time, input_dim).
+        threshold (float): Softmax probability of the decision rule.
+        patience (int): Consecutive confident samples of the decision rule.
+        agreement (float): Target fraction of decisions equal to the prediction on
+            the whole touch.
+
+    Returns:
+        dict: 'threshold', 'min_steps' and 'patience' of the decision rule, as
+            stored in the 'early_exit' entry of the model header.
+    """
+    n_sequences = 0
+    # Disagreements for each min_steps - 1, grown to the longest sequence
+    errors = np.zeros(0, dtype=int)
+    for sequences in batches:
+        _, states = predictor.predict_batch(sequences, return_states="all")
+        for h in states:
+            probs = np.asarray(predictor._readout(predictor._as_input(h)))
+            wrong = _early_exit_errors(probs, threshold, patience)
+            if len(wrong) > len(errors):
+                errors = np.pad(errors, (0, len(wrong) - len(errors)))
+            errors[: len(wrong)] += wrong
+            n_sequences += 1
+    if n_sequences == 0:
+        raise ValueError("No sequence to calibrate the early exit on")
+    # Past the longest sequence no decision is taken early, hence no error
+    valid = np.flatnonzero(np.append(errors, 0) <= (1 - agreement) * n_sequences)
+    return {
+        "threshold": threshold,
+        "min_steps": int(valid[0]) + 1,
+        "patience": patience,
+    }
+
+
+def _early_exit_errors(probs: np.ndarray, threshold: float, patience: int):
+    """Whether the early decision on a sequence differs from its prediction on the
+    whole sequence, for each min_steps - 1, given its probabilities at each step."""
+    labels = probs.argmax(axis=-1)
+    confident = probs.max(axis=-1) >= threshold
+    n_steps = len(probs)
+    # Length of the confident run of the same class ending at each step
+    runs = np.zeros(n_steps, dtype=int)
+    for t in np.flatnonzero(confident):
+        same = t > 0 and confident[t - 1] and labels[t] == labels[t - 1]
+        runs[t] = runs[t - 1] + 1 if same else 1
+    # Starting at min_steps - 1 = s, the run reaches patience at the first step
+    # t >= s + patience - 1 where the unconstrained run does
+    candidates = np.where(runs >= patience, np.arange(n_steps), n_steps)
+    decision = np.minimum.accumulate(candidates[::-1])[::-1]
+    decision = np.append(decision[patience - 1 :], np.full(patience - 1, n_steps))
+    decided = decision < n_steps
+    wrong = np.zeros(n_steps, dtype=bool)
+    wrong[decided] = labels[decision[decided]] != labels[-1]
+    return wrong
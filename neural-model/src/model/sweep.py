@@ -0,0 +1,248 @@
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    as_completed,
+)
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+
+import numpy as np
+import torch
+from sklearn.linear_model import RidgeClassifier
+from sklearn.model_selection import (
+    StratifiedKFold,
+    cross_val_score,
+)
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from torch import nn
+
+from .numpy_engine import pad_sequences
+from .ron import RandomizedOscillatorsNetwork
+from .utils import count_parameters
+
+# Configuration of the stored models, used for the options that are not swept
+BASE_CONFIG = {
+    "n_hid": 100,
+    "dt": 0.2,
+    "gamma": (0.75, 1.25),
+    "epsilon": (1.5, 2.5),
+    "rho": 0.9,
+    "input_scaling": 1.0,
+    "topology": "full",
+    # Weight of the ring connections and bandwidth of the toeplitz topology
+    "reservoir_scaler": 5.0,
+    "sparsity": 0.0,
+    "seed": 0,
+}
+
+SEARCH_SPACE = {
+    "topology": ["full", "lower", "orthogonal", "band", "ring", "toeplitz"],
+    "rho": [0.5, 0.9, 0.99, 1.2],
+    "gamma": [(0.25, 0.75), (0.75, 1.25), (1.5, 2.5)],
+    "epsilon": [(0.5, 1.5), (1.5, 2.5), (3.0, 5.0)],
+    "dt": [0.05, 0.1, 0.2],
+    "input_scaling": [0.5, 1.0, 2.0],
+    "sparsity": [0.0, 0.5, 0.9],
+}
+
+RESULT_FIELDS = ["accuracy", "accuracy_std", "n_params", "n_trainable", "seconds"]
+# Failures specific to a configuration (invalid or numerically degenerate reservoir),
+# any other exception stops the sweep
+CONFIG_ERRORS = (ValueError, ArithmeticError, torch.linalg.LinAlgError)
+
+
+def grid_search(space: Dict[str, list] = SEARCH_SPACE) -> List[dict]:
+    """Return every combination of the values in ``space``, on top of BASE_CONFIG."""
+    keys = list(space)
+    return [
+        {**BASE_CONFIG, **dict(zip(keys, values))}
+        for values in itertools.product(*(space[key] for key in keys))
+    ]
+
+
+def random_search(
+    n_configs: int, space: Dict[str, list] = SEARCH_SPACE, seed: int = 0
+) -> List[dict]:
+    """Sample ``n_configs`` distinct combinations of the values in ``space``, on top
+    of BASE_CONFIG. With the same seed, a larger ``n_configs`` extends the previous
+    sample, so that a resumed sweep can be widened."""
+    configs = grid_search(space)
+    idx = np.random.default_rng(seed).permutation(len(configs))[:n_configs]
+    return [configs[i] for i in idx]
+
+
+def config_key(config: dict) -> str:
+    """Canonical string identifying a configuration in the results table."""
+    return json.dumps(config, sort_keys=True)
+
+
+def build_model(n_inp: int, config: dict) -> RandomizedOscillatorsNetwork:
+    """Build the RON described by ``config``, seeding torch with ``config['seed']``.
+    The recurrent matrix is taken from the default :class:`ReservoirCache`, so that
+    configurations sharing the reservoir (or a resumed sweep) do not regenerate it."""
+    torch.manual_seed(config["seed"])
+    kwargs = {key: value for key, value in config.items() if key != "seed"}
+    # Ranges become lists once stored as JSON
+    for key in ("gamma", "epsilon"):
+        if isinstance(kwargs[key], list):
+            kwargs[key] = tuple(kwargs[key])
+    return RandomizedOscillatorsNetwork(
+        n_inp=n_inp, reservoir_seed=config["seed"], **kwargs
+    )
+
+
+@torch.no_grad()
+def evaluate_config(
+    config: dict,
+    sequences: List[np.ndarray],
+    labels: Sequence[int],
+    n_folds: int = 5,
+    alpha: float = 1.0,
+) -> dict:
+    """Score a configuration as the cross-validated accuracy of a ridge readout
+    trained on the standardized final states of the sequences, as in Predictor.
+
+    Args:
+        config (dict): RON configuration, see BASE_CONFIG.
+        sequences (list): Normalized sessions shaped as (time, n_inp).
+        labels (list): Class of each session.
+        n_folds (int): Number of stratified cross-validation folds.
+        alpha (float): Ridge regularization strength.
+
+    Returns:
+        dict: accuracy (mean and std over the folds), total and trainable number of
+            parameters of the reservoir and its readout, time taken in seconds.
+    """
+    start = time.perf_counter()
+    labels = np.asarray(labels)
+    # Folds cannot outnumber the sessions of the least frequent class
+    n_folds = min(n_folds, smallest_class(labels))
+    x, lengths = pad_sequences(sequences)
+    model = build_model(x.shape[-1], config)
+    h_last = model(torch.from_numpy(x), lengths=lengths, return_states="last")
+    h_last = h_last.numpy()
+    if not np.isfinite(h_last).all():
+        accuracy = np.zeros(1)
+    else:
+        readout = make_pipeline(StandardScaler(), RidgeClassifier(alpha=alpha))
+        cv = StratifiedKFold(n_folds, shuffle=True, random_state=config["seed"])
+        accuracy = cross_val_score(readout, h_last, labels, cv=cv)
+    n_classes = len(np.unique(labels))
+    n_params, n_trainable = count_parameters(
+        nn.ModuleList([model, nn.Linear(model.n_hid, n_classes)])
+    )
+    return {
+        "accuracy": float(accuracy.mean()),
+        "accuracy_std": float(accuracy.std()),
+        "n_params": n_params,
+        "n_trainable": n_trainable,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def smallest_class(labels: Sequence[int]) -> int:
+    """Number of sessions of the least frequent class among those present."""
+    counts = np.bincount(np.asarray(labels))
+    return int(counts[counts > 0].min())
+
+
+def load_results(path: os.PathLike) -> List[dict]:
+    """Load the results table written by :func:`run_sweep`, configurations are
+    decoded back to dicts."""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["config"] = json.loads(row["config"])
+        for field in RESULT_FIELDS:
+            row[field] = float(row[field])
+    return rows
+
+
+_SESSIONS = {}
+
+
+def _init_worker(sequences, labels, n_folds, alpha):
+    # Sessions are sent once per worker instead of once per configuration, and each
+    # worker runs single-threaded so that the pool does not oversubscribe the CPUs
+    torch.set_num_threads(1)
+    _SESSIONS.update(sequences=sequences, labels=labels, n_folds=n_folds, alpha=alpha)
+
+
+def _evaluate_in_worker(config: dict) -> dict:
+    return evaluate_config(config, **_SESSIONS)
+
+
+def run_sweep(
+    configs: List[dict],
+    sequences: List[np.ndarray],
+    labels: Sequence[int],
+    results_path: os.PathLike,
+    n_workers: Optional[int] = None,
+    n_folds: int = 5,
+    alpha: float = 1.0,
+) -> List[dict]:
+    """Evaluate configurations in a process pool, appending each result to a CSV
+    table as soon as it is available. Configurations already in the table are
+    skipped, so an interrupted sweep resumes where it stopped.
+
+    Args:
+        configs (list): Configurations to evaluate, see :func:`grid_search` and
+            :func:`random_search`.
+        sequences (list): Normalized sessions shaped as (time, n_inp).
+        labels (list): Class of each session.
+        results_path (str): Path to the CSV results table.
+        n_workers (int, optional): Number of processes. Defaults to the CPU count.
+        n_folds (int): Number of cross-validation folds, see :func:`evaluate_config`.
+        alpha (float): Ridge regularization strength.
+
+    Returns:
+        list: All the rows of the results table, sorted by decreasing accuracy.
+
+    Raises:
+        ValueError: if a class has a single session, in which case no configuration
+            can be cross-validated.
+    """
+    if smallest_class(labels) < 2:
+        raise ValueError(
+            "Cannot cross-validate, a class has a single session. Label at least "
+            "2 sessions per class"
+        )
+    done = {config_key(row["config"]) for row in load_results(results_path)}
+    todo = {config_key(c): c for c in configs if config_key(c) not in done}
+
+    write_header = not os.path.exists(results_path)
+    with open(results_path, "a", newline="") as f, ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(sequences, list(labels), n_folds, alpha),
+    ) as pool:
+        writer = csv.DictWriter(f, fieldnames=["config"] + RESULT_FIELDS)
+        if write_header:
+            writer.writeheader()
+        futures = {pool.submit(_evaluate_in_worker, c): k for k, c in todo.items()}
+        for i, future in enumerate(as_completed(futures), start=1):
+            try:
+                result = future.result()
+            except CONFIG_ERRORS as e:
+                # Not written to the table, hence retried when the sweep is resumed
+                print(f"[{i}/{len(futures)}] failed: {e!r} {futures[future]}")
+                continue
+            writer.writerow({"config": futures[future], **result})
+            f.flush()
+            print(
+                f"[{i}/{len(futures)}] accuracy={result['accuracy']:.3f} "
+                f"{futures[future]}"
+            )
+
+    return sorted(load_results(results_path), key=lambda r: -r["accuracy"])
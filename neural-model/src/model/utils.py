@@ -1,9 +1,35 @@
-from typing import Literal
+import os
+import tempfile
+import warnings
+from typing import (
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 import torch
 from torch import nn
 
+# Matrices up to this size are decomposed exactly, iterative solvers do not pay off
+EXACT_EIG_MAX_SIZE = 512
+# Krylov subspace size of the Arnoldi iteration
+ARNOLDI_NCV = 80
+# Multiply-adds (restarts x ARNOLDI_NCV x non-zeros) Arnoldi may spend before the
+# power iteration is used instead. Flat spectra (e.g., dense random matrices) need
+# hundreds of matrix-vector products, minutes for dense matrices of 20k units.
+ARNOLDI_BUDGET = 1e10
+# Dense matrices below this density are converted to CSR for matrix-vector products
+SPARSE_DENSITY = 0.1
+# Rows processed at once by the checks on large dense matrices
+ROW_BLOCK = 1024
+# Location and size bound (in bytes) of the default ReservoirCache
+RESERVOIR_CACHE_PATH = os.getenv(
+    "RESERVOIR_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "ron")
+)
+RESERVOIR_CACHE_SIZE = int(os.getenv("RESERVOIR_CACHE_SIZE", 2**30))
+
 
 def count_parameters(model):
     """Return total number of parameters and
@@ -20,7 +46,28 @@ def count_parameters(model):
     return pytorch_total_params, pytorch_total_trainableparams
 
 
-def sparse_eye_init(M: int) -> torch.FloatTensor:
+def _sample_without_replacement(n_rows: int, n: int, k: int) -> np.ndarray:
+    """Draws ``k`` distinct integers in [0, n) for each of ``n_rows`` rows, without
+    allocating an n_rows x n matrix when k is small wrt n.
+
+    Returns:
+        np.ndarray: n_rows x k matrix of indices, sorted along each row.
+    """
+    assert n >= k
+    if 4 * k > n:
+        # Dense regime: a random permutation per row is cheap wrt the output size
+        return np.sort(np.argsort(np.random.rand(n_rows, n), axis=1)[:, :k], axis=1)
+    idx = np.random.randint(n, size=(n_rows, k))
+    while True:
+        # Resample only the rows containing duplicates, they are few when k << n
+        idx.sort(axis=1)
+        dup_rows = np.flatnonzero((idx[:, 1:] == idx[:, :-1]).any(axis=1))
+        if dup_rows.size == 0:
+            return idx
+        idx[dup_rows] = np.random.randint(n, size=(dup_rows.size, k))
+
+
+def sparse_eye_init(M: int, sparse: bool = False) -> torch.FloatTensor:
     """Generates an M x M matrix to be used as sparse identity matrix for the re-scaling
     of the sparse recurrent kernel in presence of non-zero leakage. The neurons are
     connected according to a ring topology, where each neuron receives input only from
@@ -29,6 +76,7 @@ def sparse_eye_init(M: int) -> torch.FloatTensor:
 
     Args:
         M (int): number of hidden units.
+        sparse (bool): if True, return a sparse COO tensor instead of a dense one.
 
     Returns:
         torch.FloatTensor: MxM identity matrix.
@@ -36,14 +84,15 @@ def sparse_eye_init(M: int) -> torch.FloatTensor:
     dense_shape = torch.Size([M, M])
 
     # gives the shape of a ring matrix:
-    indices = torch.zeros((M, 2), dtype=torch.long)
-    for i in range(M):
-        indices[i, :] = i
+    indices = torch.arange(M).repeat(2, 1)
     values = torch.ones(M)
-    return torch.sparse_coo_tensor(indices.T, values, dense_shape).to_dense().float()
+    eye = torch.sparse_coo_tensor(indices, values, dense_shape, is_coalesced=True)
+    return eye if sparse else eye.to_dense().float()
 
 
-def sparse_tensor_init(M: int, N: int, C: int = 1) -> torch.FloatTensor:
+def sparse_tensor_init(
+    M: int, N: int, C: int = 1, sparse: bool = False
+) -> torch.FloatTensor:
     """Generates an M x N matrix to be used as sparse (input) kernel For each row only C
     elements are non-zero (i.e., each input dimension is projected only to C neurons).
     The non-zero elements are generated randomly from a uniform distribution in [-1,1]
@@ -52,26 +101,26 @@ def sparse_tensor_init(M: int, N: int, C: int = 1) -> torch.FloatTensor:
         M (int): number of hidden units
         N (int): number of input units
         C (int): number of nonzero elements
+        sparse (bool): if True, return a sparse COO tensor instead of a dense one.
 
     Returns:
-        torch.FloatTensor: MxN dense matrix
+        torch.FloatTensor: MxN matrix
     """
     dense_shape = torch.Size([M, N])  # shape of the dense version of the matrix
-    indices = torch.zeros((M * C, 2), dtype=torch.long)
-    k = 0
-    for i in range(M):
-        # the indices of non-zero elements in the i-th row of the matrix
-        idx = np.random.choice(N, size=C, replace=False)
-        for j in range(C):
-            indices[k, 0] = i
-            indices[k, 1] = idx[j]
-            k = k + 1
+    # the indices of non-zero elements in each row of the matrix
+    cols = _sample_without_replacement(M, N, C)
+    rows = np.repeat(np.arange(M), C)
+    indices = torch.from_numpy(np.stack([rows, cols.ravel()]))
     values = 2 * (2 * np.random.rand(M * C).astype("f") - 1)
     values = torch.from_numpy(values)
-    return torch.sparse_coo_tensor(indices.T, values, dense_shape).to_dense().float()
+    # indices are unique and sorted row-major, no need to coalesce
+    W = torch.sparse_coo_tensor(indices, values, dense_shape, is_coalesced=True)
+    return W if sparse else W.to_dense().float()
 
 
-def sparse_recurrent_tensor_init(M: int, C: int = 1) -> torch.FloatTensor:
+def sparse_recurrent_tensor_init(
+    M: int, C: int = 1, sparse: bool = False
+) -> torch.FloatTensor:
     """Generates an M x M matrix to be used as sparse recurrent kernel. For each column
     only C elements are non-zero (i.e., each recurrent neuron take sinput from C other
     recurrent neurons). The non-zero elements are generated randomly from a uniform
@@ -80,40 +129,213 @@ def sparse_recurrent_tensor_init(M: int, C: int = 1) -> torch.FloatTensor:
     Args:
         M (int): number of hidden units
         C (int): number of nonzero elements
+        sparse (bool): if True, return a sparse COO tensor instead of a dense one.
 
     Returns:
-        torch.FloatTensor: MxM dense matrix
+        torch.FloatTensor: MxM matrix
     """
     assert M >= C
     dense_shape = torch.Size([M, M])  # the shape of the dense version of the matrix
-    indices = torch.zeros((M * C, 2), dtype=torch.long)
-    k = 0
-    for i in range(M):
-        # the indices of non-zero elements in the i-th column of the matrix
-        idx = np.random.choice(M, size=C, replace=False)
-        for j in range(C):
-            indices[k, 0] = idx[j]
-            indices[k, 1] = i
-            k = k + 1
+    # the indices of non-zero elements in each column of the matrix
+    rows = _sample_without_replacement(M, M, C).ravel()
+    cols = np.repeat(np.arange(M), C)
     values = 2 * (2 * np.random.rand(M * C).astype("f") - 1)
-    values = torch.from_numpy(values)
-    return torch.sparse_coo_tensor(indices.T, values, dense_shape).to_dense().float()
+    # cols are already ascending: a stable sort by row makes the (unique) indices
+    # row-major, so that the tensor is already coalesced
+    order = np.argsort(rows, kind="stable")
+    indices = torch.from_numpy(np.stack([rows[order], cols[order]]))
+    values = torch.from_numpy(values[order])
+    W = torch.sparse_coo_tensor(indices, values, dense_shape, is_coalesced=True)
+    return W if sparse else W.to_dense().float()
+
+
+def _is_triangular(W: torch.Tensor) -> bool:
+    if W.is_sparse:
+        rows, cols = W.indices()
+        return bool((rows >= cols).all() or (rows <= cols).all())
+    # Row blocks avoid a full-size copy and usually exit at the first block
+    lower, upper = True, True
+    for i in range(0, W.shape[0], ROW_BLOCK):
+        block = W[i : i + ROW_BLOCK]
+        lower = lower and not torch.triu(block, i + 1).any()
+        upper = upper and not torch.tril(block, i - 1).any()
+        if not (lower or upper):
+            return False
+    return True
+
+
+def _norm_bound(A) -> float:
+    """Returns min(||A||_1, ||A||_inf), an upper bound of the spectral radius."""
+    if not isinstance(A, np.ndarray):
+        abs_A = abs(A)
+        return float(min(abs_A.sum(axis=0).max(), abs_A.sum(axis=1).max()))
+    col_sums = np.zeros(A.shape[1], dtype=A.dtype)
+    row_sums = []
+    for i in range(0, A.shape[0], ROW_BLOCK):
+        block = np.abs(A[i : i + ROW_BLOCK])
+        col_sums += block.sum(axis=0)
+        row_sums.append(block.sum(axis=1))
+    return float(min(col_sums.max(), np.concatenate(row_sums).max()))
+
+
+def _power_iteration(
+    A, tol: float, max_iter: int, window: int = 10
+) -> Tuple[float, int]:
+    """Estimates rho(A) as the geometric mean of the growth of ||A^t v|| over the last
+    ``window`` steps, which also converges when the dominant eigenvalues share the
+    same modulus (e.g., ring and orthogonal matrices), where Arnoldi stalls. Returns
+    the estimate and the number of matrix-vector products."""
+    v = np.random.rand(A.shape[0]).astype(A.dtype)
+    v /= np.linalg.norm(v)
+    log_norms = []
+    rho = 0.0
+    for i in range(1, max_iter + 1):
+        v = A @ v
+        norm = np.linalg.norm(v)
+        if norm == 0:
+            # Nilpotent matrix
+            return 0.0, i
+        v /= norm
+        log_norms.append(np.log(norm))
+        if len(log_norms) >= 2 * window:
+            rho = np.exp(np.mean(log_norms[-window:]))
+            rho_prev = np.exp(np.mean(log_norms[-2 * window : -window]))
+            if abs(rho - rho_prev) <= tol * rho:
+                return float(rho), i
+    warnings.warn(
+        f"Power iteration did not converge in {max_iter} iterations, "
+        f"the spectral radius estimate {rho:.4g} may be inaccurate"
+    )
+    return float(rho), max_iter
+
+
+def spectral_radius(
+    W: torch.FloatTensor,
+    tol: float = 1e-3,
+    max_iter: int = 1000,
+    exact_max_size: int = EXACT_EIG_MAX_SIZE,
+    return_info: bool = False,
+) -> Union[float, Tuple[float, dict]]:
+    """Computes the spectral radius of a dense or sparse square matrix.
+
+    Small matrices are decomposed exactly with ``np.linalg.eigvals``. For larger ones
+    the largest magnitude eigenvalue is estimated with the implicitly restarted Arnoldi
+    method (ARPACK), which only needs matrix-vector products, within ARNOLDI_BUDGET
+    multiply-adds. If Arnoldi does not fit in the budget (large dense matrices), does
+    not converge (no gap between the largest eigenvalues) or returns a value above
+    the induced norm bound (pseudo-eigenvalue of a non-normal matrix), a power
+    iteration bounded by the norm is used instead. On the flat spectrum of dense
+    random matrices, its estimate is within about 1% of the spectral radius.
+    Triangular matrices are handled exactly by reading their diagonal.
+
+    Args:
+        W (torch.FloatTensor): dense or sparse COO square matrix.
+        tol (float): relative tolerance of the iterative estimate.
+        max_iter (int): maximum number of power iterations. Arnoldi is given
+            ``max_iter // 10`` restarts at most.
+        exact_max_size (int): matrices up to this size use the exact eigenvalues.
+        return_info (bool): also return the method used ('triangular', 'exact',
+            'arnoldi' or 'power') and the number of matrix-vector products.
+
+    Returns:
+        float: spectral radius of W.
+        dict: 'method' and 'matvecs', only if ``return_info``.
+    """
+
+    def result(rho: float, method: str, matvecs: int = 0):
+        rho = float(rho)
+        return (rho, {"method": method, "matvecs": matvecs}) if return_info else rho
+
+    n = W.shape[0]
+    W = W.detach().cpu().float()
+    if W.is_sparse:
+        W = W.coalesce()
+    if _is_triangular(W):
+        if W.is_sparse:
+            rows, cols = W.indices()
+            diag = W.values()[rows == cols]
+        else:
+            diag = W.diagonal()
+        return result(diag.abs().max() if diag.numel() else 0.0, "triangular")
+    if n <= exact_max_size:
+        W = W.to_dense() if W.is_sparse else W
+        return result(np.abs(np.linalg.eigvals(W.numpy())).max(), "exact")
+
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.linalg import (
+        ArpackNoConvergence,
+        LinearOperator,
+        eigs,
+    )
+
+    if not W.is_sparse and torch.count_nonzero(W) < SPARSE_DENSITY * n * n:
+        W = W.to_sparse()
+    if W.is_sparse:
+        # Matrix-vector products on the non-zero entries only
+        A = csr_matrix((W.values().numpy(), W.indices().numpy()), shape=(n, n))
+        nnz = A.nnz
+    else:
+        A = W.numpy()
+        nnz = n * n
+    ncv = min(n - 1, ARNOLDI_NCV)
+    restarts = min(max_iter // 10, int(ARNOLDI_BUDGET // (ncv * nnz)))
+    matvecs = 0
+    # A single restart is not enough to converge on the spectra that need Arnoldi
+    if restarts >= 2:
+
+        def matvec(v):
+            nonlocal matvecs
+            matvecs += 1
+            return A @ v
+
+        try:
+            # A few eigenvalues make it more likely to catch the largest one when
+            # the spectrum is clustered on a circle, as for random matrices
+            e = eigs(
+                LinearOperator((n, n), matvec=matvec, dtype=A.dtype),
+                k=3,
+                which="LM",
+                ncv=ncv,
+                tol=tol,
+                maxiter=restarts,
+                return_eigenvectors=False,
+            )
+            rho = float(np.abs(e).max())
+            # Arnoldi can converge to a pseudo-eigenvalue of strongly non-normal
+            # matrices (e.g., banded toeplitz), detected when it exceeds the norm
+            # bound
+            if rho <= _norm_bound(A) * (1 + tol):
+                return result(rho, "arnoldi", matvecs)
+        except ArpackNoConvergence:
+            pass
+    rho, iterations = _power_iteration(A, tol, max_iter)
+    return result(min(rho, _norm_bound(A)), "power", matvecs + iterations)
 
 
 def spectral_norm_scaling(
-    W: torch.FloatTensor, rho_desired: float
+    W: torch.FloatTensor, rho_desired: float, tol: float = 1e-3
 ) -> torch.FloatTensor:
     """Rescales W to have rho(W) = rho_desired .
 
     Args:
-        W (torch.FloatTensor): input matrix to be rescaled
+        W (torch.FloatTensor): input matrix to be rescaled, dense or sparse.
         rho_desired (float): desired spectral radius
+        tol (float): relative tolerance of the spectral radius estimate, see
+            :func:`spectral_radius`.
 
     Returns:
         torch.FloatTensor: rescaled matrix
+
+    Raises:
+        ValueError: if the spectral radius of W is 0 (e.g., a 'ring' or 'toeplitz'
+            topology with a zero scaler, or a nilpotent matrix).
     """
-    e, _ = np.linalg.eig(W.cpu())
-    rho_curr = max(abs(e))
+    rho_curr = spectral_radius(W, tol=tol)
+    if rho_curr == 0:
+        raise ValueError(
+            "The spectral radius of W is 0, it cannot be rescaled to rho_desired. "
+            "Check the reservoir_scaler of the 'ring' and 'toeplitz' topologies"
+        )
     return W * (rho_desired / rho_curr)
 
 
@@ -197,6 +419,10 @@ def get_hidden_topology(
         from scipy.linalg import toeplitz
 
         bandwidth = int(scaler)  # 5
+        if bandwidth < 1:
+            raise ValueError(
+                f"Invalid toeplitz bandwidth {bandwidth}. The scaler must be >= 1"
+            )
         upperdiagcoefs = np.zeros(n_hid)
         upperdiagcoefs[:bandwidth] = 2 * torch.rand(bandwidth) - 1
         lowerdiagcoefs = np.zeros(n_hid)
@@ -213,3 +439,96 @@ def get_hidden_topology(
             "Invalid topology. Options are 'full', 'lower', 'orthogonal', 'band', 'ring', 'toeplitz'"
         )
     return h2h
+
+
+class ReservoirCache:
+    """
+    On-disk cache of the hidden-to-hidden matrices generated by
+    :func:`get_hidden_topology` and rescaled by :func:`spectral_norm_scaling`. Each
+    matrix is stored as a ``.npy`` file keyed by (n_hid, topology, sparsity, scaler,
+    rho, seed) and memory-mapped when requested again, so that repeated experiments
+    skip both the generation and the spectral radius computation. Least recently used
+    files are evicted once the cache exceeds ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: str = RESERVOIR_CACHE_PATH,
+        max_bytes: int = RESERVOIR_CACHE_SIZE,
+    ):
+        """Initialize the cache.
+
+        Args:
+            path (str): Directory of the cached matrices, created if missing.
+            max_bytes (int): Maximum total size of the cached matrices.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, n_hid, topology, sparsity, scaler, rho, seed) -> str:
+        name = f"{n_hid}_{topology}_{sparsity!r}_{scaler!r}_{rho!r}_{seed}.npy"
+        return os.path.join(self.path, name)
+
+    def get(
+        self,
+        n_hid: int,
+        topology: str,
+        sparsity: float,
+        scaler: float,
+        rho: float,
+        seed: int,
+    ) -> torch.FloatTensor:
+        """Return the hidden-to-hidden matrix of the given configuration, mapped from
+        the cache if present, otherwise generated and added to the cache. Generation
+        uses its own RNG seeded with ``seed``, the global torch and NumPy RNGs are
+        left untouched.
+
+        Args:
+            n_hid (int): number of hidden units.
+            topology (str): topology of the matrix, see :func:`get_hidden_topology`.
+            sparsity (float): sparsity of the matrix.
+            scaler (float): scaling factor of the matrix.
+            rho (float): desired spectral radius, ignored for 'antisymmetric'.
+            seed (int): seed of the random generation.
+
+        Returns:
+            torch.FloatTensor: n_hid x n_hid matrix, memory-mapped copy-on-write.
+        """
+        file = self._file(n_hid, topology, sparsity, scaler, rho, seed)
+        if not os.path.exists(file):
+            with torch.random.fork_rng():
+                torch.manual_seed(seed)
+                np_state = np.random.get_state()
+                np.random.seed(seed)
+                try:
+                    h2h = get_hidden_topology(n_hid, topology, sparsity, scaler)
+                    if topology != "antisymmetric":
+                        h2h = spectral_norm_scaling(h2h, rho)
+                finally:
+                    np.random.set_state(np_state)
+            self._put(file, h2h.numpy().astype(np.float32))
+        # Mark as recently used
+        os.utime(file)
+        return torch.from_numpy(np.load(file, mmap_mode="c"))
+
+    def _put(self, file: str, h2h: np.ndarray):
+        # Written to a temporary file and renamed, so that concurrent processes never
+        # map a partially written matrix
+        fd, tmp = tempfile.mkstemp(suffix=".npy.tmp", dir=self.path)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, h2h)
+        os.replace(tmp, file)
+        self._evict(keep=file)
+
+    def _evict(self, keep: str):
+        files = [os.path.join(self.path, f) for f in os.listdir(self.path)]
+        files = [f for f in files if f.endswith(".npy")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        for f in files:
+            if total <= self.max_bytes:
+                break
+            if f != keep:
+                total -= os.path.getsize(f)
+                os.remove(f)
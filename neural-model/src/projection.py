@@ -0,0 +1,101 @@
+from typing import Optional
+
+import numpy as np
+
+# Drift of the components past which the stored projections are recomputed
+DRIFT_THRESHOLD = 0.05
+
+
+class IncrementalProjector:
+    """
+    PCA projection of reservoir states, updated from the new states only. The
+    running sum and scatter matrix of all the states seen so far give the same
+    components as a PCA refitted on all of them, at a cost that depends on the
+    number of new states and on the number of hidden units only.
+
+    Projections are computed with a display basis that is kept fixed while the
+    exact components move less than ``threshold`` away from it, so that the
+    projections already stored remain comparable with the new ones. Once the
+    drift is larger, the display basis is replaced and :meth:`partial_fit` returns
+    True: the stored projections must then be recomputed with :meth:`transform`.
+    """
+
+    def __init__(self, n_components: int = 3, threshold: float = DRIFT_THRESHOLD):
+        """Initialize the projector.
+
+        Args:
+            n_components (int): Number of principal components.
+            threshold (float): Largest drift of the exact components from the
+                display basis, see :meth:`drift`.
+        """
+        self.n_components = n_components
+        self.threshold = threshold
+        self.n_samples = 0
+        self.sum: Optional[np.ndarray] = None
+        self.scatter: Optional[np.ndarray] = None
+        # Display basis, used by transform
+        self.mean_: Optional[np.ndarray] = None
+        self.components_: Optional[np.ndarray] = None
+        self.n_rebases = 0
+
+    def partial_fit(self, states: np.ndarray) -> bool:
+        """Accumulate new states and update the display basis if the components
+        drifted past the threshold.
+
+        Args:
+            states (np.ndarray): New states shaped as (n_states, n_hid).
+
+        Returns:
+            bool: True if the display basis changed, in which case the projections
+                computed before are stale.
+        """
+        states = np.asarray(states, dtype=np.float64)
+        if self.sum is None:
+            self.sum = np.zeros(states.shape[1])
+            self.scatter = np.zeros((states.shape[1], states.shape[1]))
+        self.n_samples += len(states)
+        self.sum += states.sum(axis=0)
+        self.scatter += states.T @ states
+
+        mean, components, variance = self._fit()
+        if self.components_ is not None:
+            # Eigenvectors are defined up to their sign, keep the display orientation
+            signs = np.sign(np.sum(components * self.components_, axis=1))
+            components *= np.where(signs == 0, 1, signs)[:, None]
+            if self.drift(mean, components, variance) <= self.threshold:
+                return False
+        self.mean_, self.components_ = mean, components
+        self.n_rebases += 1
+        return True
+
+    def drift(
+        self, mean: np.ndarray, components: np.ndarray, variance: np.ndarray
+    ) -> float:
+        """Distance between a basis and the display basis: the largest of one minus
+        the cosine between matching components, and of the shift of the mean
+        relative to the standard deviation of the projections."""
+        cosine = np.abs(np.sum(components * self.components_, axis=1))
+        shift = np.linalg.norm(mean - self.mean_) / np.sqrt(max(variance.sum(), 1e-12))
+        return float(max(1 - cosine.min(), shift))
+
+    def transform(self, states: np.ndarray) -> np.ndarray:
+        """Project states on the display basis.
+
+        Args:
+            states (np.ndarray): States shaped as (n_states, n_hid).
+
+        Returns:
+            np.ndarray: Projections shaped as (n_states, n_components).
+        """
+        if self.components_ is None:
+            raise ValueError("No state accumulated, call partial_fit first")
+        return ((states - self.mean_) @ self.components_.T).astype(np.float32)
+
+    def _fit(self):
+        """Exact mean, components and explained variances of the states seen."""
+        mean = self.sum / self.n_samples
+        covariance = self.scatter / self.n_samples - np.outer(mean, mean)
+        variance, vectors = np.linalg.eigh(covariance)
+        # eigh sorts the eigenvalues in increasing order
+        top = np.argsort(variance)[::-1][: self.n_components]
+        return mean, vectors[:, top].T, np.clip(variance[top], 0, None)
@@ -0,0 +1,83 @@
+from typing import (
+    Dict,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+
+from .projection import IncrementalProjector
+
+
+class ClassPrototypes:
+    """
+    Running mean and covariance of the last reservoir state of the touches predicted
+    in each class, updated with Welford's algorithm from the new touches only. The
+    statistics are kept in the state space and projected on demand, so that they
+    remain exact when the PCA basis changes: the mean projects to the mean of the
+    projections, and the covariance C Σ Cᵀ gives their dispersion.
+
+    With ``forgetting`` < 1 the past touches are exponentially down-weighted at
+    each new touch of the class, so that the prototypes follow a drifting sensor.
+    """
+
+    def __init__(self, n_classes: int, forgetting: float = 1.0):
+        """Initialize empty statistics.
+
+        Args:
+            n_classes (int): Number of classes.
+            forgetting (float): Weight of the past touches of a class at each new
+                one, in (0, 1]. 1 weights all the touches equally.
+        """
+        if not 0 < forgetting <= 1:
+            raise ValueError("forgetting must be in (0, 1]")
+        self.n_classes = n_classes
+        self.forgetting = forgetting
+        self.counts = np.zeros(n_classes, dtype=int)
+        # Sum of the weights of the touches of each class
+        self.weights = np.zeros(n_classes)
+        self.means: Optional[np.ndarray] = None
+        # Weighted sums of the outer products of the deviations from the mean
+        self.scatters: Optional[np.ndarray] = None
+
+    def update(self, states: np.ndarray, labels: np.ndarray):
+        """Add newly classified touches.
+
+        Args:
+            states (np.ndarray): Last state of each touch shaped as (n, n_hid).
+            labels (np.ndarray): Predicted class of each touch.
+        """
+        states = np.asarray(states, dtype=np.float64)
+        if self.means is None:
+            n_hid = states.shape[1]
+            self.means = np.zeros((self.n_classes, n_hid))
+            self.scatters = np.zeros((self.n_classes, n_hid, n_hid))
+        for x, c in zip(states, labels):
+            self.counts[c] += 1
+            self.weights[c] = self.forgetting * self.weights[c] + 1
+            delta = x - self.means[c]
+            self.means[c] += delta / self.weights[c]
+            self.scatters[c] *= self.forgetting
+            self.scatters[c] += np.outer(delta, x - self.means[c])
+
+    def project(
+        self, projector: IncrementalProjector
+    ) -> Dict[int, Optional[Tuple[np.ndarray, np.ndarray]]]:
+        """Mean and standard deviation of the projections of each class.
+
+        Returns:
+            dict: Class -> (mean, std) shaped as (n_components,), None for the
+                classes without touches.
+        """
+        prototypes = {}
+        for c in range(self.n_classes):
+            if self.counts[c] == 0:
+                prototypes[c] = None
+                continue
+            components = projector.components_
+            covariance = (
+                components @ (self.scatters[c] / self.weights[c]) @ components.T
+            )
+            std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+            prototypes[c] = projector.transform(self.means[c]), std.astype(np.float32)
+        return prototypes
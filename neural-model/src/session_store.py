@@ -0,0 +1,136 @@
+import collections
+import os
+import shutil
+import tempfile
+import weakref
+from array import array
+from typing import (
+    List,
+    Optional,
+    Sequence,
+)
+
+import numpy as np
+
+PREDICTIONS_FILE = "predictions.f32"
+STATES_FILE = "states.f32"
+
+
+class SessionStore:
+    """
+    Predictions and reservoir trajectories of the touches processed by a dashboard
+    session. The last ``window`` touches are kept in memory; older ones are spilled
+    to two append-only float32 files (fixed-size prediction rows, and the rows of
+    the trajectories with their offsets kept in memory), from which any range of
+    touches can be paged back. Memory use is bounded by the window whatever the
+    length of the session.
+
+    The spill files live in a private temporary directory, removed together with
+    the store.
+    """
+
+    def __init__(self, window: int = 500, path: Optional[str] = None):
+        """Initialize an empty store.
+
+        Args:
+            window (int): Number of most recent touches kept in memory.
+            path (str, optional): Directory in which the spill directory is
+                created. Defaults to the system temporary directory.
+        """
+        if window < 1:
+            raise ValueError("window must be a positive integer")
+        self.window = window
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix="session_", dir=path)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        self._predictions = collections.deque()
+        self._states = collections.deque()
+        self.n_spilled = 0
+        self.n_classes = None
+        self.n_hid = None
+        # Row offsets of the spilled trajectories in STATES_FILE
+        self._offsets = array("q", [0])
+
+    def __len__(self) -> int:
+        return self.n_spilled + len(self._predictions)
+
+    def extend(self, predictions: Sequence[np.ndarray], states: Sequence[np.ndarray]):
+        """Append the predictions and trajectories of new touches, spilling the
+        oldest ones past the window.
+
+        Args:
+            predictions (list): Class probabilities of each touch.
+            states (list): Trajectory of each touch shaped as (time, n_hid).
+        """
+        for pred, h in zip(predictions, states):
+            self._predictions.append(np.asarray(pred, dtype=np.float32))
+            self._states.append(np.asarray(h, dtype=np.float32))
+        if self.n_classes is None and self._predictions:
+            self.n_classes = self._predictions[0].shape[-1]
+            self.n_hid = self._states[0].shape[-1]
+        overflow = len(self._predictions) - self.window
+        if overflow > 0:
+            self._spill(overflow)
+
+    def predictions(self, start: int, stop: int) -> np.ndarray:
+        """Class probabilities of the touches in [start, stop), shaped as
+        (n_touches, n_classes)."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return np.zeros((0, self.n_classes or 0), dtype=np.float32)
+        parts = []
+        if start < self.n_spilled:
+            end = min(stop, self.n_spilled)
+            parts.append(
+                np.fromfile(
+                    os.path.join(self.directory, PREDICTIONS_FILE),
+                    dtype=np.float32,
+                    count=(end - start) * self.n_classes,
+                    offset=start * self.n_classes * 4,
+                ).reshape(-1, self.n_classes)
+            )
+        if stop > self.n_spilled:
+            parts.append(np.stack(self._in_memory(self._predictions, start, stop)))
+        return np.concatenate(parts)
+
+    def states(self, start: int, stop: int) -> List[np.ndarray]:
+        """Trajectories of the touches in [start, stop)."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return []
+        states = []
+        if start < self.n_spilled:
+            end = min(stop, self.n_spilled)
+            # A single read for the whole range, then split at the offsets
+            first, last = self._offsets[start], self._offsets[end]
+            rows = np.fromfile(
+                os.path.join(self.directory, STATES_FILE),
+                dtype=np.float32,
+                count=(last - first) * self.n_hid,
+                offset=first * self.n_hid * 4,
+            ).reshape(-1, self.n_hid)
+            splits = np.asarray(self._offsets[start + 1 : end]) - first
+            states.extend(np.split(rows, splits))
+        if stop > self.n_spilled:
+            states.extend(self._in_memory(self._states, start, stop))
+        return states
+
+    def close(self):
+        """Remove the spill files."""
+        self._finalizer()
+
+    def _in_memory(self, buffer: collections.deque, start: int, stop: int) -> list:
+        first = max(start - self.n_spilled, 0)
+        return [buffer[i] for i in range(first, stop - self.n_spilled)]
+
+    def _spill(self, n: int):
+        predictions = [self._predictions.popleft() for _ in range(n)]
+        states = [self._states.popleft() for _ in range(n)]
+        with open(os.path.join(self.directory, PREDICTIONS_FILE), "ab") as f:
+            f.write(np.stack(predictions).tobytes())
+        with open(os.path.join(self.directory, STATES_FILE), "ab") as f:
+            f.write(np.concatenate(states).tobytes())
+        for h in states:
+            self._offsets.append(self._offsets[-1] + len(h))
+        self.n_spilled += n
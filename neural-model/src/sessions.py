@@ -0,0 +1,61 @@
+import json
+import os
+
+import numpy as np
+
+# Location, classes and loading of the recorded follow-touch sessions, kept free of
+# the dashboard stack (streamlit, plotly) so that the offline tools can import them
+STORAGE_PATH = os.getenv("STORAGE_PATH", "storage")
+DEBUG = int(os.getenv("DEBUG", "1"))
+FOLLOW_TOUCH_ID = int(os.getenv("FOLLOW_TOUCH_ID", "0"))
+MODEL_INPUT_SIZE = int(os.getenv("MODEL_INPUT_SIZE", "4"))
+LABEL_CLASSES = 5
+LABEL_NAMES = {
+    0: "Center",
+    1: "Lower Left",
+    2: "Lower Right",
+    3: "Upper Right",
+    4: "Upper Left",
+}
+
+
+def process_fn(json_sample):
+    json_sample = json_sample["t"]  # Getting a dict
+    json_sample = json_sample[list(json_sample.keys())[0]]  # Getting a list
+    json_sample = [
+        (float(s["i"]) - float(s["b"])) for s in json_sample
+    ]  # Removing bias
+    return json_sample
+
+
+def load_data(data_path: os.PathLike) -> list:
+    """Load data from the specified JSON file."""
+    if DEBUG == 1:
+        try:
+            with open(data_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            return None
+    else:
+        try:
+            with open(data_path, "r") as f:
+                content = f.read()
+                content = content[:-4] + "]}"
+                data = json.loads(content)
+                data = data[f"follow_touch_{FOLLOW_TOUCH_ID}"]
+                data = map(process_fn, data)
+                return list(data)
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON from {data_path}: {e}")
+            return None
+        except Exception as e:
+            return None
+
+
+def min_max_normalize(samples: list) -> np.ndarray:
+    """Apply min max normalization through min e max over the time axis."""
+    samples = np.array(samples)
+    return (samples - np.amin(samples, axis=0, keepdims=True)) / (
+        np.amax(samples, axis=0, keepdims=True)
+        - np.amin(samples, axis=0, keepdims=True)
+    )
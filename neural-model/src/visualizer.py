@@ -5,25 +5,48 @@ import numpy as np
 import plotly.graph_objs as go
 from sklearn.decomposition import PCA
 from streamlit_autorefresh import st_autorefresh
+import functools
 import os
-import json
 from pathlib import Path
-from .model import Predictor
 
-STORAGE_PATH = os.getenv("STORAGE_PATH", "storage")
-DEBUG = int(os.getenv("DEBUG", "1"))
-FOLLOW_TOUCH_ID = int(os.getenv("FOLLOW_TOUCH_ID", "0"))
-MODEL_INPUT_SIZE = int(os.getenv("MODEL_INPUT_SIZE", "4"))
+from .projection import IncrementalProjector
+from .prototypes import ClassPrototypes
+from .session_store import SessionStore
+from .sessions import (
+    FOLLOW_TOUCH_ID,
+    LABEL_CLASSES,
+    LABEL_NAMES,
+    MODEL_INPUT_SIZE,
+    STORAGE_PATH,
+    load_data,
+    min_max_normalize,
+)
+from .watcher import StorageWatcher
+
+if TYPE_CHECKING:
+    from .model import Predictor
+
 TRAJECTORY_LENGTH = int(os.getenv("TRAJECTORY_LENGTH", "10"))
-LABEL_CLASSES = 5
-LABEL_NAMES = {
-    0: "Center",
-    1: "Lower Left",
-    2: "Lower Right",
-    3: "Upper Right",
-    4: "Upper Left",
-}
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+PCA_DRIFT = float(os.getenv("PCA_DRIFT", "0.05"))
+# Touches kept in memory by each session, older ones are spilled to SESSION_SPILL_PATH
+SESSION_WINDOW = int(os.getenv("SESSION_WINDOW", "500"))
+SESSION_SPILL_PATH = os.getenv("SESSION_SPILL_PATH") or None
+# Weight of the past touches of a class at each new one, 1 disables the forgetting
+PROTOTYPE_FORGETTING = float(os.getenv("PROTOTYPE_FORGETTING", "1.0"))
+# 'grouped' (one trace per class) or 'per_sequence' (one trace per touch)
+RENDER_MODE = os.getenv("RENDER_MODE", "grouped")
+MODEL_FILES = ("model.ron", "ron.pt", "readout.pt", "scaler.pt")
 LABEL_COLORS = {0: "red", 1: "blue", 2: "green", 3: "orange", 4: "purple"}
+LABEL_POSITIONS = {
+    0: (0.5, 0.5),  # Center
+    1: (0.0, 0.0),  # Lower Left
+    2: (1.0, 0.0),  # Lower Right
+    3: (1.0, 1.0),  # Upper Right
+    4: (0.0, 1.0),  # Upper Left
+}
+# Points of each uncertainty circle of the 2D view, in the 'grouped' render mode
+CIRCLE_POINTS = 32
 
 MIN_VALUES = {
     0: 2267.266666666667,
@@ -66,44 +89,43 @@ def streamlit_run():
     st_autorefresh(interval=PRED_FREQ, limit=None, key="data_autorefresh")
 
     storage_path = Path(STORAGE_PATH)
-
-    # Find all files matching the pattern "follow_touch_[FOLLOW_TOUCH_ID]_*.json" sorted by filename
-    files = sorted(
-        list(storage_path.glob(f"follow_touch_{FOLLOW_TOUCH_ID}_*.json")),
-        key=lambda f: f.name,
-    )
-    if not files:
-        st.warning(
-            f"No matching data files found. Waiting for data to be generated in {storage_path}"
-        )
-        st.stop()
+    watcher = load_watcher(str(storage_path))
 
     if "processed_files" not in st.session_state:
         st.session_state.processed_files = set()
-        st.session_state.predictions = []
-        st.session_state.activations = []
-        st.session_state.pca_buffer = []
+        # Changed files that could not be loaded yet (e.g. still being written),
+        # retried on each refresh
+        st.session_state.pending_files = set()
+        st.session_state.watch_seq = 0
+        st.session_state.store = SessionStore(SESSION_WINDOW, SESSION_SPILL_PATH)
+        st.session_state.projector = IncrementalProjector(3, threshold=PCA_DRIFT)
+        st.session_state.prototypes = ClassPrototypes(
+            LABEL_CLASSES, forgetting=PROTOTYPE_FORGETTING
+        )
         st.session_state.class_proto = {i: None for i in range(LABEL_CLASSES)}
 
+    # Only the files "follow_touch_[FOLLOW_TOUCH_ID]_*.json" created or modified since
+    # the previous refresh of this session, sorted by filename. The sequence number
+    # only moves forward once they are processed, so that an error on this refresh
+    # leaves them to the next one
+    files, watch_seq = watcher.changes_since(st.session_state.watch_seq)
+    if len(watcher) == 0:
+        st.warning(
+            f"No matching data files found. Waiting for data to be generated in {storage_path}"
+        )
+        st.stop()
     unprocessed_files = [
-        f for f in files if str(f) not in st.session_state.processed_files
+        Path(f)
+        for f in sorted(st.session_state.pending_files.union(files))
+        if f not in st.session_state.processed_files
     ]
 
-    # Clean up removed files from unprocessed list and session buffers
-    existing_paths = set(str(f) for f in files)
-    to_remove = [
-        i for i, f in enumerate(unprocessed_files) if str(f) not in existing_paths
-    ]
-    for i in reversed(to_remove):  # remove from back to front to preserve indices
-        del unprocessed_files[i]
-        if i < len(st.session_state.predictions):
-            del st.session_state.predictions[i]
-        if i < len(st.session_state.activations):
-            del st.session_state.activations[i]
-        if i < len(st.session_state.pca_buffer):
-            del st.session_state.pca_buffer[i]
-
     samples_to_process = [load_data(data_path) for data_path in unprocessed_files]
+    pending_files = {
+        str(unprocessed_files[i])
+        for i in range(len(samples_to_process))
+        if samples_to_process[i] is None
+    }
     unprocessed_files = [
         unprocessed_files[i]
         for i in range(len(samples_to_process))
@@ -112,65 +134,38 @@ def streamlit_run():
     samples_to_process = [sample for sample in samples_to_process if sample is not None]
     if samples_to_process:
         model_path = storage_path / f"params_{MODEL_INPUT_SIZE}"
-        model = Predictor(model_path=model_path)
-        for data_path, samples in zip(unprocessed_files, samples_to_process):
-            samples = np.array([samples])
-            # Apply min max normalization through min e max over the 0th axis
-            samples = (samples - np.amin(samples, axis=1, keepdims=True)) / (
-                np.amax(samples, axis=1, keepdims=True)
-                - np.amin(samples, axis=1, keepdims=True)
-            )
-            pred, activations = model(samples)
-            st.session_state.predictions.extend(pred)
-            st.session_state.activations.extend(activations)
-            st.session_state.processed_files.add(str(data_path))
-
-        # Update the PCA on all the activations
-        pca = PCA(n_components=3)
-        if len(st.session_state.predictions) == 1:
-            pca = pca.fit(st.session_state.activations[0][-TRAJECTORY_LENGTH:])
-        else:
-            pca = pca.fit(
-                np.concatenate(
-                    [act[-TRAJECTORY_LENGTH:] for act in st.session_state.activations],
-                    axis=0,
-                )
-            )
-        st.session_state.pca_buffer = [
-            pca.transform(act[-TRAJECTORY_LENGTH:])
-            for act in st.session_state.activations
-        ]
-
-        # Update the prototypes of the PCA for each class
-        class_labels = np.argmax(np.array(st.session_state.predictions), axis=-1)
-        # Group all the PCA values by class
-        for i in range(LABEL_CLASSES):
-            pca_values = [
-                st.session_state.pca_buffer[j][-1]
-                for j in range(len(st.session_state.predictions))
-                if class_labels[j] == i
-            ]
-            if len(pca_values) > 0:
-                if len(pca_values) > 1:
-                    # Stack the PCA values for each class
-                    pca_values = np.stack(pca_values, axis=0)
-                    # Calculate the mean and std of the PCA values for each class
-                    st.session_state.class_proto[i] = (
-                        np.mean(pca_values, axis=0),
-                        np.random.random(3),  # np.std(pca_values, axis=0),
-                    )
-                else:
-                    st.session_state.class_proto[i] = pca_values[0], np.zeros(3)
+        model = load_predictor(model_path)
+        sequences = [min_max_normalize(samples) for samples in samples_to_process]
+        # All the new files go through the model in a single batched forward
+        # Only the last TRAJECTORY_LENGTH states of each touch are visualized
+        pred, activations = model.predict_batch(
+            sequences, return_states="last_k", k=TRAJECTORY_LENGTH
+        )
+        st.session_state.store.extend(pred, activations)
+        st.session_state.processed_files.update(str(f) for f in unprocessed_files)
+
+        # Update the PCA with the new activations only. The projections are computed
+        # for the displayed touches only, with a basis that changes only when the
+        # components drifted past PCA_DRIFT
+        projector = st.session_state.projector
+        projector.partial_fit(np.concatenate(activations, axis=0))
+
+        # Update the prototypes of each class with the new touches only
+        st.session_state.prototypes.update(
+            np.stack([act[-1] for act in activations]), np.argmax(pred, axis=-1)
+        )
+        st.session_state.class_proto = st.session_state.prototypes.project(projector)
         print(
-            f"Processed {st.session_state.processed_files}\n",
-            f"Predictions: {st.session_state.predictions}\n",
-            f"PCA Buffer: {st.session_state.pca_buffer}\n",
+            f"Processed {[f.name for f in unprocessed_files]}\n",
+            f"Predictions: {pred}\n",
             f"Class prototypes:{st.session_state.class_proto}",
         )
+    st.session_state.pending_files = pending_files
+    st.session_state.watch_seq = watch_seq
 
     display_visualization(
-        st.session_state.predictions,
-        st.session_state.pca_buffer,
+        st.session_state.store,
+        st.session_state.projector,
         st.session_state.class_proto,
     )
 
@@ -181,37 +176,37 @@ def configure_streamlit():
     st.title("Predictions Visualization")
 
 
-def process_fn(json_sample):
-    json_sample = json_sample["t"]  # Getting a dict
-    json_sample = json_sample[list(json_sample.keys())[0]]  # Getting a list
-    json_sample = [
-        (float(s["i"]) - float(s["b"])) for s in json_sample
-    ]  # Removing bias
-    return json_sample
+def load_predictor(model_path: os.PathLike) -> Predictor:
+    """Return the predictor of the configured MODEL_BACKEND ("torch" or "numpy") for
+    the model stored in model_path. The predictor is cached process-wide and reloaded
+    only when one of the model files is modified."""
+    paths = [os.path.join(model_path, f) for f in MODEL_FILES]
+    mtimes = tuple(os.stat(p).st_mtime_ns if os.path.exists(p) else None for p in paths)
+    return _cached_predictor(str(model_path), MODEL_BACKEND, mtimes)
 
 
-def load_data(data_path: os.PathLike) -> list:
-    """Load data from the specified JSON file."""
-    if DEBUG == 1:
-        try:
-            with open(data_path, "r") as f:
-                return json.load(f)
-        except Exception as e:
-            return None
-    else:
-        try:
-            with open(data_path, "r") as f:
-                content = f.read()
-                content = content[:-4] + "]}"
-                data = json.loads(content)
-                data = data[f"follow_touch_{FOLLOW_TOUCH_ID}"]
-                data = map(process_fn, data)
-                return list(data)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON from {data_path}: {e}")
-            return None
-        except Exception as e:
-            return None
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _cached_predictor(model_path: str, backend: str, mtimes: tuple) -> Predictor:
+    # backend and mtimes are only part of the cache key: a modified model file gives
+    # a new entry, and max_entries=1 releases the previous model
+    if backend == "numpy":
+        from .model import NumpyPredictor
+
+        return NumpyPredictor(model_path=model_path)
+    from .model import Predictor
+
+    return Predictor(model_path=model_path)
+
+
+@st.cache_resource(show_spinner=False)
+def load_watcher(storage_path: str) -> StorageWatcher:
+    """Return the process-wide watcher of the follow-touch files in storage_path,
+    shared by all the sessions. Its index is kept in storage_path."""
+    return StorageWatcher(
+        storage_path,
+        pattern=f"follow_touch_{FOLLOW_TOUCH_ID}_*.json",
+        index_path=os.path.join(storage_path, f".follow_touch_{FOLLOW_TOUCH_ID}.index"),
+    )
 
 
 def run_prediction(buffer: list, model: Predictor) -> tuple:
@@ -225,22 +220,25 @@ def run_prediction(buffer: list, model: Predictor) -> tuple:
     return pred.tolist(), reduced_activations
 
 
-def display_visualization(predictions, pca_data, class_proto):
-    """Display the PCA visualization with sidebar controls."""
+def display_visualization(
+    store: SessionStore, projector: IncrementalProjector, class_proto: dict
+):
+    """Display the PCA visualization with sidebar controls. Only the touches selected
+    by the sliders are read from the store and projected."""
     st.sidebar.write(
         f"Number of sequences (Touches): {len(st.session_state.processed_files)}"
     )
     DISPLAY_LIMIT = st.sidebar.slider(
         "Number of Sequences", min_value=1, max_value=100, value=5
     )
-    max_time_index = max(len(st.session_state.pca_buffer) - DISPLAY_LIMIT, 0)
+    max_time_index = max(len(store) - DISPLAY_LIMIT, 0)
     TIME_SLIDER = st.sidebar.slider(
         "Index of the first sequence to show",
         min_value=0,
         max_value=max_time_index if max_time_index > 0 else 1,
         value=max_time_index,
     )
-    if "pca_buffer" not in st.session_state or len(st.session_state.pca_buffer) == 0:
+    if len(store) == 0:
         # Display an empty plot if there is not enough data
         empty_fig = go.Figure()
         empty_fig.update_layout(
@@ -250,155 +248,283 @@ def display_visualization(predictions, pca_data, class_proto):
         )
         st.plotly_chart(empty_fig, use_container_width=True)
     else:
-        fig = go.Figure()
-        added_labels = set()  # Track labels already added to the legend
-        for idx, distr in enumerate(
-            predictions[TIME_SLIDER : TIME_SLIDER + DISPLAY_LIMIT], start=TIME_SLIDER
-        ):
-            label = np.argmax(distr)
-            show_legend = label not in added_labels
-            if show_legend:
-                added_labels.add(label)
-            fig.add_trace(
-                go.Scatter3d(
-                    x=pca_data[idx][:, 0],
-                    y=pca_data[idx][:, 1],
-                    z=pca_data[idx][:, 2],
-                    mode="markers+lines",
-                    marker=dict(
-                        size=[6] * (len(pca_data[idx]) - 1) + [8],
-                        symbol=["circle"] * (len(pca_data[idx]) - 1) + ["cross"],
-                        color=[LABEL_COLORS[label]] * len(pca_data[idx]),
-                        opacity=0.9,
-                    ),
-                    line=dict(color=LABEL_COLORS[label], width=2),
-                    name=LABEL_NAMES[label],
-                    showlegend=show_legend,
-                )
-            )
-        # Add class prototype points
-        for class_id, proto in class_proto.items():
-            if proto is not None and class_id in added_labels:
-                mean, std = proto
-                fig.add_trace(
-                    go.Scatter3d(
-                        x=[mean[0]],
-                        y=[mean[1]],
-                        z=[mean[2]],
-                        mode="markers",
-                        marker=dict(
-                            size=8,
-                            symbol="diamond",
-                            color=LABEL_COLORS[class_id],
-                            opacity=1.0,
-                        ),
-                        name=f"{LABEL_NAMES[class_id]} Proto",
-                        showlegend=True,
-                    )
-                )
+        predictions = store.predictions(TIME_SLIDER, TIME_SLIDER + DISPLAY_LIMIT)
+        pca_data = [
+            projector.transform(act)
+            for act in store.states(TIME_SLIDER, TIME_SLIDER + DISPLAY_LIMIT)
+        ]
+        fig, fig2 = build_figures(predictions, pca_data, class_proto, RENDER_MODE)
 
-                # Generate a sphere to represent the std deviation, centered at the mean
-                u, v = np.mgrid[0 : 2 * np.pi : 20j, 0 : np.pi : 10j]
-                x = std[0] * np.sin(v) * np.cos(u) + mean[0]
-                y = std[1] * np.sin(v) * np.sin(u) + mean[1]
-                z = std[2] * np.cos(v) + mean[2]
-
-                fig.add_trace(
-                    go.Surface(
-                        x=x,
-                        y=y,
-                        z=z,
-                        showscale=False,
-                        opacity=0.2,
-                        surfacecolor=np.full_like(x, class_id),
-                        colorscale=[
-                            [0, LABEL_COLORS[class_id]],
-                            [1, LABEL_COLORS[class_id]],
-                        ],
-                        name=f"{LABEL_NAMES[class_id]} Std",
-                        showlegend=False,
-                    )
-                )
-        fig.update_layout(
-            scene=dict(xaxis_title="PC1", yaxis_title="PC2", zaxis_title="PC3"),
-            title="3D PCA of RON Activations",
-            margin=dict(l=0, r=0, t=50, b=0),
-            legend=dict(title="Predicted Labels", itemsizing="constant"),
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.plotly_chart(fig, use_container_width=True)
+
+        with col2:
+            st.plotly_chart(fig2, use_container_width=True)
+
+
+def build_figures(
+    predictions: np.ndarray,
+    pca_data: list,
+    class_proto: dict,
+    render_mode: str = "grouped",
+) -> tuple:
+    """Build the 3D PCA figure and the 2D pressure point figure of the displayed
+    touches.
+
+    Args:
+        predictions (np.ndarray): Class probabilities of the displayed touches.
+        pca_data (list): Projected trajectory of each displayed touch.
+        class_proto (dict): Class -> (mean, std) of the prototypes, or None.
+        render_mode (str): 'grouped' draws one trace per class, with the touches
+            separated by NaN points, and the uncertainty circles as one trace per
+            class; the figures stay small as the number of touches grows.
+            'per_sequence' draws one trace per touch and per circle.
+
+    Returns:
+        go.Figure: 3D PCA figure.
+        go.Figure: 2D pressure point figure.
+    """
+    if render_mode == "grouped":
+        fig = _grouped_pca_figure(predictions, pca_data)
+        fig2 = _grouped_pressure_figure(predictions)
+    elif render_mode == "per_sequence":
+        fig = _per_sequence_pca_figure(predictions, pca_data)
+        fig2 = _per_sequence_pressure_figure(predictions)
+    else:
+        raise ValueError("Invalid render_mode. Options are 'grouped', 'per_sequence'")
+    _add_prototypes(fig, class_proto, set(np.argmax(predictions, axis=-1).tolist()))
+    fig.update_layout(
+        scene=dict(xaxis_title="PC1", yaxis_title="PC2", zaxis_title="PC3"),
+        title="3D PCA of RON Activations",
+        margin=dict(l=0, r=0, t=50, b=0),
+        legend=dict(title="Predicted Labels", itemsizing="constant"),
+    )
+    fig2.update_layout(
+        title="2D Pressure Point Visualization with Uncertainty",
+        xaxis=dict(
+            range=[-0.1, 1.1],
+            title="X",
+            showgrid=True,
+            zeroline=False,
+        ),
+        yaxis=dict(
+            range=[-0.1, 1.1],
+            title="Y",
+            showgrid=True,
+            zeroline=False,
+        ),
+        width=600,
+        height=600,
+    )
+    return fig, fig2
+
+
+def _per_sequence_pca_figure(predictions: np.ndarray, pca_data: list) -> go.Figure:
+    fig = go.Figure()
+    added_labels = set()  # Track labels already added to the legend
+    for idx, distr in enumerate(predictions):
+        label = np.argmax(distr)
+        show_legend = label not in added_labels
+        if show_legend:
+            added_labels.add(label)
+        fig.add_trace(
+            go.Scatter3d(
+                x=pca_data[idx][:, 0],
+                y=pca_data[idx][:, 1],
+                z=pca_data[idx][:, 2],
+                mode="markers+lines",
+                marker=dict(
+                    size=[6] * (len(pca_data[idx]) - 1) + [8],
+                    symbol=["circle"] * (len(pca_data[idx]) - 1) + ["cross"],
+                    color=[LABEL_COLORS[label]] * len(pca_data[idx]),
+                    opacity=0.9,
+                ),
+                line=dict(color=LABEL_COLORS[label], width=2),
+                name=LABEL_NAMES[label],
+                showlegend=show_legend,
+            )
+        )
+    return fig
+
+
+def _grouped_pca_figure(predictions: np.ndarray, pca_data: list) -> go.Figure:
+    fig = go.Figure()
+    labels = np.argmax(predictions, axis=-1)
+    for label in np.unique(labels):
+        trajectories = [pca_data[i] for i in np.flatnonzero(labels == label)]
+        # A NaN point after each touch breaks the line between consecutive touches
+        points = np.concatenate(
+            [np.vstack([t, np.full((1, 3), np.nan)]) for t in trajectories]
+        ).astype(np.float32)
+        ends = np.stack([t[-1] for t in trajectories]).astype(np.float32)
+        color, name = LABEL_COLORS[label], LABEL_NAMES[label]
+        fig.add_trace(
+            go.Scatter3d(
+                x=points[:, 0],
+                y=points[:, 1],
+                z=points[:, 2],
+                mode="markers+lines",
+                marker=dict(size=6, symbol="circle", color=color, opacity=0.9),
+                line=dict(color=color, width=2),
+                name=name,
+                legendgroup=name,
+            )
         )
+        # Last state of each touch, in a separate trace to avoid per-point styles
+        fig.add_trace(
+            go.Scatter3d(
+                x=ends[:, 0],
+                y=ends[:, 1],
+                z=ends[:, 2],
+                mode="markers",
+                marker=dict(size=8, symbol="cross", color=color, opacity=0.9),
+                name=name,
+                legendgroup=name,
+                showlegend=False,
+            )
+        )
+    return fig
+
 
-        LABEL_POSITIONS = {
-            0: (0.5, 0.5),  # Center
-            1: (0.0, 0.0),  # Lower Left
-            2: (1.0, 0.0),  # Lower Right
-            3: (1.0, 1.0),  # Upper Right
-            4: (0.0, 1.0),  # Upper Left
-        }
-
-        fig2 = go.Figure()
-        for idx, prob_dist in enumerate(
-            predictions[TIME_SLIDER : TIME_SLIDER + DISPLAY_LIMIT]
-        ):
-            x = sum(prob_dist[i] * LABEL_POSITIONS[i][0] for i in range(5))
-            y = sum(prob_dist[i] * LABEL_POSITIONS[i][1] for i in range(5))
-            uncertainty = 1 - np.max(prob_dist)
-            color = LABEL_COLORS[np.argmax(prob_dist)]
-
-            fig2.add_trace(
-                go.Scatter(
-                    x=[x],
-                    y=[y],
+def _add_prototypes(fig: go.Figure, class_proto: dict, labels: set):
+    """Add the prototype point and std sphere of the displayed classes."""
+    unit_x, unit_y, unit_z = _unit_sphere()
+    for class_id, proto in class_proto.items():
+        if proto is not None and class_id in labels:
+            mean, std = proto
+            fig.add_trace(
+                go.Scatter3d(
+                    x=[mean[0]],
+                    y=[mean[1]],
+                    z=[mean[2]],
                     mode="markers",
                     marker=dict(
-                        size=20,
-                        color=color,
-                        opacity=0.3 + 0.7 * (1 - uncertainty),
-                        line=dict(width=1, color="black"),
+                        size=8,
+                        symbol="diamond",
+                        color=LABEL_COLORS[class_id],
+                        opacity=1.0,
                     ),
-                    showlegend=False,
+                    name=f"{LABEL_NAMES[class_id]} Proto",
+                    showlegend=True,
                 )
             )
 
-            # Add shaded circle to indicate uncertainty
-            theta = np.linspace(0, 2 * np.pi, 100)
-            radius = 0.1 + 0.2 * uncertainty  # Base radius scaled by uncertainty
-            circle_x = x + radius * np.cos(theta)
-            circle_y = y + radius * np.sin(theta)
-
-            fig2.add_trace(
-                go.Scatter(
-                    x=circle_x,
-                    y=circle_y,
-                    fill="toself",
-                    fillcolor=color,
-                    line=dict(color=color),
+            # Sphere representing the std deviation, centered at the mean
+            x = std[0] * unit_x + mean[0]
+            y = std[1] * unit_y + mean[1]
+            z = std[2] * unit_z + mean[2]
+
+            fig.add_trace(
+                go.Surface(
+                    x=x,
+                    y=y,
+                    z=z,
+                    showscale=False,
                     opacity=0.2,
-                    mode="lines",
+                    surfacecolor=np.full_like(x, class_id),
+                    colorscale=[
+                        [0, LABEL_COLORS[class_id]],
+                        [1, LABEL_COLORS[class_id]],
+                    ],
+                    name=f"{LABEL_NAMES[class_id]} Std",
                     showlegend=False,
                 )
             )
 
-        fig2.update_layout(
-            title="2D Pressure Point Visualization with Uncertainty",
-            xaxis=dict(
-                range=[-0.1, 1.1],
-                title="X",
-                showgrid=True,
-                zeroline=False,
-            ),
-            yaxis=dict(
-                range=[-0.1, 1.1],
-                title="Y",
-                showgrid=True,
-                zeroline=False,
-            ),
-            width=600,
-            height=600,
-        )
 
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.plotly_chart(fig, use_container_width=True)
+@functools.lru_cache(maxsize=1)
+def _unit_sphere() -> tuple:
+    """Unit sphere mesh, scaled and moved to each prototype."""
+    u, v = np.mgrid[0 : 2 * np.pi : 20j, 0 : np.pi : 10j]
+    # float32 halves the size of the arrays sent to the browser
+    sphere = np.sin(v) * np.cos(u), np.sin(v) * np.sin(u), np.cos(v)
+    return tuple(a.astype(np.float32) for a in sphere)
+
+
+def _per_sequence_pressure_figure(predictions: np.ndarray) -> go.Figure:
+    fig2 = go.Figure()
+    for idx, prob_dist in enumerate(predictions):
+        x = sum(prob_dist[i] * LABEL_POSITIONS[i][0] for i in range(5))
+        y = sum(prob_dist[i] * LABEL_POSITIONS[i][1] for i in range(5))
+        uncertainty = 1 - np.max(prob_dist)
+        color = LABEL_COLORS[np.argmax(prob_dist)]
+
+        fig2.add_trace(
+            go.Scatter(
+                x=[x],
+                y=[y],
+                mode="markers",
+                marker=dict(
+                    size=20,
+                    color=color,
+                    opacity=0.3 + 0.7 * (1 - uncertainty),
+                    line=dict(width=1, color="black"),
+                ),
+                showlegend=False,
+            )
+        )
 
-        with col2:
-            st.plotly_chart(fig2, use_container_width=True)
+        # Add shaded circle to indicate uncertainty
+        theta = np.linspace(0, 2 * np.pi, 100)
+        radius = 0.1 + 0.2 * uncertainty  # Base radius scaled by uncertainty
+        circle_x = x + radius * np.cos(theta)
+        circle_y = y + radius * np.sin(theta)
+
+        fig2.add_trace(
+            go.Scatter(
+                x=circle_x,
+                y=circle_y,
+                fill="toself",
+                fillcolor=color,
+                line=dict(color=color),
+                opacity=0.2,
+                mode="lines",
+                showlegend=False,
+            )
+        )
+    return fig2
+
+
+def _grouped_pressure_figure(predictions: np.ndarray) -> go.Figure:
+    fig2 = go.Figure()
+    positions = np.array([LABEL_POSITIONS[i] for i in range(predictions.shape[-1])])
+    xy = predictions @ positions
+    uncertainty = 1 - predictions.max(axis=-1)
+    labels = np.argmax(predictions, axis=-1)
+    # Base radius scaled by uncertainty, NaN-separated circles of each class
+    theta = np.append(np.linspace(0, 2 * np.pi, CIRCLE_POINTS), np.nan)
+    radius = (0.1 + 0.2 * uncertainty)[:, None]
+    circle_x = (xy[:, :1] + radius * np.cos(theta)).astype(np.float32)
+    circle_y = (xy[:, 1:] + radius * np.sin(theta)).astype(np.float32)
+    for label in np.unique(labels):
+        mask = labels == label
+        color = LABEL_COLORS[label]
+        fig2.add_trace(
+            go.Scatter(
+                x=circle_x[mask].ravel(),
+                y=circle_y[mask].ravel(),
+                fill="toself",
+                fillcolor=color,
+                line=dict(color=color),
+                opacity=0.2,
+                mode="lines",
+                showlegend=False,
+            )
+        )
+    fig2.add_trace(
+        go.Scatter(
+            x=xy[:, 0],
+            y=xy[:, 1],
+            mode="markers",
+            marker=dict(
+                size=20,
+                color=[LABEL_COLORS[label] for label in labels],
+                opacity=0.3 + 0.7 * (1 - uncertainty),
+                line=dict(width=1, color="black"),
+            ),
+            showlegend=False,
+        )
+    )
+    return fig2
@@ -0,0 +1,246 @@
+import fnmatch
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+# Polling mode: a changed file is stat-ed on every poll until it has not been
+# modified for ACTIVE_TIMEOUT seconds
+ACTIVE_TIMEOUT = 60.0
+# Polling mode: directories modified less than this many nanoseconds ago are listed
+# again, as their mtime may not change for files created within its resolution
+DIR_MTIME_RESOLUTION = 2_000_000_000
+
+
+class StorageWatcher:
+    """
+    Incremental discovery of the files matching ``pattern`` in ``directory``. Each
+    new or modified file gets an increasing sequence number, so that a consumer
+    only asks for the files changed since the last sequence number it has seen,
+    instead of listing and sorting the whole directory on each refresh.
+
+    Changes are received from the OS file notification API through ``watchdog``
+    (inotify on Linux). If it is not installed or cannot watch the directory (e.g.
+    inotify watch limit, network filesystem), the directory is polled instead: it is
+    only listed and its files stat-ed again when its mtime changes, i.e. when files
+    are created, renamed or removed. Otherwise only the recently modified files are
+    stat-ed, so that a file rewritten in place after ACTIVE_TIMEOUT seconds without
+    change is only seen at the next change of the directory.
+
+    The sequence numbers, sizes and mtimes of the known files are kept in an
+    append-only index file, so that after a restart only the files changed while
+    the watcher was not running are reported as new.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        pattern: str = "*",
+        index_path: Optional[str] = None,
+        use_notifications: bool = True,
+    ):
+        """Initialize the watcher and index the files already in ``directory``.
+
+        Args:
+            directory (str): Directory to watch, not recursively.
+            pattern (str): Shell-style pattern of the file names to watch.
+            index_path (str, optional): Path to the persistent index file. If None,
+                the index is only kept in memory.
+            use_notifications (bool): Receive changes from the OS, if available.
+                If False, the directory is always polled.
+        """
+        self.directory = str(directory)
+        self.pattern = pattern
+        self._match = re.compile(fnmatch.translate(pattern)).match
+        self.index_path = index_path
+        self.seq = 0
+        # File name -> (sequence number, size, mtime in ns), by sequence number
+        self.entries: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty: Set[str] = set()
+        self._active = {}
+        self._dir_mtime = None
+        self._index_file = None
+        self._observer = None
+
+        if self.index_path is not None:
+            self._load_index()
+            self._index_file = open(self.index_path, "a")
+        # Started before the scan, so that no change is lost in between
+        if use_notifications:
+            self._observer = self._start_observer()
+        self._scan()
+        self._flush_index()
+
+    @property
+    def mode(self) -> str:
+        """'notify' if the OS notifications are used, 'poll' otherwise."""
+        return "poll" if self._observer is None else "notify"
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def changes_since(self, seq: int) -> Tuple[List[str], int]:
+        """Return the paths of the files created or modified after the sequence
+        number ``seq``, sorted by name.
+
+        Args:
+            seq (int): Sequence number returned by a previous call, or 0 to get
+                all the files.
+
+        Returns:
+            list: Paths of the new or modified files.
+            int: Sequence number to pass to the next call.
+        """
+        with self._lock:
+            self._poll()
+            if seq > self.seq:
+                # The index has been deleted, the numbering started again
+                seq = 0
+            names = []
+            # Entries are ordered by sequence number, only the changes are visited
+            for name, (entry_seq, _, _) in reversed(self.entries.items()):
+                if entry_seq <= seq:
+                    break
+                names.append(name)
+            return [os.path.join(self.directory, n) for n in sorted(names)], self.seq
+
+    def close(self):
+        """Stop receiving notifications and close the index file."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                paths = [event.src_path, getattr(event, "dest_path", "")]
+                names = {os.path.basename(p) for p in paths if p}
+                # Only sets a flag, the files are stat-ed by the next poll
+                with watcher._lock:
+                    watcher._dirty.update(names)
+
+        observer = Observer()
+        try:
+            observer.schedule(Handler(), self.directory, recursive=False)
+            observer.start()
+        except OSError:
+            return None
+        return observer
+
+    def _poll(self):
+        if self._observer is not None and self._observer.is_alive():
+            names, self._dirty = self._dirty, set()
+        else:
+            self._observer = None
+            names = set(self._active)
+            mtime = os.stat(self.directory).st_mtime_ns
+            if (
+                mtime != self._dir_mtime
+                or time.time_ns() - mtime < DIR_MTIME_RESOLUTION
+            ):
+                self._dir_mtime = mtime
+                listed = set(os.listdir(self.directory))
+                # Created, replaced and removed files
+                names.update(listed)
+                names.update(self.entries.keys() - listed)
+        for name in names:
+            if self._match(name):
+                self._update(name)
+        self._flush_index()
+
+    def _scan(self):
+        self._dir_mtime = os.stat(self.directory).st_mtime_ns
+        listed = set()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if self._match(entry.name):
+                    listed.add(entry.name)
+                    self._record(entry.name, entry.stat(), track=False)
+        for name in self.entries.keys() - listed:
+            self._remove(name)
+
+    def _update(self, name: str):
+        try:
+            stat = os.stat(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            self._remove(name)
+            return
+        self._record(name, stat)
+
+    def _record(self, name: str, stat: os.stat_result, track: bool = True):
+        """Give a file a new sequence number if it changed since the last stat."""
+        entry = self.entries.get(name)
+        if entry is not None and entry[1:] == (stat.st_size, stat.st_mtime_ns):
+            if time.monotonic() - self._active.get(name, 0.0) > ACTIVE_TIMEOUT:
+                self._active.pop(name, None)
+            return
+        self.seq += 1
+        self.entries[name] = (self.seq, stat.st_size, stat.st_mtime_ns)
+        self.entries.move_to_end(name)
+        self._write_index(name, stat.st_size, stat.st_mtime_ns)
+        if track:
+            self._active[name] = time.monotonic()
+
+    def _remove(self, name: str):
+        if self.entries.pop(name, None) is not None:
+            self._write_index(name, -1, -1)
+        self._active.pop(name, None)
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        n_lines = 0
+        with open(self.index_path, "r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Truncated by an interrupted write
+                    continue
+                n_lines += 1
+                seq, size, mtime, name = line[:-1].split(" ", 3)
+                seq, size = int(seq), int(size)
+                self.seq = max(self.seq, seq)
+                if size < 0:
+                    self.entries.pop(name, None)
+                else:
+                    self.entries[name] = (seq, size, int(mtime))
+                    self.entries.move_to_end(name)
+        if n_lines > 2 * len(self.entries) + 1000:
+            self._compact_index()
+
+    def _compact_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            for name, (seq, size, mtime) in self.entries.items():
+                f.write(f"{seq} {size} {mtime} {name}\n")
+        os.replace(tmp, self.index_path)
+
+    def _write_index(self, name: str, size: int, mtime: int):
+        # One line per change: sequence number, size (-1 if removed), mtime, name
+        if self._index_file is not None:
+            self._index_file.write(f"{self.seq} {size} {mtime} {name}\n")
+
+    def _flush_index(self):
+        if self._index_file is not None:
+            self._index_file.flush()
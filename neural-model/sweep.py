@@ -0,0 +1,83 @@
+"""Hyperparameter sweep of the RON on the recorded follow-touch sessions.
+
+The sessions are the ``follow_touch_<FOLLOW_TOUCH_ID>_*.json`` files in STORAGE_PATH,
+their classes are read from a JSON file mapping each file name to the index of the
+touched contact point (see LABEL_NAMES in ``src/sessions.py``). Results are
+appended to a CSV table, run the script again to resume an interrupted sweep.
+
+Usage::
+
+    python sweep.py --labels labels.json --search random --n-configs 200
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from src.model.sweep import (
+    grid_search,
+    random_search,
+    run_sweep,
+)
+from src.sessions import (
+    FOLLOW_TOUCH_ID,
+    STORAGE_PATH,
+    load_data,
+    min_max_normalize,
+)
+
+
+def load_sessions(labels_path: str) -> tuple:
+    """Load and normalize the labelled sessions, unlabelled files are skipped."""
+    with open(labels_path, "r") as f:
+        labels = json.load(f)
+    sequences, classes = [], []
+    files = sorted(Path(STORAGE_PATH).glob(f"follow_touch_{FOLLOW_TOUCH_ID}_*.json"))
+    for path in files:
+        samples = load_data(path)
+        if samples is not None and path.name in labels:
+            sequences.append(min_max_normalize(samples))
+            classes.append(int(labels[path.name]))
+    return sequences, classes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--labels", required=True, help="JSON file name -> class")
+    parser.add_argument("--search", choices=("grid", "random"), default="random")
+    parser.add_argument("--n-configs", type=int, default=100)
+    parser.add_argument("--seeds", type=int, default=1, help="Seeds per config")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--out", default=str(Path(STORAGE_PATH) / "sweep.csv"))
+    args = parser.parse_args()
+
+    sequences, labels = load_sessions(args.labels)
+    if not sequences:
+        raise SystemExit(f"No labelled session found in {STORAGE_PATH}")
+    print(f"{len(sequences)} labelled sessions")
+
+    if args.search == "grid":
+        configs = grid_search()
+    else:
+        configs = random_search(args.n_configs)
+    configs = [dict(c, seed=seed) for c in configs for seed in range(args.seeds)]
+
+    results = run_sweep(
+        configs,
+        sequences,
+        labels,
+        args.out,
+        n_workers=args.workers,
+        n_folds=args.folds,
+    )
+    print("Best configurations:")
+    for row in results[:10]:
+        print(
+            f"  accuracy={row['accuracy']:.3f}+-{row['accuracy_std']:.3f} "
+            f"params={int(row['n_params'])} {row['config']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
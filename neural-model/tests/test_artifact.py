@@ -0,0 +1,61 @@
+"""Loading of the packed model files and detection of stale ones."""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+from src.model.artifact import (
+    ARTIFACT_NAME,
+    PT_FILES,
+    convert_model_dir,
+    load_model,
+)
+
+STORAGE_PATH = os.getenv(
+    "STORAGE_PATH", str(Path(__file__).resolve().parents[2] / "storage")
+)
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    source = os.path.join(STORAGE_PATH, "params_4")
+    for name in PT_FILES + (ARTIFACT_NAME,):
+        shutil.copy(os.path.join(source, name), tmp_path / name)
+    return tmp_path
+
+
+@pytest.mark.parametrize("model_dir_name", ["params_4", "params_10"])
+def test_stored_models_are_memory_mapped(model_dir_name):
+    _, weights = load_model(os.path.join(STORAGE_PATH, model_dir_name))
+    assert all(isinstance(w, np.memmap) for w in weights.values())
+
+
+def test_touched_pt_files_keep_the_artifact(model_dir):
+    convert_model_dir(str(model_dir))
+    future = time.time() + 60
+    for name in PT_FILES:
+        os.utime(model_dir / name, (future, future))
+    _, weights = load_model(str(model_dir))
+    assert all(isinstance(w, np.memmap) for w in weights.values())
+
+
+def test_refitted_pt_file_shadows_the_artifact(model_dir):
+    convert_model_dir(str(model_dir))
+    readout = torch.load(model_dir / "readout.pt", weights_only=True)
+    readout["bias"] = readout["bias"] + 1
+    torch.save(readout, model_dir / "readout.pt")
+
+    hyperparameters, weights = load_model(str(model_dir))
+    assert not isinstance(weights["readout.bias"], np.memmap)
+    np.testing.assert_array_equal(weights["readout.bias"], readout["bias"].numpy())
+    assert hyperparameters["dt"] == 0.2
+
+    convert_model_dir(str(model_dir))
+    _, weights = load_model(str(model_dir))
+    assert isinstance(weights["readout.bias"], np.memmap)
+    np.testing.assert_array_equal(weights["readout.bias"], readout["bias"].numpy())
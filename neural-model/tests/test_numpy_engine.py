@@ -0,0 +1,50 @@
+"""Parity of the NumPy engine with the torch Predictor on the stored models."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.model import NumpyPredictor, Predictor
+
+STORAGE_PATH = os.getenv(
+    "STORAGE_PATH", str(Path(__file__).resolve().parents[2] / "storage")
+)
+MODEL_DIRS = ("params_4", "params_10")
+ATOL = 1e-5
+
+
+@pytest.fixture(scope="module", params=MODEL_DIRS)
+def predictors(request):
+    model_path = os.path.join(STORAGE_PATH, request.param)
+    return Predictor(model_path=model_path), NumpyPredictor(model_path=model_path)
+
+
+@pytest.mark.parametrize("n_batch, seq_len", [(1, 50), (8, 200)])
+def test_call(predictors, n_batch, seq_len):
+    torch_predictor, numpy_predictor = predictors
+    n_inp = numpy_predictor.model.x2h.shape[0]
+    x = np.random.default_rng(0).random((n_batch, seq_len, n_inp))
+    pred_t, h_t = torch_predictor(x)
+    pred_n, h_n = numpy_predictor(x)
+    np.testing.assert_allclose(pred_n, pred_t, atol=ATOL)
+    np.testing.assert_allclose(h_n, h_t, atol=ATOL)
+
+
+@pytest.mark.parametrize("return_states", ["all", "last"])
+def test_predict_batch_ragged(predictors, return_states):
+    torch_predictor, numpy_predictor = predictors
+    n_inp = numpy_predictor.model.x2h.shape[0]
+    rng = np.random.default_rng(0)
+    sequences = [rng.random((seq_len, n_inp)) for seq_len in (1, 17, 50, 120, 3)]
+    pred_t, h_t = torch_predictor.predict_batch(sequences, return_states)
+    pred_n, h_n = numpy_predictor.predict_batch(sequences, return_states)
+    np.testing.assert_allclose(pred_n, pred_t, atol=ATOL)
+    assert len(h_n) == len(h_t) == len(sequences)
+    for states_n, states_t in zip(h_n, h_t):
+        np.testing.assert_allclose(states_n, states_t, atol=ATOL)
+    # Padding must not leak into the shorter sequences
+    for seq, pred in zip(sequences, pred_n):
+        alone, _ = numpy_predictor(seq[None], return_states="none")
+        np.testing.assert_allclose(pred, alone[0], atol=ATOL)
@@ -0,0 +1,50 @@
+"""Incremental PCA projection of the reservoir states."""
+
+import numpy as np
+from sklearn.decomposition import PCA
+
+from src.projection import IncrementalProjector
+
+N_HID = 20
+
+
+def make_states(rng, n):
+    """States with well separated explained variances, away from the origin."""
+    scales = np.geomspace(4.0, 0.1, N_HID)
+    basis, _ = np.linalg.qr(rng.normal(size=(N_HID, N_HID)))
+    return (rng.normal(size=(n, N_HID)) * scales) @ basis.T + rng.normal(size=N_HID)
+
+
+def test_matches_pca_on_all_states():
+    rng = np.random.default_rng(0)
+    states = make_states(rng, 2000)
+    # Always rebased, the display basis is the exact one
+    projector = IncrementalProjector(3, threshold=0.0)
+    for chunk in np.array_split(states, 7):
+        assert projector.partial_fit(chunk)
+    pca = PCA(3).fit(states)
+
+    np.testing.assert_allclose(projector.mean_, pca.mean_, atol=1e-10)
+    # Components are defined up to their sign
+    signs = np.sign(np.sum(projector.components_ * pca.components_, axis=1))
+    np.testing.assert_allclose(
+        projector.components_ * signs[:, None], pca.components_, atol=1e-8
+    )
+    np.testing.assert_allclose(
+        projector.transform(states) * signs, pca.transform(states), atol=1e-4
+    )
+
+
+def test_display_basis_kept_below_threshold():
+    rng = np.random.default_rng(1)
+    states = make_states(rng, 4000)
+    projector = IncrementalProjector(3, threshold=0.05)
+    assert projector.partial_fit(states[:2000])
+    components = projector.components_.copy()
+    projected = projector.transform(states[:10])
+
+    # Same distribution, the components barely move
+    assert not projector.partial_fit(states[2000:])
+    assert projector.n_rebases == 1
+    np.testing.assert_array_equal(projector.components_, components)
+    np.testing.assert_array_equal(projector.transform(states[:10]), projected)
@@ -0,0 +1,70 @@
+"""Running statistics of the class prototypes."""
+
+import numpy as np
+import pytest
+
+from src.projection import IncrementalProjector
+from src.prototypes import ClassPrototypes
+
+N_CLASSES = 3
+N_HID = 6
+
+
+def make_touches(rng, n):
+    labels = rng.integers(N_CLASSES, size=n)
+    states = rng.normal(size=(n, N_HID)) + 3 * labels[:, None]
+    return states, labels
+
+
+def weighted_statistics(states, weights):
+    mean = np.average(states, axis=0, weights=weights)
+    deviations = states - mean
+    return mean, (weights[:, None] * deviations).T @ deviations
+
+
+@pytest.mark.parametrize("forgetting", [1.0, 0.9])
+def test_matches_batch_statistics(forgetting):
+    rng = np.random.default_rng(0)
+    states, labels = make_touches(rng, 300)
+    prototypes = ClassPrototypes(N_CLASSES, forgetting=forgetting)
+    for chunk in np.array_split(np.arange(len(states)), 11):
+        prototypes.update(states[chunk], labels[chunk])
+
+    for c in range(N_CLASSES):
+        x = states[labels == c]
+        # The latest touch of the class has weight 1
+        weights = forgetting ** np.arange(len(x))[::-1]
+        mean, scatter = weighted_statistics(x, weights)
+        assert prototypes.counts[c] == len(x)
+        np.testing.assert_allclose(prototypes.weights[c], weights.sum())
+        np.testing.assert_allclose(prototypes.means[c], mean, atol=1e-12)
+        np.testing.assert_allclose(prototypes.scatters[c], scatter, atol=1e-9)
+        if forgetting == 1.0:
+            np.testing.assert_allclose(x.mean(axis=0), prototypes.means[c])
+            np.testing.assert_allclose(
+                np.cov(x, rowvar=False, ddof=0),
+                prototypes.scatters[c] / prototypes.weights[c],
+            )
+
+
+def test_project():
+    rng = np.random.default_rng(1)
+    states, labels = make_touches(rng, 200)
+    labels[labels == 2] = 0
+    prototypes = ClassPrototypes(N_CLASSES)
+    prototypes.update(states, labels)
+    projector = IncrementalProjector(2, threshold=0.0)
+    projector.partial_fit(states)
+
+    projected = prototypes.project(projector)
+    assert projected[2] is None
+    for c in range(2):
+        x = projector.transform(states[labels == c])
+        mean, std = projected[c]
+        np.testing.assert_allclose(mean, x.mean(axis=0), atol=1e-4)
+        np.testing.assert_allclose(std, x.std(axis=0), rtol=1e-4)
+
+
+def test_invalid_forgetting():
+    with pytest.raises(ValueError):
+        ClassPrototypes(N_CLASSES, forgetting=0)
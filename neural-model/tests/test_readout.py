@@ -0,0 +1,81 @@
+"""Calibration of the probabilities of the streamed ridge readout."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+from src.model import Predictor
+from src.model.numpy_engine import pad_sequences
+from src.model.readout import (
+    RidgeReadoutTrainer,
+    fit_inverse_temperature,
+)
+
+STORAGE_PATH = os.getenv(
+    "STORAGE_PATH", str(Path(__file__).resolve().parents[2] / "storage")
+)
+N_CLASSES = 5
+
+
+def make_sessions(rng, centers, n, noise):
+    """Noisy constant touches around the contact point of their class."""
+    labels = rng.integers(N_CLASSES, size=n)
+    sequences = [
+        np.clip(
+            centers[c]
+            + noise * rng.normal(size=4)
+            + noise * rng.normal(size=(rng.integers(20, 60), 4)),
+            0,
+            1,
+        )
+        for c in labels
+    ]
+    return sequences, labels
+
+
+def expected_calibration_error(probs, labels, n_bins=10):
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    bins = np.minimum((confidence * n_bins).astype(int), n_bins - 1)
+    return sum(
+        np.mean(bins == b)
+        * abs(confidence[bins == b].mean() - correct[bins == b].mean())
+        for b in np.unique(bins)
+    )
+
+
+def test_fit_inverse_temperature():
+    rng = np.random.default_rng(0)
+    scores = torch.from_numpy(rng.normal(size=(20000, N_CLASSES)))
+    labels = torch.multinomial(torch.softmax(2.5 * scores, dim=-1), 1).squeeze(1)
+    assert fit_inverse_temperature(scores, labels) == pytest.approx(2.5, rel=0.05)
+
+
+@pytest.mark.parametrize("noise", [0.15, 0.3])
+def test_refit_probabilities_are_calibrated(noise):
+    model = Predictor(model_path=os.path.join(STORAGE_PATH, "params_4")).model
+    rng = np.random.default_rng(0)
+    centers = rng.random((N_CLASSES, 4))
+    trainer = RidgeReadoutTrainer(model, n_classes=N_CLASSES)
+    sequences, labels = make_sessions(rng, centers, 1000, noise)
+    for i in range(0, len(sequences), 100):
+        trainer.partial_fit(sequences[i : i + 100], labels[i : i + 100])
+    readout, (mean, var) = trainer.solve()
+
+    sequences, labels = make_sessions(rng, centers, 2000, noise)
+    x, lengths = pad_sequences(sequences)
+    with torch.no_grad():
+        h = model(
+            torch.from_numpy(x).float(),
+            lengths=torch.from_numpy(lengths),
+            return_states="last",
+        )
+        probs = torch.softmax(readout((h - mean) / var.sqrt()), dim=-1).numpy()
+    accuracy = np.mean(probs.argmax(axis=1) == labels)
+    confidence = probs.max(axis=1).mean()
+    assert accuracy > 0.6
+    assert abs(confidence - accuracy) < 0.05
+    assert expected_calibration_error(probs, labels) < 0.08
@@ -0,0 +1,64 @@
+"""On-disk cache of the reservoir matrices."""
+
+import os
+import time
+
+import numpy as np
+import torch
+
+from src.model.utils import ReservoirCache
+
+N_HID = 16
+CONFIG = dict(n_hid=N_HID, topology="full", sparsity=0.0, scaler=1.0, rho=0.9)
+
+
+def cached_files(cache):
+    return sorted(f for f in os.listdir(cache.path) if f.endswith(".npy"))
+
+
+def test_hit_returns_identical_weights(tmp_path):
+    cache = ReservoirCache(str(tmp_path / "cache"))
+    torch_state = torch.random.get_rng_state()
+    np_state = np.random.get_state()[1].copy()
+    generated = cache.get(**CONFIG, seed=3).clone()
+    # The global RNGs are left untouched
+    assert torch.equal(torch.random.get_rng_state(), torch_state)
+    np.testing.assert_array_equal(np.random.get_state()[1], np_state)
+    assert len(cached_files(cache)) == 1
+
+    # A new cache on the same directory maps the stored matrix
+    mapped = ReservoirCache(str(tmp_path / "cache")).get(**CONFIG, seed=3)
+    assert torch.equal(mapped, generated)
+    assert len(cached_files(cache)) == 1
+    assert not torch.equal(cache.get(**CONFIG, seed=4), generated)
+
+
+def test_lru_eviction_respects_size_bound(tmp_path):
+    sizing = ReservoirCache(str(tmp_path / "sizing"))
+    sizing.get(**CONFIG, seed=0)
+    file_size = os.path.getsize(sizing._file(**CONFIG, seed=0))
+    max_bytes = int(2.5 * file_size)
+    cache = ReservoirCache(str(tmp_path / "cache"), max_bytes=max_bytes)
+    first = cache._file(**CONFIG, seed=1)
+    second = cache._file(**CONFIG, seed=2)
+    cache.get(**CONFIG, seed=1)
+    cache.get(**CONFIG, seed=2)
+    now = time.time()
+    os.utime(first, (now - 30, now - 30))
+    os.utime(second, (now - 20, now - 20))
+
+    # Reading the first one makes the second the least recently used
+    cache.get(**CONFIG, seed=1)
+    cache.get(**CONFIG, seed=5)
+    assert cached_files(cache) == sorted(
+        os.path.basename(cache._file(**CONFIG, seed=s)) for s in [1, 5]
+    )
+    total = sum(
+        os.path.getsize(os.path.join(cache.path, f)) for f in os.listdir(cache.path)
+    )
+    assert total <= max_bytes
+
+    # A matrix larger than the bound is still returned and kept
+    small = ReservoirCache(str(tmp_path / "cache"), max_bytes=file_size // 2)
+    assert small.get(**CONFIG, seed=6).shape == (N_HID, N_HID)
+    assert cached_files(small) == [os.path.basename(small._file(**CONFIG, seed=6))]
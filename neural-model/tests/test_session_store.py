@@ -0,0 +1,58 @@
+"""Spilling of the session touches to disk."""
+
+import os
+
+import numpy as np
+import pytest
+
+from src.session_store import SessionStore
+
+N_CLASSES = 5
+N_HID = 8
+
+
+def make_touches(rng, n):
+    """Predictions and ragged trajectories of n touches."""
+    predictions = rng.random((n, N_CLASSES)).astype(np.float32)
+    states = [
+        rng.normal(size=(rng.integers(1, 30), N_HID)).astype(np.float32)
+        for _ in range(n)
+    ]
+    return predictions, states
+
+
+def test_spilled_touches_read_back_identical(tmp_path):
+    rng = np.random.default_rng(0)
+    predictions, states = make_touches(rng, 23)
+    store = SessionStore(window=5, path=tmp_path)
+    # Spilled in uneven batches
+    for start, stop in [(0, 3), (3, 4), (4, 15), (15, 23)]:
+        store.extend(predictions[start:stop], states[start:stop])
+    assert len(store) == 23
+    assert store.n_spilled == 18
+
+    # Ranges within the spill files, the memory window and across both
+    for start, stop in [(0, 23), (0, 1), (2, 11), (16, 20), (18, 23), (-3, 23)]:
+        expected = slice(start, stop)
+        np.testing.assert_array_equal(
+            store.predictions(start, stop), predictions[expected]
+        )
+        read = store.states(start, stop)
+        assert len(read) == len(states[expected])
+        for h, h_expected in zip(read, states[expected]):
+            np.testing.assert_array_equal(h, h_expected)
+    assert store.predictions(5, 5).shape == (0, N_CLASSES)
+    assert store.states(30, 40) == []
+
+
+def test_close_removes_spill_files(tmp_path):
+    store = SessionStore(window=1, path=tmp_path)
+    store.extend(*make_touches(np.random.default_rng(1), 3))
+    assert os.listdir(store.directory)
+    store.close()
+    assert not os.path.exists(store.directory)
+
+
+def test_invalid_window():
+    with pytest.raises(ValueError):
+        SessionStore(window=0)
@@ -0,0 +1,129 @@
+"""Decision rule of the early-exit classification."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.model import NumpyPredictor
+from src.model.streaming import (
+    DEFAULT_EARLY_EXIT,
+    EarlyExitStream,
+    _early_exit_errors,
+    calibrate_early_exit,
+)
+
+STORAGE_PATH = os.getenv(
+    "STORAGE_PATH", str(Path(__file__).resolve().parents[2] / "storage")
+)
+
+
+class ScriptedModel:
+    """Reservoir whose state is the number of samples processed."""
+
+    def init_state(self, n_batch):
+        return (0,)
+
+    def step(self, x_t, state):
+        return (state[0] + 1,)
+
+
+class ScriptedPredictor:
+    """Predictor returning given class probabilities at each step."""
+
+    def __init__(self, probabilities, early_exit=None):
+        self.probabilities = np.asarray(probabilities, dtype=float)
+        self.model = ScriptedModel()
+        self.early_exit = {**DEFAULT_EARLY_EXIT, **(early_exit or {})}
+
+    def _as_input(self, x):
+        return x
+
+    def _readout(self, n_steps):
+        return self.probabilities[n_steps - 1][None]
+
+
+def scripted(*labels_and_confidences):
+    probabilities = []
+    for label, confidence in labels_and_confidences:
+        p = np.full(3, (1 - confidence) / 2)
+        p[label] = confidence
+        probabilities.append(p)
+    return probabilities
+
+
+STEPS = scripted(
+    (0, 0.99), (0, 0.99), (1, 0.95), (1, 0.5), (1, 0.95), (1, 0.95), (1, 0.95), (2, 0.6)
+)
+
+
+def run(predictor, **rule):
+    stream = EarlyExitStream(predictor, **rule)
+    stream.update(np.zeros((len(predictor.probabilities), 1)))
+    probabilities, n_steps = stream.finish()
+    return stream.label, int(np.argmax(probabilities)), n_steps
+
+
+@pytest.mark.parametrize(
+    "rule, expected",
+    [
+        # Decided on the first confident sample
+        (dict(threshold=0.9, min_steps=1, patience=1), (0, 0, 1)),
+        # The class must stay confident: the drop of step 4 resets the run
+        (dict(threshold=0.9, min_steps=1, patience=2), (0, 0, 2)),
+        (dict(threshold=0.9, min_steps=2, patience=2), (1, 1, 6)),
+        (dict(threshold=0.9, min_steps=1, patience=3), (1, 1, 7)),
+        (dict(threshold=0.4, min_steps=3, patience=3), (1, 1, 5)),
+        # Never confident enough: prediction on the whole sequence
+        (dict(threshold=0.999, min_steps=1, patience=1), (None, 2, 8)),
+        (dict(threshold=0.9, min_steps=1, patience=4), (None, 2, 8)),
+    ],
+)
+def test_decision_rule(rule, expected):
+    assert run(ScriptedPredictor(STEPS), **rule) == expected
+
+
+def test_defaults_come_from_the_model():
+    predictor = ScriptedPredictor(
+        STEPS, early_exit={"threshold": 0.9, "min_steps": 2, "patience": 2}
+    )
+    assert run(predictor) == (1, 1, 6)
+    assert run(predictor, min_steps=1) == (0, 0, 2)
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [dict(threshold=0), dict(threshold=1.5), dict(min_steps=0), dict(patience=0)],
+)
+def test_invalid_rule(rule):
+    with pytest.raises(ValueError):
+        EarlyExitStream(ScriptedPredictor(STEPS), **rule)
+
+
+def test_errors_match_the_stream():
+    probabilities = np.asarray(STEPS)
+    for patience in (1, 2, 3):
+        errors = _early_exit_errors(probabilities, 0.9, patience)
+        for min_steps in range(1, len(STEPS) + 1):
+            label, _, _ = run(
+                ScriptedPredictor(STEPS),
+                threshold=0.9,
+                min_steps=min_steps,
+                patience=patience,
+            )
+            assert errors[min_steps - 1] == (label is not None and label != 2)
+
+
+@pytest.mark.parametrize("model_dir", ["params_4", "params_10"])
+def test_calibrated_rule_agrees_with_the_whole_touch(model_dir):
+    predictor = NumpyPredictor(model_path=os.path.join(STORAGE_PATH, model_dir))
+    n_inp = predictor.model.x2h.shape[0]
+    rng = np.random.default_rng(0)
+    sequences = [rng.random((rng.integers(50, 150), n_inp)) for _ in range(32)]
+    rule = calibrate_early_exit(predictor, [sequences[:16], sequences[16:]])
+    full = predictor.predict_batch(sequences, return_states="none")[0].argmax(-1)
+    early = [predictor.predict_early(x, **rule)[0].argmax() for x in sequences]
+    assert np.mean(np.array(early) == full) >= 0.99
+    # The transient of the reservoir is confidently misclassified by these readouts
+    assert rule["min_steps"] > 1
@@ -0,0 +1,58 @@
+"""Resumable hyperparameter sweep."""
+
+import numpy as np
+import pytest
+
+from src.model.sweep import (
+    BASE_CONFIG,
+    config_key,
+    evaluate_config,
+    load_results,
+    run_sweep,
+)
+
+
+@pytest.fixture
+def sessions():
+    rng = np.random.default_rng(0)
+    labels = [0, 1, 2] * 4
+    sequences = [rng.random((rng.integers(10, 30), 4)) + c for c in labels]
+    return sequences, labels
+
+
+@pytest.fixture
+def configs():
+    return [dict(BASE_CONFIG, n_hid=8, seed=seed) for seed in range(3)]
+
+
+def test_evaluate_config_clamps_folds(sessions, configs):
+    sequences, labels = sessions
+    result = evaluate_config(configs[0], sequences, labels, n_folds=10)
+    assert 0 <= result["accuracy"] <= 1
+
+
+def test_resumed_sweep_skips_done_configs(sessions, configs, tmp_path):
+    sequences, labels = sessions
+    path = tmp_path / "sweep.csv"
+    run_sweep(configs[:2], sequences, labels, path, n_workers=1, n_folds=3)
+    first = {config_key(row["config"]): row for row in load_results(path)}
+    assert len(first) == 2
+
+    results = run_sweep(configs, sequences, labels, path, n_workers=1, n_folds=3)
+    rows = load_results(path)
+    assert len(rows) == len(results) == 3
+    assert {config_key(row["config"]) for row in rows} == set(map(config_key, configs))
+    # The configurations already in the table are not evaluated again
+    for row in rows:
+        key = config_key(row["config"])
+        if key in first:
+            assert row["seconds"] == first[key]["seconds"]
+
+
+def test_single_session_class_fails_before_sweeping(sessions, configs, tmp_path):
+    sequences, labels = sessions
+    labels = labels[:-1] + [3]
+    path = tmp_path / "sweep.csv"
+    with pytest.raises(ValueError, match="single session"):
+        run_sweep(configs, sequences, labels, path, n_workers=1)
+    assert not path.exists()
@@ -0,0 +1,111 @@
+"""Incremental discovery of the touch files by the storage watcher."""
+
+import os
+import time
+
+import pytest
+
+from src.watcher import StorageWatcher
+
+PATTERN = "follow_touch_*.json"
+
+
+def write(path, content, mtime_ns=None):
+    path.write_text(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def wait_for_changes(watcher, seq, expected, timeout=5.0):
+    """Changes since seq, waiting for the notifications to be delivered."""
+    deadline = time.monotonic() + timeout
+    while True:
+        files, next_seq = watcher.changes_since(seq)
+        if set(expected) <= set(files) or time.monotonic() > deadline:
+            return files, next_seq
+        time.sleep(0.05)
+
+
+@pytest.fixture(params=[True, False], ids=["notify", "poll"])
+def use_notifications(request):
+    return request.param
+
+
+def test_new_and_changed_files(tmp_path, use_notifications):
+    write(tmp_path / "follow_touch_1_a.json", "[]")
+    write(tmp_path / "other.json", "[]")
+    watcher = StorageWatcher(tmp_path, PATTERN, use_notifications=use_notifications)
+    try:
+        files, seq = watcher.changes_since(0)
+        assert files == [str(tmp_path / "follow_touch_1_a.json")]
+        assert len(watcher) == 1
+        assert watcher.changes_since(seq) == ([], seq)
+
+        write(tmp_path / "follow_touch_1_b.json", "[]")
+        write(tmp_path / "follow_touch_1_a.json", "[[1, 2]]")
+        expected = [
+            str(tmp_path / "follow_touch_1_a.json"),
+            str(tmp_path / "follow_touch_1_b.json"),
+        ]
+        files, next_seq = wait_for_changes(watcher, seq, expected)
+        assert files == expected
+        assert next_seq > seq
+        assert len(watcher) == 2
+
+        # A file rewritten with the same size is detected from its mtime
+        mtime = os.stat(tmp_path / "follow_touch_1_b.json").st_mtime_ns
+        write(tmp_path / "follow_touch_1_b.json", "{}", mtime + 10**9)
+        files, _ = wait_for_changes(watcher, next_seq, expected[1:])
+        assert files == expected[1:]
+    finally:
+        watcher.close()
+
+
+def test_polling_fallback(tmp_path):
+    watcher = StorageWatcher(tmp_path, PATTERN, use_notifications=False)
+    try:
+        assert watcher.mode == "poll"
+        files, seq = watcher.changes_since(0)
+        assert files == [] and len(watcher) == 0
+
+        # Created within the mtime resolution of the directory listed at the start
+        write(tmp_path / "follow_touch_1_a.json", "[]")
+        files, seq = watcher.changes_since(seq)
+        assert files == [str(tmp_path / "follow_touch_1_a.json")]
+
+        os.remove(tmp_path / "follow_touch_1_a.json")
+        files, seq = watcher.changes_since(seq)
+        assert files == [] and len(watcher) == 0
+    finally:
+        watcher.close()
+
+
+def test_index_persisted_across_restarts(tmp_path):
+    storage = tmp_path / "storage"
+    storage.mkdir()
+    index_path = str(tmp_path / "index")
+    mtime = time.time_ns() - 10 * 10**9
+    for name in ["follow_touch_1_a.json", "follow_touch_1_b.json"]:
+        write(storage / name, "[]", mtime)
+
+    watcher = StorageWatcher(storage, PATTERN, index_path, use_notifications=False)
+    files, seq = watcher.changes_since(0)
+    watcher.close()
+    assert len(files) == 2
+
+    # Changed while no watcher was running
+    write(storage / "follow_touch_1_a.json", "[[1]]", mtime)
+    write(storage / "follow_touch_1_c.json", "[]", mtime)
+
+    watcher = StorageWatcher(storage, PATTERN, index_path, use_notifications=False)
+    try:
+        files, next_seq = watcher.changes_since(seq)
+        assert files == [
+            str(storage / "follow_touch_1_a.json"),
+            str(storage / "follow_touch_1_c.json"),
+        ]
+        assert next_seq > seq
+        assert len(watcher) == 3
+        assert len(watcher.changes_since(0)[0]) == 3
+    finally:
+        watcher.close()
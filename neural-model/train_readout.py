@@ -0,0 +1,131 @@
+"""Refit the readout of a stored model on the recorded follow-touch sessions, e.g.
+to recalibrate it for a new physical sensor.
+
+The sessions are the ``follow_touch_<FOLLOW_TOUCH_ID>_*.json`` files in STORAGE_PATH,
+their classes are read from a JSON file mapping each file name to the index of the
+touched contact point (see LABEL_NAMES in ``src/sessions.py``). Sessions are
+streamed through the reservoir in batches, so the dataset never needs to fit in
+memory, and the temperature of the softmax is calibrated on a held-out fraction of
+them. The same held-out sessions then set the number of samples the early exit of
+``Predictor.stream`` waits for at the given confidence threshold. ``readout.pt`` and
+``scaler.pt`` are overwritten in the model directory, and its packed ``model.ron``
+file is rebuilt from them, with the early-exit rule in its header.
+
+Usage::
+
+    python train_readout.py --labels labels.json --alpha 1.0
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import torch
+
+from src.model import NumpyPredictor
+from src.model.artifact import (
+    convert_model_dir,
+    load_model,
+)
+from src.model.readout import RidgeReadoutTrainer
+from src.model.ron import RandomizedOscillatorsNetwork
+from src.model.streaming import (
+    DEFAULT_EARLY_EXIT,
+    calibrate_early_exit,
+)
+from src.sessions import (
+    FOLLOW_TOUCH_ID,
+    LABEL_CLASSES,
+    MODEL_INPUT_SIZE,
+    STORAGE_PATH,
+    load_data,
+    min_max_normalize,
+)
+
+
+def iter_sessions(labels_path: str, batch_size: int):
+    """Yield batches of (normalized sessions, classes), unlabelled files are skipped."""
+    with open(labels_path, "r") as f:
+        labels = json.load(f)
+    sequences, classes = [], []
+    files = sorted(Path(STORAGE_PATH).glob(f"follow_touch_{FOLLOW_TOUCH_ID}_*.json"))
+    for path in files:
+        if path.name not in labels:
+            continue
+        samples = load_data(path)
+        if samples is None:
+            continue
+        sequences.append(min_max_normalize(samples))
+        classes.append(int(labels[path.name]))
+        if len(sequences) == batch_size:
+            yield sequences, classes
+            sequences, classes = [], []
+    if sequences:
+        yield sequences, classes
+
+
+def iter_held_out(labels_path: str, batch_size: int, every: int):
+    """Yield batches of the sessions held out by :class:`RidgeReadoutTrainer`, every
+    ``every``-th one in the order of :func:`iter_sessions`."""
+    index = 0
+    for sequences, _ in iter_sessions(labels_path, batch_size):
+        held_out = [
+            x for i, x in enumerate(sequences, start=index) if i % every == every - 1
+        ]
+        index += len(sequences)
+        if held_out:
+            yield held_out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--labels", required=True, help="JSON file name -> class")
+    parser.add_argument(
+        "--model-path", default=str(Path(STORAGE_PATH) / f"params_{MODEL_INPUT_SIZE}")
+    )
+    parser.add_argument("--alpha", type=float, default=1.0)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_EARLY_EXIT["threshold"]
+    )
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    hyperparameters, weights = load_model(args.model_path)
+    model = RandomizedOscillatorsNetwork.from_state_dict(
+        {
+            name[len("ron.") :]: torch.from_numpy(w)
+            for name, w in weights.items()
+            if name.startswith("ron.")
+        },
+        dt=hyperparameters["dt"],
+        diffusive_gamma=hyperparameters["diffusive_gamma"],
+    )
+    trainer = RidgeReadoutTrainer(
+        model, n_classes=LABEL_CLASSES, alpha=args.alpha, holdout=args.holdout
+    )
+    for sequences, classes in iter_sessions(args.labels, args.batch_size):
+        trainer.partial_fit(sequences, classes)
+    if trainer.n_samples == 0:
+        raise SystemExit(f"No labelled session found in {STORAGE_PATH}")
+    trainer.save(args.model_path)
+    # The packed file, if any, is stale until rebuilt: the new .pt files are read
+    early_exit = calibrate_early_exit(
+        NumpyPredictor(model_path=args.model_path),
+        iter_held_out(args.labels, args.batch_size, trainer.holdout_every),
+        threshold=args.threshold,
+    )
+    convert_model_dir(args.model_path, {"early_exit": early_exit})
+    n_held_out = trainer.n_seen - trainer.n_samples
+    print(
+        f"Fitted the readout on {trainer.n_samples} sessions, temperature "
+        f"{trainer.temperature:.3g} and early exit {early_exit} calibrated on "
+        f"{n_held_out} held-out sessions, in {time.perf_counter() - start:.2f}s, "
+        f"written to {args.model_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()